@@ -0,0 +1,98 @@
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from benchmarks.fixtures import ffmpeg_version
+from benchmarks.suite import BenchmarkSuite, compare
+
+# Fraction by which a result may be worse than its baseline before it counts as a regression
+DEFAULT_TOLERANCE = 0.15
+
+def parse_arguments(argv=None) -> argparse.Namespace:
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the scanner, transcoder and scheduler on synthetic media fixtures."
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=Path,
+        help="Write the results to this JSON file instead of standard output."
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Compare the results with a stored baseline and exit with status 1 on regressions."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Fraction by which a result may be worse than the baseline (default={DEFAULT_TOLERANCE})"
+    )
+    parser.add_argument(
+        "--work-dir",
+        type=Path,
+        help="Keep fixtures in this directory and reuse them on later runs (default=a temporary directory)"
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        metavar="NAME",
+        help="Run only this benchmark; may be repeated."
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Use smaller fixtures and a single repetition, e.g. for CI."
+    )
+    parser.add_argument(
+        "-t", "--threads",
+        type=int,
+        default=2,
+        help="Number of CPU threads for ffmpeg (default=2)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_arguments(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+
+    if args.work_dir is not None:
+        args.work_dir.mkdir(parents=True, exist_ok=True)
+        measurements = BenchmarkSuite(args.work_dir, quick=args.quick, threads=args.threads).run(args.only)
+    else:
+        with tempfile.TemporaryDirectory(prefix="transcode-bench-") as work_dir:
+            measurements = BenchmarkSuite(Path(work_dir), quick=args.quick, threads=args.threads).run(args.only)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ffmpeg": ffmpeg_version(),
+        "quick": args.quick,
+        "results": {m.name: m.to_dict() for m in measurements}
+    }
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n")
+        logging.info(f"Benchmark results written to {args.output}")
+    else:
+        print(text)
+
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(report["results"], baseline.get("results", {}), args.tolerance)
+    for regression in regressions:
+        logging.error(f"Regression in {regression}")
+    if not regressions:
+        logging.info(f"No regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
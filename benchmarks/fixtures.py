@@ -0,0 +1,105 @@
+import random
+import shutil
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Extensions of the placeholder media files in a small-file tree, with the
+# share of non-media files the walker has to filter out
+SMALL_FILE_EXTENSIONS = (".mkv", ".mp4", ".ts", ".avi", ".nfo", ".jpg", ".srt", ".txt")
+
+@dataclass(frozen=True)
+class MediaSpec:
+    """A synthetic media file rendered by ffmpeg from the ``testsrc`` and ``sine`` sources."""
+    name: str
+    video_codec: str
+    width: int
+    height: int
+    seconds: float
+    frame_rate: int = 25
+    audio_codec: str = "ac3"
+    container: str = "matroska"
+
+    @property
+    def frames(self) -> int:
+        return int(self.seconds * self.frame_rate)
+
+# Media fixtures covering the codecs and resolutions the transcoder decides between
+MEDIA_SPECS = (
+    MediaSpec("sd_mpeg2.ts", "mpeg2video", 720, 576, 10.0, container="mpegts"),
+    MediaSpec("hd_mpeg4.avi", "mpeg4", 1280, 720, 10.0, audio_codec="mp3", container="avi"),
+    MediaSpec("fhd_h264.mp4", "libx264", 1920, 1080, 10.0, audio_codec="aac", container="mp4"),
+    MediaSpec("fhd_mpeg2.mkv", "mpeg2video", 1920, 1080, 20.0)
+)
+
+# A reduced set for quick runs
+QUICK_MEDIA_SPECS = MEDIA_SPECS[:2]
+
+def ffmpeg_available() -> bool:
+    """Check whether ffmpeg and ffprobe can be run from the PATH."""
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+def ffmpeg_version() -> Optional[str]:
+    """The first line of ``ffmpeg -version``, or None if ffmpeg is unavailable."""
+    if not ffmpeg_available():
+        return None
+    result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True)
+    return result.stdout.splitlines()[0] if result.stdout else None
+
+def build_media_command(spec: MediaSpec, output_file: Path) -> List[str]:
+    """Construct the FFmpeg command that renders a media fixture.
+
+    The test pattern and tone are generated deterministically and the
+    encoders run single-threaded with bit-exact flags, so a fixture has the
+    same content on every run with the same ffmpeg build.
+    """
+    return [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel", "error",
+        "-f", "lavfi",
+        "-i", f"testsrc=size={spec.width}x{spec.height}:rate={spec.frame_rate}:duration={spec.seconds}",
+        "-f", "lavfi",
+        "-i", f"sine=frequency=440:sample_rate=48000:duration={spec.seconds}",
+        "-c:v", spec.video_codec,
+        "-c:a", spec.audio_codec,
+        "-threads", "1",
+        "-fflags", "+bitexact",
+        "-flags:v", "+bitexact",
+        "-flags:a", "+bitexact",
+        "-f", spec.container,
+        "-y", str(output_file)
+    ]
+
+def make_media_tree(root: Path, specs=MEDIA_SPECS) -> List[Tuple[MediaSpec, Path]]:
+    """Render every media fixture into a directory, reusing those already there."""
+    root.mkdir(parents=True, exist_ok=True)
+    fixtures = []
+    for spec in specs:
+        output_file = root / spec.name
+        if not output_file.exists():
+            partial_file = output_file.with_name(f"{output_file.name}.part")
+            subprocess.run(build_media_command(spec, partial_file), check=True)
+            partial_file.replace(output_file)
+        fixtures.append((spec, output_file))
+    return fixtures
+
+def make_small_file_tree(root: Path, directories: int, files_per_directory: int, seed: int = 0) -> int:
+    """Create a deterministic library of many small files in nested directories.
+
+    Every run with the same arguments produces the same names, nesting and
+    sizes. Returns the number of files with a media extension.
+    """
+    rng = random.Random(seed)
+    media_files = 0
+    for idx in range(directories):
+        depth = rng.randint(1, 3)
+        directory = root.joinpath(*(f"dir{idx:04d}_{level}" for level in range(depth)))
+        directory.mkdir(parents=True, exist_ok=True)
+        for file_idx in range(files_per_directory):
+            extension = rng.choice(SMALL_FILE_EXTENSIONS)
+            (directory / f"file{file_idx:04d}{extension}").write_bytes(b"\x00" * rng.randint(0, 4096))
+            if extension in (".mkv", ".mp4", ".ts", ".avi"):
+                media_files += 1
+    return media_files
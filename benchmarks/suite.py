@@ -0,0 +1,229 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from benchmarks.fixtures import (
+    MEDIA_SPECS, QUICK_MEDIA_SPECS, ffmpeg_available, make_media_tree, make_small_file_tree
+)
+from src.config.settings import VIDEO_EXTENSIONS
+from src.core.directory_walker import DirectoryWalker
+from src.core.job_scheduler import JobScheduler
+from src.core.media_file import MediaFile
+from src.core.media_scanner import MediaScanner
+from src.core.probe_cache import ProbeCache
+from src.core.transcoder import Transcoder
+
+# x264 presets whose encode speed is measured
+ENCODE_PRESETS = ("ultrafast", "veryfast", "medium")
+
+@dataclass
+class Measurement:
+    """One benchmark result."""
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool = True
+
+    def to_dict(self) -> dict:
+        fields = asdict(self)
+        del fields["name"]
+        return fields
+
+def best_of(repeats: int, run: Callable[[], None]) -> float:
+    """Run a workload several times and return the fastest wall time in seconds."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+class NullTranscoder:
+    """A transcoder that finishes every job at once, for measuring the scheduler's own cost."""
+
+    def transcode(self, media_file: MediaFile, dry_run: bool = False, threads: Optional[int] = None) -> bool:
+        return True
+
+    def cancel(self):
+        pass
+
+class BenchmarkSuite:
+    """Measures the scanner, transcoder and scheduler on synthetic fixtures.
+
+    Fixtures are generated below ``work_dir``: a tree of many small files,
+    which needs nothing but the filesystem, and a set of short media files
+    rendered by ffmpeg, which are reused when already present. Benchmarks
+    that run ffmpeg or ffprobe are skipped when they are not installed.
+    """
+
+    def __init__(self, work_dir: Path, quick: bool = False, repeats: int = 3, threads: int = 2):
+        self.work_dir = Path(work_dir)
+        self.quick = quick
+        self.repeats = 1 if quick else repeats
+        self.threads = threads
+        self.media_specs = QUICK_MEDIA_SPECS if quick else MEDIA_SPECS
+        self.tree_shape = (50, 20) if quick else (400, 50)
+        self._small_tree = None
+        self._media = None
+
+    def benchmarks(self) -> Dict[str, Callable[[], List[Measurement]]]:
+        """Every benchmark by name, in the order they run."""
+        return {
+            "walk": self.bench_walk,
+            "scheduler_overhead": self.bench_scheduler_overhead,
+            "probe": self.bench_probe,
+            "scan": self.bench_scan,
+            "encode": self.bench_encode,
+            "scheduler_throughput": self.bench_scheduler_throughput
+        }
+
+    def run(self, only: Optional[List[str]] = None) -> List[Measurement]:
+        """Run the selected benchmarks, or all of them, and collect their measurements."""
+        measurements = []
+        for name, benchmark in self.benchmarks().items():
+            if only and name not in only:
+                continue
+            logging.info(f"Running benchmark: {name}")
+            measurements.extend(benchmark())
+        return measurements
+
+    def small_tree(self):
+        """The small-file tree and the number of media files in it, created on first use."""
+        if self._small_tree is None:
+            root = self.work_dir / "small_tree"
+            directories, files_per_directory = self.tree_shape
+            if root.exists():
+                shutil.rmtree(root)
+            self._small_tree = (root, make_small_file_tree(root, directories, files_per_directory))
+        return self._small_tree
+
+    def media_tree(self):
+        """The rendered media fixtures, created on first use."""
+        if self._media is None:
+            self._media = make_media_tree(self.work_dir / "media", self.media_specs)
+        return self._media
+
+    def bench_walk(self) -> List[Measurement]:
+        """Files per second found by the directory walker in a tree of many small files."""
+        root, media_files = self.small_tree()
+        walker = DirectoryWalker(VIDEO_EXTENSIONS)
+        seconds = best_of(self.repeats, lambda: sum(1 for _ in walker.walk(root)))
+        return [Measurement("walk_rate", media_files / seconds, "files/s")]
+
+    def bench_scheduler_overhead(self) -> List[Measurement]:
+        """Jobs per second the scheduler dispatches when every job finishes at once."""
+        media_files = [MediaFile(path=Path(f"/bench/{idx}.mkv"), size_gb=1.0) for idx in range(2000)]
+        scheduler = JobScheduler(NullTranscoder(), max_jobs=4, thread_budget=8)
+        # Keep the per-job log lines out of the output and the measurement
+        logging.disable(logging.INFO)
+        try:
+            seconds = best_of(self.repeats, lambda: scheduler.run(media_files))
+        finally:
+            logging.disable(logging.NOTSET)
+        return [Measurement("scheduler_overhead", len(media_files) / seconds, "jobs/s")]
+
+    def bench_probe(self) -> List[Measurement]:
+        """ffprobe calls per second over the media fixtures."""
+        if not self._needs_ffmpeg("probe"):
+            return []
+        paths = [path for _, path in self.media_tree()]
+        seconds = best_of(self.repeats, lambda: [MediaScanner.probe_media(path) for path in paths])
+        return [Measurement("probe_rate", len(paths) / seconds, "files/s")]
+
+    def bench_scan(self) -> List[Measurement]:
+        """End-to-end time to scan and fully probe the media fixtures, cold and with a warm cache."""
+        if not self._needs_ffmpeg("scan"):
+            return []
+        root = self.work_dir / "media"
+        self.media_tree()
+        with tempfile.TemporaryDirectory(prefix="bench-cache-") as cache_dir:
+            cache = ProbeCache(Path(cache_dir) / "probe_cache.sqlite3")
+            try:
+                scanner = MediaScanner(VIDEO_EXTENSIONS, max_workers=4, cache=cache)
+
+                def scan():
+                    for media in scanner.scan_directory(root):
+                        media.streams
+
+                cold = best_of(1, scan)
+                warm = best_of(self.repeats, scan)
+            finally:
+                cache.close()
+        return [
+            Measurement("scan_seconds", cold, "s", higher_is_better=False),
+            Measurement("scan_cached_seconds", warm, "s", higher_is_better=False)
+        ]
+
+    def bench_encode(self) -> List[Measurement]:
+        """Frames per second libx264 encodes the largest fixture at for each preset."""
+        if not self._needs_ffmpeg("encode"):
+            return []
+        spec, path = max(self.media_tree(), key=lambda item: item[0].width * item[0].height * item[0].frames)
+        measurements = []
+        for preset in ENCODE_PRESETS[:1] if self.quick else ENCODE_PRESETS:
+            command = [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-i", str(path),
+                "-c:v", "libx264", "-preset", preset, "-crf", "23",
+                "-an", "-threads", str(self.threads),
+                "-f", "null", "-"
+            ]
+            seconds = best_of(self.repeats, lambda: subprocess.run(command, check=True))
+            measurements.append(Measurement(f"encode_fps_{preset}", spec.frames / seconds, "fps"))
+        return measurements
+
+    def bench_scheduler_throughput(self) -> List[Measurement]:
+        """Input megabytes per second transcoded by two concurrent jobs over the media fixtures."""
+        if not self._needs_ffmpeg("scheduler_throughput"):
+            return []
+        fixtures = self.media_tree()
+        scanner = MediaScanner(VIDEO_EXTENSIONS)
+        media_files = [scanner.scan_file(path) for _, path in fixtures]
+        transcoder = Transcoder(threads=self.threads, overwrite=True)
+        scheduler = JobScheduler(transcoder, max_jobs=2, thread_budget=2 * self.threads)
+        total_mb = sum(media.size_bytes for media in media_files) / 1024 ** 2
+
+        def transcode_all():
+            results = scheduler.run(media_files)
+            failed = [str(path) for path, success in results.items() if not success]
+            if failed:
+                raise RuntimeError(f"Benchmark transcodes failed: {', '.join(failed)}")
+
+        try:
+            seconds = best_of(self.repeats, transcode_all)
+        finally:
+            for media in media_files:
+                transcoder.generate_output_filename(media.path).unlink(missing_ok=True)
+        return [Measurement("scheduler_throughput", total_mb / seconds, "MB/s")]
+
+    @staticmethod
+    def _needs_ffmpeg(name: str) -> bool:
+        if ffmpeg_available():
+            return True
+        logging.warning(f"Skipping benchmark {name}: ffmpeg and ffprobe are not installed")
+        return False
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """Describe every result that is worse than its baseline by more than ``tolerance``.
+
+    ``tolerance`` is a fraction of the baseline value. Results missing
+    from either side are not compared.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None or not reference["value"]:
+            continue
+        change = (result["value"] - reference["value"]) / reference["value"]
+        if not result.get("higher_is_better", True):
+            change = -change
+        if change < -tolerance:
+            regressions.append(
+                f"{name}: {result['value']:.4g} {result['unit']} vs baseline "
+                f"{reference['value']:.4g} {reference['unit']} ({abs(change):.0%} worse)"
+            )
+    return regressions
@@ -1,9 +1,60 @@
 import argparse
+import cProfile
 import logging
+from functools import partial
 from pathlib import Path
+from src.core.directory_walker import SYMLINK_POLICIES, SYMLINKS_FILES, DirectoryWalker
+from src.core.device_limiter import DeviceLimiter
+from src.core.directory_watcher import create_watcher
+from src.core.duplicate_finder import DuplicateFinder
+from src.core.job_coordinator import JobCoordinator
+from src.core.job_journal import JobJournal
+from src.core.job_planner import JobPlanner
+from src.core.job_scheduler import JobScheduler
+from src.core.job_worker import JobWorker
 from src.core.media_scanner import MediaScanner
+from src.core.probe_cache import ProbeCache
+from src.core.scan_filters import min_size_filter
+from src.core.transcode_metrics import MetricsRecorder
+from src.core.transcode_progress import ProgressLogger
 from src.core.transcoder import Transcoder
-from src.config.settings import VIDEO_EXTENSIONS
+from src.utils import profiler
+from src.config.settings import (
+    DEFAULT_CACHE_PATH, DEFAULT_COORDINATOR_PORT, DEFAULT_EXCLUDE_GLOBS, DEFAULT_JOURNAL_PATH, DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_MIN_SSIM, DEFAULT_POLL_INTERVAL, DEFAULT_PROBE_TIMEOUT, DEFAULT_PROBE_WORKERS, DEFAULT_PRUNE_DIRS,
+    DEFAULT_SAMPLE_COUNT, DEFAULT_SAMPLE_SECONDS, DEFAULT_SEGMENT_SECONDS, DEFAULT_SEGMENT_WORKERS, DEFAULT_SETTLE_SECONDS, DEFAULT_SPLIT_THRESHOLD_GB,
+    DEFAULT_VERIFY_SAMPLE_SECONDS, DEFAULT_VERIFY_SAMPLES, VIDEO_EXTENSIONS
+)
+
+# Multipliers for the unit suffixes accepted by size and duration options
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+def parse_size(value: str) -> int:
+    """Parse a byte count such as "500G" or "1.5T" for argparse."""
+    text = value.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+    try:
+        return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+
+def parse_duration(value: str) -> float:
+    """Parse a duration such as "90m" or "6h" for argparse; plain numbers are seconds."""
+    text = value.strip().lower()
+    unit = text[-1:] if text[-1:] in DURATION_UNITS else ""
+    try:
+        return float(text[:len(text) - len(unit)]) * DURATION_UNITS[unit]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid duration: {value!r}")
+
+def parse_address(value: str):
+    """Parse a listening address such as "0.0.0.0:8765" or a bare port for argparse."""
+    host, _, port = value.rpartition(":")
+    try:
+        return host or "0.0.0.0", int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid address: {value!r}")
 
 def setup_logging():
     logging.basicConfig(
@@ -16,8 +67,67 @@ class CLI:
 
     def __init__(self):
         self.args = self._parse_arguments()
-        self.scanner = MediaScanner(VIDEO_EXTENSIONS)
-        self.transcoder = Transcoder(threads=self.args.threads, overwrite=self.args.overwrite)
+        self.cache = self._open_cache()
+        # Workers leave the journal to the coordinator they take jobs from
+        self.journal = None if self.args.no_journal or self.args.worker else JobJournal(self.args.journal_path)
+        self.scanner = MediaScanner(
+            VIDEO_EXTENSIONS,
+            max_workers=self.args.probe_workers,
+            probe_timeout=self.args.probe_timeout,
+            cache=self.cache,
+            filters=[] if self.args.list_only else [min_size_filter(self.args.size_threshold)],
+            probe_on_scan=not self.args.list_only,
+            walker=DirectoryWalker(
+                VIDEO_EXTENSIONS,
+                exclude=DEFAULT_EXCLUDE_GLOBS + tuple(self.args.exclude),
+                prune_dirs=DEFAULT_PRUNE_DIRS + tuple(self.args.prune_dir),
+                max_depth=self.args.max_depth,
+                symlinks=self.args.symlinks
+            )
+        )
+        self.metrics = MetricsRecorder(self.args.metrics_file) if self.args.metrics_file else None
+        self.device_limiter = self._device_limiter()
+        self.transcoder = self._create_transcoder()
+        self.planner = JobPlanner(
+            self.transcoder.decide,
+            threads_per_job=self.args.threads,
+            max_runtime=self.args.max_runtime,
+            max_output_bytes=self.args.max_output_bytes
+        )
+        self.duplicate_finder = DuplicateFinder(full_hash=self.args.dedupe_full_hash)
+        self.scheduler = JobScheduler(
+            self.transcoder,
+            max_jobs=self.args.jobs,
+            thread_budget=self.args.thread_budget or self.args.jobs * self.args.threads
+        )
+        self.coordinator = None
+
+    def _create_transcoder(self) -> Transcoder:
+        """Create a transcoder configured from the command-line options."""
+        transcoder = Transcoder(
+            threads=self.args.threads,
+            overwrite=self.args.overwrite,
+            split_threshold_gb=None if self.args.no_split else self.args.split_threshold,
+            segment_seconds=self.args.segment_seconds,
+            segment_workers=self.args.segment_workers,
+            smart_remux=not self.args.always_reencode,
+            metrics=self.metrics,
+            ffmpeg_log_dir=self.args.ffmpeg_log_dir,
+            journal=self.journal,
+            sample_count=self.args.sample_count if self.args.sample_estimate else 0,
+            sample_seconds=self.args.sample_seconds,
+            min_savings_ratio=self.args.min_savings_ratio,
+            scratch_dir=self.args.scratch_dir,
+            device_limiter=self.device_limiter,
+            verify_samples=self.args.verify_samples if self.args.verify else 0,
+            verify_sample_seconds=self.args.verify_sample_seconds,
+            min_ssim=self.args.min_ssim,
+            min_psnr=self.args.min_psnr,
+            reject_unverified=self.args.reject_unverified
+        )
+        if self.args.progress:
+            transcoder.add_progress_listener(ProgressLogger())
+        return transcoder
 
     @staticmethod
     def _parse_arguments() -> argparse.Namespace:
@@ -38,6 +148,17 @@ class CLI:
             default=2,
             help="Number of CPU threads for ffmpeg (default=2)"
         )
+        parser.add_argument(
+            "-j", "--jobs",
+            type=int,
+            default=1,
+            help="Number of files to transcode at once (default=1)"
+        )
+        parser.add_argument(
+            "--thread-budget",
+            type=int,
+            help="Total ffmpeg threads shared by all concurrent jobs (default=jobs*threads)"
+        )
         parser.add_argument(
             "-y", "--overwrite",
             action="store_true",
@@ -54,17 +175,395 @@ class CLI:
             default=6.0,
             help="Minimum file size (in GB) to consider for transcoding (default=6.0)"
         )
+        parser.add_argument(
+            "--prioritize",
+            action="store_true",
+            help="Transcode the files expected to free the most bytes per CPU-second first."
+        )
+        parser.add_argument(
+            "--max-runtime",
+            type=parse_duration,
+            help="Start no new jobs after this long, e.g. 90m or 6h, and pass over jobs that would not finish in time."
+        )
+        parser.add_argument(
+            "--max-output-bytes",
+            type=parse_size,
+            help="Pass over jobs whose estimated outputs would together exceed this size, e.g. 500G."
+        )
+        parser.add_argument(
+            "--sample-estimate",
+            action="store_true",
+            help="Encode short samples of each file to be re-encoded to estimate its output size and encode time."
+        )
+        parser.add_argument(
+            "--sample-count",
+            type=int,
+            default=DEFAULT_SAMPLE_COUNT,
+            help=f"Number of samples encoded per file with --sample-estimate (default={DEFAULT_SAMPLE_COUNT})"
+        )
+        parser.add_argument(
+            "--sample-seconds",
+            type=float,
+            default=DEFAULT_SAMPLE_SECONDS,
+            help=f"Length in seconds of each sample (default={DEFAULT_SAMPLE_SECONDS})"
+        )
+        parser.add_argument(
+            "--min-savings-ratio",
+            type=float,
+            help="Skip re-encodes projected to reclaim less than this share of the source size, e.g. 0.2 "
+                 "(default: never skip on savings)"
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Check each output's duration and streams against its source before publishing it, and compare "
+                 "sampled clips of re-encodes by SSIM and PSNR."
+        )
+        parser.add_argument(
+            "--verify-samples",
+            type=int,
+            default=DEFAULT_VERIFY_SAMPLES,
+            help=f"Number of clips compared per re-encode with --verify (default={DEFAULT_VERIFY_SAMPLES})"
+        )
+        parser.add_argument(
+            "--verify-sample-seconds",
+            type=float,
+            default=DEFAULT_VERIFY_SAMPLE_SECONDS,
+            help=f"Length in seconds of each compared clip (default={DEFAULT_VERIFY_SAMPLE_SECONDS})"
+        )
+        parser.add_argument(
+            "--min-ssim",
+            type=float,
+            default=DEFAULT_MIN_SSIM,
+            help=f"Lowest SSIM the worst compared clip may score (default={DEFAULT_MIN_SSIM})"
+        )
+        parser.add_argument(
+            "--min-psnr",
+            type=float,
+            help="Lowest PSNR in dB the worst compared clip may score (default: not checked)"
+        )
+        parser.add_argument(
+            "--reject-unverified",
+            action="store_true",
+            help="Discard outputs that fail verification instead of publishing them with a warning."
+        )
+        parser.add_argument(
+            "--progress",
+            action="store_true",
+            help="Log fps, speed and ETA of running transcodes."
+        )
+        parser.add_argument(
+            "--metrics-file",
+            type=Path,
+            help="Append per-file transcode metrics to this JSON lines file."
+        )
+        parser.add_argument(
+            "--ffmpeg-log-dir",
+            type=Path,
+            help="Write the complete ffmpeg output of each job to a log file in this directory."
+        )
+        parser.add_argument(
+            "--scratch-dir",
+            type=Path,
+            help="Write outputs to this directory, e.g. on a local SSD, and move them into place once finished."
+        )
+        parser.add_argument(
+            "--max-reads-per-device",
+            type=int,
+            help="Number of jobs allowed to read from the same disk at once (default=unlimited)"
+        )
+        parser.add_argument(
+            "--max-writes-per-device",
+            type=int,
+            help="Number of jobs allowed to write to the same disk at once (default=unlimited)"
+        )
+        parser.add_argument(
+            "--always-reencode",
+            action="store_true",
+            help="Re-encode every file, even when its streams already match the target format."
+        )
+        parser.add_argument(
+            "--split-threshold",
+            type=float,
+            default=DEFAULT_SPLIT_THRESHOLD_GB,
+            help=f"File size (in GB) above which a file is encoded in parallel segments (default={DEFAULT_SPLIT_THRESHOLD_GB})"
+        )
+        parser.add_argument(
+            "--no-split",
+            action="store_true",
+            help="Never encode files in parallel segments."
+        )
+        parser.add_argument(
+            "--segment-seconds",
+            type=float,
+            default=DEFAULT_SEGMENT_SECONDS,
+            help=f"Target length in seconds of each segment in a segmented encode (default={DEFAULT_SEGMENT_SECONDS})"
+        )
+        parser.add_argument(
+            "--segment-workers",
+            type=int,
+            default=DEFAULT_SEGMENT_WORKERS,
+            help=f"Number of segments encoded at once in a segmented encode (default={DEFAULT_SEGMENT_WORKERS}), "
+                 "never more than the job's threads from --threads or its share of --thread-budget"
+        )
+        parser.add_argument(
+            "--probe-workers",
+            type=int,
+            default=DEFAULT_PROBE_WORKERS,
+            help=f"Number of concurrent ffprobe processes while scanning (default={DEFAULT_PROBE_WORKERS})"
+        )
+        parser.add_argument(
+            "--probe-timeout",
+            type=float,
+            default=DEFAULT_PROBE_TIMEOUT,
+            help=f"Seconds before a single ffprobe call is abandoned (default={DEFAULT_PROBE_TIMEOUT})"
+        )
+        parser.add_argument(
+            "--cache-path",
+            type=Path,
+            default=DEFAULT_CACHE_PATH,
+            help=f"Location of the probe cache database (default={DEFAULT_CACHE_PATH})"
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Probe every file without reading or updating the probe cache."
+        )
+        parser.add_argument(
+            "--rebuild-cache",
+            action="store_true",
+            help="Discard the probe cache and re-probe every file."
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Transcode each eligible file as soon as it is found instead of after the full scan."
+        )
+        parser.add_argument(
+            "--exclude",
+            action="append",
+            default=[],
+            metavar="GLOB",
+            help="Skip files and directories whose name or relative path matches this glob; may be repeated."
+        )
+        parser.add_argument(
+            "--prune-dir",
+            action="append",
+            default=[],
+            metavar="GLOB",
+            help=f"Never enter directories with a matching name, in addition to {', '.join(DEFAULT_PRUNE_DIRS)}; may be repeated."
+        )
+        parser.add_argument(
+            "--max-depth",
+            type=int,
+            help="Do not descend more than this many directories below the path (default=unlimited)"
+        )
+        parser.add_argument(
+            "--symlinks",
+            choices=SYMLINK_POLICIES,
+            default=SYMLINKS_FILES,
+            help=f"Skip symbolic links, follow only links to files, or follow all links (default={SYMLINKS_FILES})"
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="After the initial scan, keep running and transcode new or changed files as they arrive."
+        )
+        parser.add_argument(
+            "--settle-seconds",
+            type=float,
+            default=DEFAULT_SETTLE_SECONDS,
+            help=f"Seconds a watched file must stay unchanged before it is transcoded (default={DEFAULT_SETTLE_SECONDS})"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=DEFAULT_POLL_INTERVAL,
+            help=f"Seconds between scans when watching without inotify (default={DEFAULT_POLL_INTERVAL})"
+        )
+        parser.add_argument(
+            "--force-polling",
+            action="store_true",
+            help="Watch by polling even where inotify is available, e.g. on network mounts."
+        )
+        parser.add_argument(
+            "--journal-path",
+            type=Path,
+            default=DEFAULT_JOURNAL_PATH,
+            help=f"Location of the job journal used to resume interrupted runs (default={DEFAULT_JOURNAL_PATH})"
+        )
+        parser.add_argument(
+            "--no-journal",
+            action="store_true",
+            help="Do not record job progress in the job journal."
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Transcode only the unfinished jobs recorded in the journal under the path, without rescanning."
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help=f"Attempts after which --resume stops retrying a failing job (default={DEFAULT_MAX_ATTEMPTS})"
+        )
+        parser.add_argument(
+            "--serve",
+            type=parse_address,
+            metavar="[HOST:]PORT",
+            help=f"Hand the scanned jobs out to --worker processes listening on this address, e.g. "
+                 f"0.0.0.0:{DEFAULT_COORDINATOR_PORT}, instead of transcoding them here."
+        )
+        parser.add_argument(
+            "--worker",
+            metavar="URL",
+            help="Transcode jobs leased from the coordinator at this URL, e.g. http://host:8765; the path is "
+                 "where the shared storage is mounted and jobs outside it are refused."
+        )
+        parser.add_argument(
+            "--lease-seconds",
+            type=float,
+            default=DEFAULT_LEASE_SECONDS,
+            help=f"Seconds a worker may go without a heartbeat before its job is re-assigned (default={DEFAULT_LEASE_SECONDS})"
+        )
+        parser.add_argument(
+            "--dedupe",
+            action="store_true",
+            help="Transcode hardlinked or identical copies of a file once and share the output with the others."
+        )
+        parser.add_argument(
+            "--dedupe-full-hash",
+            action="store_true",
+            help="Confirm duplicates by hashing whole files instead of trusting sampled blocks."
+        )
+        parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Time the walk, stat, probe, queue and ffmpeg phases and log a summary per phase."
+        )
+        parser.add_argument(
+            "--trace",
+            type=Path,
+            help="Like --profile, and also write every timed span to this file as a Chrome trace."
+        )
+        parser.add_argument(
+            "--cprofile",
+            type=Path,
+            help="Run under cProfile and write its statistics to this file."
+        )
+        parser.add_argument(
+            "--list-only",
+            action="store_true",
+            help="List every media file with its size, without probing or transcoding."
+        )
         return parser.parse_args()
 
+    def _device_limiter(self):
+        """Create the per-device I/O limiter if any limit has been set."""
+        if self.args.max_reads_per_device is None and self.args.max_writes_per_device is None:
+            return None
+        return DeviceLimiter(self.args.max_reads_per_device, self.args.max_writes_per_device)
+
+    def _open_cache(self):
+        """Open the probe cache unless it has been disabled."""
+        if self.args.no_cache:
+            return None
+        cache = ProbeCache(self.args.cache_path)
+        if self.args.rebuild_cache:
+            cache.clear()
+        return cache
+
     def run(self):
         """Execute the CLI operations."""
+        spans = self._start_profiling()
+        try:
+            if self.args.cprofile is not None:
+                self._run_cprofile()
+            else:
+                self._run()
+        finally:
+            if self.coordinator is not None:
+                self.coordinator.close()
+            if self.args.verify:
+                self._log_verification_summary()
+            if self.cache is not None:
+                self.cache.close()
+            if self.journal is not None:
+                self.journal.close()
+            if spans is not None:
+                self._finish_profiling(spans)
+
+    def _log_verification_summary(self):
+        """Log how many outputs passed, were flagged or were rejected by verification."""
+        counts = self.transcoder.verification_counts
+        if counts:
+            logging.info(
+                f"Verification: {counts['passed']} passed, {counts['flagged']} flagged, "
+                f"{counts['rejected']} rejected"
+            )
+
+    def _start_profiling(self):
+        """Start recording timing spans when --profile or --trace is given."""
+        if not (self.args.profile or self.args.trace):
+            return None
+        spans = profiler.Profiler()
+        profiler.enable(spans)
+        return spans
+
+    def _finish_profiling(self, spans):
+        """Stop recording spans, then report them per phase and write the trace file."""
+        profiler.disable()
+        logging.info(f"Time spent per phase:\n{spans.summary()}")
+        if self.args.trace is not None:
+            spans.write_chrome_trace(self.args.trace)
+            logging.info(f"Chrome trace written to {self.args.trace}")
+
+    def _run_cprofile(self):
+        """Run under cProfile and dump its statistics, which cover the main thread only."""
+        stats = cProfile.Profile()
+        try:
+            stats.runcall(self._run)
+        finally:
+            stats.dump_stats(self.args.cprofile)
+            logging.info(f"cProfile statistics written to {self.args.cprofile}")
+
+    def _run(self):
+        """Scan the target path and transcode the eligible files."""
         target_path = Path(self.args.path)
 
         if not target_path.exists():
             logging.error(f"Specified path does not exist: {target_path}")
             return
 
+        if self.args.list_only:
+            self._list_files(target_path)
+            return
+
+        if self.args.worker:
+            self._run_worker(target_path)
+            return
+
+        if self.args.resume:
+            self._run_resume(target_path)
+            return
+
+        if self.args.watch:
+            self._run_watch(target_path)
+            return
+
+        self._process_target(target_path)
+
+    def _process_target(self, target_path: Path):
+        """Transcode the eligible files in the target path, while or after scanning it."""
+        if self.args.stream:
+            self._run_streaming(target_path)
+            return
+
         media_files = self._scan_target(target_path)
+        if not media_files and self.scanner.filtered_count:
+            logging.info("No media files exceed the size threshold.")
+            return
         self._display_files(media_files)
 
         eligible_files = [m for m in media_files if m.size_gb > self.args.size_threshold]
@@ -73,7 +572,186 @@ class CLI:
             return
 
         for media in eligible_files:
-            self.transcoder.transcode(media, dry_run=self.args.dry_run)
+            self._enqueue(media)
+        self._transcode_all(eligible_files)
+
+    def _run_watch(self, target_path: Path):
+        """Process the target directory, then transcode files that arrive in it until interrupted."""
+        if not target_path.is_dir():
+            logging.error(f"Watch mode needs a directory: {target_path}")
+            return
+
+        watcher = create_watcher(
+            target_path,
+            partial(self._is_watch_candidate, target_path),
+            settle_seconds=self.args.settle_seconds,
+            poll_interval=self.args.poll_interval,
+            force_polling=self.args.force_polling,
+            walker=self.scanner.walker
+        )
+        try:
+            self._process_target(target_path)
+            logging.info(f"Watching {target_path} for new media files")
+            self._transcode_all(self._watch_eligible(watcher))
+        finally:
+            watcher.close()
+
+    def _is_watch_candidate(self, target_path: Path, path: Path) -> bool:
+        """Check whether a changed file may need transcoding, by the same rules as a scan of the target."""
+        return self.scanner.walker.includes(target_path, path) and not self.transcoder.is_output_file(path)
+
+    def _watch_eligible(self, watcher):
+        """Yield settled files from the watcher that are above the size threshold."""
+        for path in watcher.settled():
+            try:
+                media = self.scanner.scan_file(path)
+            except OSError as e:
+                logging.warning(f"Skipping file that could not be read: {path}: {e}")
+                continue
+            if media.size_gb <= self.args.size_threshold:
+                logging.info(f"Ignoring new file below the size threshold: {path}")
+                continue
+            logging.info(f"New media file ready: {path} | Size: {media.size_gb:.2f} GB | Format: {media.format}")
+            self._enqueue(media)
+            yield media
+
+    def _run_resume(self, target_path: Path):
+        """Transcode the unfinished jobs recorded in the journal for the target path."""
+        if self.journal is None:
+            logging.error("Cannot resume with the job journal disabled.")
+            return
+
+        media_files = []
+        for path in self.journal.unfinished(target_path, self.args.max_attempts):
+            if not path.is_file():
+                logging.warning(f"Skipping journaled job whose source no longer exists: {path}")
+                continue
+            media_files.append(self.scanner.scan_file(path))
+        if not media_files:
+            logging.info("No unfinished jobs to resume.")
+            return
+
+        logging.info(f"Resuming {len(media_files)} unfinished jobs.")
+        self._display_files(media_files)
+        self._transcode_all(media_files)
+
+    def _enqueue(self, media):
+        """Record an eligible file as queued in the journal, unless this is a dry run."""
+        if self.journal is not None and not self.args.dry_run:
+            self.journal.enqueue(media.path)
+
+    def _transcode_all(self, media_files) -> int:
+        """Transcode media files, concurrently when several jobs are allowed, and count the successes.
+
+        With --dedupe, each group of hardlinked or identical files is
+        transcoded once and its output shared with the other copies.
+        """
+        groups = []
+        if self.args.dedupe:
+            if isinstance(media_files, list):
+                groups = self.duplicate_finder.group(media_files)
+                media_files = [group.primary for group in groups]
+            else:
+                logging.warning("--dedupe needs the full scan first; duplicates are transcoded separately")
+
+        results = self._run_jobs(self._plan(media_files))
+        transcoded = sum(results.values())
+        for group in groups:
+            if not group.copies:
+                continue
+            if not results.get(group.primary.path):
+                logging.info(f"Not sharing output of {group.primary.path} with {len(group.copies)} duplicates")
+                continue
+            for duplicate in group.copies:
+                if self.transcoder.share_output(group.primary, duplicate, dry_run=self.args.dry_run):
+                    transcoded += 1
+        return transcoded
+
+    def _run_worker(self, target_path: Path):
+        """Transcode jobs leased from a coordinator until it has no more work."""
+        worker = JobWorker(
+            self.args.worker,
+            self.scanner,
+            self._create_transcoder,
+            root=target_path,
+            max_jobs=self.args.jobs
+        )
+        results = worker.run()
+        logging.info(f"Worker finished {len(results)} jobs: {sum(results.values())} transcoded.")
+
+    def _run_jobs(self, media_files) -> dict:
+        """Transcode media files, here or on workers, and return whether each one succeeded, keyed by path."""
+        if self.args.serve:
+            if self.coordinator is None:
+                host, port = self.args.serve
+                self.coordinator = JobCoordinator(
+                    host, port,
+                    lease_seconds=self.args.lease_seconds,
+                    max_attempts=self.args.max_attempts,
+                    journal=self.journal
+                )
+                self.coordinator.start()
+            return self.coordinator.run(media_files, dry_run=self.args.dry_run)
+
+        # Even a single job goes through the scheduler, which cancels it on an interrupt
+        return self.scheduler.run(media_files, dry_run=self.args.dry_run)
+
+    def _plan(self, media_files):
+        """Order media files by expected savings and hold them to the run's budgets, where requested."""
+        budgeted = self.args.max_runtime is not None or self.args.max_output_bytes is not None
+        if not (self.args.prioritize or budgeted):
+            return media_files
+
+        if self.args.prioritize and isinstance(media_files, list):
+            jobs = self.planner.rank(media_files)
+        else:
+            if self.args.prioritize:
+                logging.warning("--prioritize needs the full scan first; files are transcoded in the order found")
+            jobs = (self.planner.estimate(media) for media in media_files)
+        return self.planner.within_budget(jobs)
+
+    def _list_files(self, target_path: Path):
+        """List media files by path and size using nothing but stat data."""
+        found = 0
+        for found, media in enumerate(self._iter_target(target_path), start=1):
+            print(f"{found}. {media.path} | Size: {media.size_gb:.2f} GB")
+        if not found:
+            print("No media files found in the specified directory.")
+
+    def _run_streaming(self, target_path: Path):
+        """Display and transcode media files as the scan finds them."""
+        counts = {"found": 0, "eligible": 0}
+        transcoded = self._transcode_all(self._stream_eligible(target_path, counts))
+
+        if not counts["found"]:
+            if self.scanner.filtered_count:
+                logging.info("No media files exceed the size threshold.")
+            else:
+                print("No media files found in the specified directory.")
+            return
+        logging.info(
+            f"Scanned {counts['found']} media files: {counts['eligible']} eligible, {transcoded} transcoded."
+        )
+
+    def _stream_eligible(self, target_path: Path, counts: dict):
+        """Display media files as they are scanned and yield those above the size threshold."""
+        for media in self._iter_target(target_path):
+            counts["found"] += 1
+            if counts["found"] == 1:
+                print("Found the following media files:\n")
+            self._display_file(counts["found"], media)
+
+            if media.size_gb > self.args.size_threshold:
+                counts["eligible"] += 1
+                self._enqueue(media)
+                yield media
+
+    def _iter_target(self, target_path: Path):
+        """Yield media files from the specified file or directory as they are scanned."""
+        if target_path.is_file():
+            yield self.scanner.scan_file(target_path)
+            return
+        yield from self.scanner.iter_directory(target_path)
 
     def _scan_target(self, target_path: Path):
         """Scan the specified file or directory for media files."""
@@ -85,9 +763,14 @@ class CLI:
     def _display_files(media_files):
         """Display the list of media files found during the scan."""
         if not media_files:
-            logging.info("No media files found in the specified directory.")
+            print("No media files found in the specified directory.")
             return
 
         print("Found the following media files:\n")
         for idx, media in enumerate(media_files, start=1):
-            print(f"{idx}. {media.path} | Size: {media.size_gb:.2f} GB | Format: {media.format}")
\ No newline at end of file
+            CLI._display_file(idx, media)
+
+    @staticmethod
+    def _display_file(idx: int, media):
+        """Display a single media file found during the scan."""
+        print(f"{idx}. {media.path} | Size: {media.size_gb:.2f} GB | Format: {media.format}")
\ No newline at end of file
@@ -1,3 +1,5 @@
+from pathlib import Path
+
 # Supported video file extensions
 VIDEO_EXTENSIONS = (
     ".mp4", ".mov", ".mkv", ".avi",
@@ -5,4 +7,68 @@ VIDEO_EXTENSIONS = (
 )
 
 # Default logging level
-DEFAULT_LOG_LEVEL = "INFO"
\ No newline at end of file
+DEFAULT_LOG_LEVEL = "INFO"
+
+# Number of concurrent ffprobe processes used while scanning
+DEFAULT_PROBE_WORKERS = 4
+
+# Seconds before a single ffprobe call is abandoned
+DEFAULT_PROBE_TIMEOUT = 30.0
+
+# Location of the persistent probe cache
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "transcode-py" / "probe_cache.sqlite3"
+
+# Files larger than this (in GB) are encoded in parallel segments
+DEFAULT_SPLIT_THRESHOLD_GB = 40.0
+
+# Target length in seconds of each segment in a segmented encode
+DEFAULT_SEGMENT_SECONDS = 300.0
+
+# Number of segments encoded at once in a segmented encode
+DEFAULT_SEGMENT_WORKERS = 4
+
+# Number of trailing ffmpeg output lines kept for error reports
+DEFAULT_STDERR_TAIL_LINES = 200
+
+# Location of the persistent job journal used to resume interrupted runs
+DEFAULT_JOURNAL_PATH = Path.home() / ".cache" / "transcode-py" / "jobs.sqlite3"
+
+# Number of times a failing job is attempted before --resume gives up on it
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds a watched file's size and mtime must hold still before it is transcoded
+DEFAULT_SETTLE_SECONDS = 10.0
+
+# Seconds between directory walks when watching without inotify
+DEFAULT_POLL_INTERVAL = 30.0
+
+# Directories never entered while scanning: NAS thumbnails, trash folders,
+# transcode output folders and the segment encoder's work directories
+DEFAULT_PRUNE_DIRS = ("@eaDir", ".Trash*", "#recycle", "$RECYCLE.BIN", "_transcoded", ".*_segments_*")
+
+# Files never picked up while scanning: the transcoder's own outputs
+DEFAULT_EXCLUDE_GLOBS = ("*_transcoded.mkv",)
+
+# Number of short clips encoded to estimate the outcome of a re-encode
+DEFAULT_SAMPLE_COUNT = 3
+
+# Length in seconds of each clip encoded to estimate a re-encode
+DEFAULT_SAMPLE_SECONDS = 10.0
+
+# Number of clips of a re-encoded output compared with the source when verifying
+DEFAULT_VERIFY_SAMPLES = 3
+
+# Length in seconds of each clip compared when verifying
+DEFAULT_VERIFY_SAMPLE_SECONDS = 5.0
+
+# Lowest SSIM a verified re-encode may score on its worst clip
+DEFAULT_MIN_SSIM = 0.95
+
+# Port the coordinator listens on for workers with --serve
+DEFAULT_COORDINATOR_PORT = 8765
+
+# Seconds a worker's lease on a job lasts without a heartbeat before the job is re-assigned
+DEFAULT_LEASE_SECONDS = 60.0
+
+# Seconds an idle worker waits before asking the coordinator for work again
+DEFAULT_WORKER_POLL_SECONDS = 5.0
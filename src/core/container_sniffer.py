@@ -0,0 +1,57 @@
+from pathlib import Path
+from typing import Optional
+from src.utils.profiler import span
+
+# Bytes read from the start of a file; enough for every signature below
+SNIFF_SIZE = 4096
+
+# Format names as reported by ffprobe, so sniffed and probed results agree
+MATROSKA = "matroska,webm"
+MOV_MP4 = "mov,mp4,m4a,3gp,3g2,mj2"
+AVI = "avi"
+FLV = "flv"
+MPEGTS = "mpegts"
+ASF = "asf"
+
+EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+ASF_HEADER_GUID = bytes.fromhex("3026b2758e66cf11a6d900aa0062ce6c")
+MP4_TOP_LEVEL_BOXES = (b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot")
+TS_SYNC_BYTE = 0x47
+TS_MIN_PACKETS = 3
+
+def sniff_container(file_path: Path) -> Optional[str]:
+    """Identify a file's container from its first few KB without spawning ffprobe.
+
+    Returns:
+        Optional[str]: The ffprobe format name, or None when the header is
+        unknown or ambiguous and the file should be probed instead.
+    """
+    try:
+        with span("scan.sniff"), open(file_path, "rb") as f:
+            header = f.read(SNIFF_SIZE)
+    except OSError:
+        return None
+    return sniff_header(header)
+
+def sniff_header(header: bytes) -> Optional[str]:
+    """Identify a container from the leading bytes of a file."""
+    if header.startswith(EBML_MAGIC):
+        return MATROSKA
+    if len(header) >= 8 and header[4:8] in MP4_TOP_LEVEL_BOXES:
+        return MOV_MP4
+    if len(header) >= 12 and header[:4] == b"RIFF" and header[8:12] == b"AVI ":
+        return AVI
+    if header[:3] == b"FLV" and header[3:4] == b"\x01":
+        return FLV
+    if header.startswith(ASF_HEADER_GUID):
+        return ASF
+    if _is_transport_stream(header, packet_size=188, offset=0) or _is_transport_stream(header, packet_size=192, offset=4):
+        return MPEGTS
+    return None
+
+def _is_transport_stream(header: bytes, packet_size: int, offset: int) -> bool:
+    """Check for MPEG-TS sync bytes at the start of several consecutive packets."""
+    positions = range(offset, len(header), packet_size)
+    if len(positions) < TS_MIN_PACKETS:
+        return False
+    return all(header[pos] == TS_SYNC_BYTE for pos in positions)
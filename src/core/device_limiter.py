@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.utils.profiler import span
+
+# Kinds of I/O slot held on a device
+READ = "read"
+WRITE = "write"
+
+class DeviceLimiter:
+    """Limits how many jobs read from and write to each storage device at once.
+
+    Devices are told apart by ``st_dev``, so jobs on different disks run in
+    parallel while jobs on the same disk queue for its slots. A job names
+    the files it reads and the directories it writes to, and holds one slot
+    of the matching kind on each device involved for as long as it runs.
+    Slots are always taken in the same order, so jobs that need several
+    devices cannot deadlock one another.
+    """
+
+    def __init__(self, max_reads: Optional[int] = None, max_writes: Optional[int] = None):
+        for name, limit in (("max_reads", max_reads), ("max_writes", max_writes)):
+            if limit is not None and limit < 1:
+                raise ValueError(f"{name} must be at least 1, got {limit}")
+        self.limits = {READ: max_reads, WRITE: max_writes}
+        self._semaphores: Dict[Tuple[int, str], threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, reads: Iterable[Path] = (), writes: Iterable[Path] = ()):
+        """Block until a slot is free on every device involved, and hold them all."""
+        held = []
+        try:
+            with span("transcode.io_wait"):
+                for semaphore in self._slots(reads, writes):
+                    semaphore.acquire()
+                    held.append(semaphore)
+            yield
+        finally:
+            for semaphore in reversed(held):
+                semaphore.release()
+
+    @asynccontextmanager
+    async def hold_async(self, reads: Iterable[Path] = (), writes: Iterable[Path] = ()):
+        """Wait for the same slots as ``hold`` without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        held = []
+        try:
+            for semaphore in self._slots(reads, writes):
+                if not semaphore.acquire(blocking=False):
+                    acquiring = loop.run_in_executor(None, semaphore.acquire)
+                    try:
+                        await asyncio.shield(acquiring)
+                    except asyncio.CancelledError:
+                        acquiring.add_done_callback(lambda _, semaphore=semaphore: semaphore.release())
+                        raise
+                held.append(semaphore)
+            yield
+        finally:
+            for semaphore in reversed(held):
+                semaphore.release()
+
+    @staticmethod
+    def device_of(path: Path) -> Optional[int]:
+        """The device holding a path, looking at its nearest existing ancestor if it does not exist yet."""
+        for candidate in [Path(path)] + list(Path(path).parents):
+            try:
+                return os.stat(candidate).st_dev
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logging.warning(f"Could not find the device of {path}: {e}")
+                return None
+        return None
+
+    def _slots(self, reads: Iterable[Path], writes: Iterable[Path]) -> List[threading.Semaphore]:
+        """The semaphores a job needs, in the global order they must be taken in."""
+        keys = set()
+        for kind, paths in ((READ, reads), (WRITE, writes)):
+            if self.limits[kind] is None:
+                continue
+            for path in paths:
+                device = self.device_of(path)
+                if device is not None:
+                    keys.add((device, kind))
+
+        with self._lock:
+            for key in keys:
+                if key not in self._semaphores:
+                    self._semaphores[key] = threading.Semaphore(self.limits[key[1]])
+            return [self._semaphores[key] for key in sorted(keys)]
@@ -0,0 +1,166 @@
+import logging
+import os
+import stat
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Set, Tuple
+from src.utils.profiler import span
+
+# How symbolic links met during a walk are treated
+SYMLINKS_SKIP = "skip"
+SYMLINKS_FILES = "files"
+SYMLINKS_FOLLOW = "follow"
+SYMLINK_POLICIES = (SYMLINKS_SKIP, SYMLINKS_FILES, SYMLINKS_FOLLOW)
+
+class DirectoryWalker:
+    """Finds files with given extensions below a directory using ``os.scandir``.
+
+    Names are checked against the extensions before anything is allocated
+    for them, and the ``stat`` result of each ``DirEntry`` is handed to the
+    caller so no file is stat'ed twice. Directories whose name matches a
+    ``prune_dirs`` pattern are never entered, and files or directories
+    matching an ``exclude`` glob, tested against both the name and the path
+    relative to the walked directory, are skipped.
+
+    The ``symlinks`` policy decides whether symbolic links are skipped,
+    followed only when they point at files, or followed everywhere; in the
+    last case each directory is entered at most once, so link cycles end.
+    """
+
+    def __init__(
+        self,
+        extensions: Iterable[str],
+        exclude: Iterable[str] = (),
+        prune_dirs: Iterable[str] = (),
+        max_depth: Optional[int] = None,
+        symlinks: str = SYMLINKS_FILES
+    ):
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"symlinks must be one of {', '.join(SYMLINK_POLICIES)}, got {symlinks!r}")
+        if max_depth is not None and max_depth < 0:
+            raise ValueError(f"max_depth must not be negative, got {max_depth}")
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self.exclude = tuple(exclude)
+        self.prune_dirs = tuple(prune_dirs)
+        self.max_depth = max_depth
+        self.symlinks = symlinks
+
+    def walk(self, directory: Path) -> Iterator[Tuple[Path, os.stat_result]]:
+        """Yield every matching file below a directory with its stat result.
+
+        Entries that disappear or cannot be read during the walk are logged
+        and skipped. ``max_depth`` 0 means only the directory itself.
+        """
+        root = os.fspath(directory)
+        visited: Set[Tuple[int, int]] = set()
+        if self.symlinks == SYMLINKS_FOLLOW:
+            try:
+                root_stat = os.stat(root)
+                visited.add((root_stat.st_dev, root_stat.st_ino))
+            except OSError:
+                pass
+
+        stack = [(root, "", 0)]
+        while stack:
+            path, relative, depth = stack.pop()
+            subdirs = []
+            found = []
+            with span("scan.walk", directory=path):
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            match = self._visit(entry, relative, depth, visited, subdirs)
+                            if match is not None:
+                                found.append(match)
+                except OSError as e:
+                    logging.warning(f"Skipping directory that could not be read: {path}: {e}")
+            yield from found
+            stack.extend(reversed(subdirs))
+
+    def enters(self, directory: Path, subdirectory: Path) -> bool:
+        """Check whether ``walk(directory)`` would descend into a subdirectory, judging from its path.
+
+        Lets code that finds files another way, such as a directory watcher,
+        apply the same pruning, exclusion, depth and symlink rules.
+        """
+        try:
+            parts = Path(subdirectory).relative_to(directory).parts
+        except ValueError:
+            return False
+        if self.max_depth is not None and len(parts) > self.max_depth:
+            return False
+        current = Path(directory)
+        relative = ""
+        for name in parts:
+            if any(fnmatchcase(name, pattern) for pattern in self.prune_dirs):
+                return False
+            if self.exclude and self._excluded(name, relative):
+                return False
+            current = current / name
+            if self.symlinks != SYMLINKS_FOLLOW and current.is_symlink():
+                return False
+            relative = f"{relative}{name}/"
+        return True
+
+    def includes(self, directory: Path, path: Path) -> bool:
+        """Check whether ``walk(directory)`` would yield a file, judging from its path.
+
+        The file is not stat'ed, so whether it is a regular file is left to
+        the caller.
+        """
+        name = path.name
+        dot = name.rfind(".")
+        if dot < 0 or name[dot:].lower() not in self.extensions:
+            return False
+        if not self.enters(directory, path.parent):
+            return False
+        if self.exclude:
+            relative = "".join(f"{part}/" for part in path.parent.relative_to(directory).parts)
+            if self._excluded(name, relative):
+                return False
+        return not (self.symlinks == SYMLINKS_SKIP and path.is_symlink())
+
+    def _visit(self, entry: os.DirEntry, relative: str, depth: int, visited: set, subdirs: list):
+        """Return ``(path, stat)`` for a matching file, queueing subdirectories to enter."""
+        name = entry.name
+        try:
+            is_link = entry.is_symlink()
+            if is_link and self.symlinks == SYMLINKS_SKIP:
+                return None
+            if entry.is_dir(follow_symlinks=self.symlinks == SYMLINKS_FOLLOW):
+                self._queue_dir(entry, relative, depth, visited, subdirs)
+                return None
+
+            dot = name.rfind(".")
+            if dot < 0 or name[dot:].lower() not in self.extensions:
+                return None
+            if self.exclude and self._excluded(name, relative):
+                return None
+            with span("scan.stat"):
+                stat_result = entry.stat(follow_symlinks=True)
+        except OSError as e:
+            logging.warning(f"Skipping file that could not be read: {entry.path}: {e}")
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        return Path(entry.path), stat_result
+
+    def _queue_dir(self, entry: os.DirEntry, relative: str, depth: int, visited: set, subdirs: list):
+        name = entry.name
+        if self.max_depth is not None and depth >= self.max_depth:
+            return
+        if any(fnmatchcase(name, pattern) for pattern in self.prune_dirs):
+            return
+        if self.exclude and self._excluded(name, relative):
+            return
+        if self.symlinks == SYMLINKS_FOLLOW:
+            stat_result = entry.stat(follow_symlinks=True)
+            key = (stat_result.st_dev, stat_result.st_ino)
+            if key in visited:
+                return
+            visited.add(key)
+        subdirs.append((entry.path, f"{relative}{name}/", depth + 1))
+
+    def _excluded(self, name: str, relative: str) -> bool:
+        relative_path = relative + name
+        return any(fnmatchcase(name, pattern) or fnmatchcase(relative_path, pattern) for pattern in self.exclude)
@@ -0,0 +1,345 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from src.core.directory_walker import SYMLINKS_FOLLOW, DirectoryWalker
+
+# inotify event flags, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+# Decides whether a changed file is worth reporting, from its path alone
+PathPredicate = Callable[[Path], bool]
+
+class DirectoryWatcher(ABC):
+    """Reports files below a directory once they have been created or changed and then left alone.
+
+    A file counts as settled when its size and modification time have not
+    changed for ``settle_seconds``, so files that are still being copied or
+    downloaded are reported only once complete. Hidden files and
+    directories, such as the transcoder's segment work directories, are
+    ignored, and so are directories a ``walker`` would not enter. Subclasses
+    supply the change notifications.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        accept: PathPredicate,
+        settle_seconds: float,
+        walker: Optional[DirectoryWalker] = None
+    ):
+        if settle_seconds < 0:
+            raise ValueError(f"settle_seconds must not be negative, got {settle_seconds}")
+        self.directory = Path(directory)
+        self.accept = accept
+        self.settle_seconds = settle_seconds
+        self.walker = walker
+        self._pending: Dict[Path, Tuple[Optional[Tuple[int, int]], float]] = {}
+        self._stopped = threading.Event()
+
+    @abstractmethod
+    def start(self):
+        """Begin watching; changes from this point on are reported by ``settled``."""
+        pass
+
+    def settled(self) -> Iterator[Path]:
+        """Yield changed files as they settle, until ``stop`` is called."""
+        while not self._stopped.is_set():
+            timeout = self._settle_tick() if self._pending else None
+            for path in self._changes(timeout):
+                if self._is_reportable(path):
+                    self._pending.setdefault(path, (None, time.monotonic()))
+            yield from self._take_settled()
+
+    def stop(self):
+        """Make ``settled`` return; safe to call from another thread or a signal handler."""
+        self._stopped.set()
+
+    def close(self):
+        """Release the resources held by the watcher."""
+        self.stop()
+
+    @abstractmethod
+    def _changes(self, timeout: Optional[float]) -> Iterable[Path]:
+        """Wait up to ``timeout`` seconds (forever if None) and return the paths that changed."""
+        pass
+
+    def _settle_tick(self) -> float:
+        return max(0.05, min(1.0, self.settle_seconds / 2))
+
+    def _is_reportable(self, path: Path) -> bool:
+        try:
+            relative = path.relative_to(self.directory)
+        except ValueError:
+            return False
+        if any(part.startswith(".") for part in relative.parts):
+            return False
+        return self.accept(path)
+
+    def _take_settled(self) -> Iterator[Path]:
+        """Yield pending files whose size and mtime have held still for ``settle_seconds``."""
+        now = time.monotonic()
+        for path, (signature, since) in list(self._pending.items()):
+            try:
+                stat_result = path.stat()
+            except OSError:
+                del self._pending[path]
+                continue
+            current = (stat_result.st_size, stat_result.st_mtime_ns)
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif now - since >= self.settle_seconds:
+                del self._pending[path]
+                yield path
+
+    def _walk(self, top: Optional[Path] = None) -> Iterator[Tuple[str, list, list]]:
+        """Walk the watched tree, or the part of it below ``top``, skipping directories not to be entered."""
+        follow = self.walker is not None and self.walker.symlinks == SYMLINKS_FOLLOW
+        visited = set()
+        for root, dirs, files in os.walk(top or self.directory, followlinks=follow):
+            if follow:
+                try:
+                    stat_result = os.stat(root)
+                except OSError:
+                    dirs[:] = []
+                    continue
+                key = (stat_result.st_dev, stat_result.st_ino)
+                if key in visited:
+                    dirs[:] = []
+                    continue
+                visited.add(key)
+            dirs[:] = [d for d in dirs if self._enters(Path(root) / d)]
+            yield root, dirs, files
+
+    def _enters(self, directory: Path) -> bool:
+        """Check whether a directory below the watched one is watched, assuming its parent is."""
+        if directory.name.startswith("."):
+            return False
+        return self.walker is None or self.walker.enters(self.directory, directory)
+
+class PollingWatcher(DirectoryWatcher):
+    """Finds changes by comparing the size and mtime of every file every ``poll_interval`` seconds.
+
+    Works on any platform and filesystem, including network mounts where
+    change notifications are not delivered, at the cost of a full walk per
+    interval. Files waiting to settle are re-checked more often than that,
+    but only they are stat'ed between walks.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        accept: PathPredicate,
+        settle_seconds: float,
+        poll_interval: float,
+        walker: Optional[DirectoryWalker] = None
+    ):
+        super().__init__(directory, accept, settle_seconds, walker)
+        if poll_interval <= 0:
+            raise ValueError(f"poll_interval must be positive, got {poll_interval}")
+        self.poll_interval = poll_interval
+        self._snapshot: Dict[Path, Tuple[int, int]] = {}
+        self._next_poll = 0.0
+
+    def start(self):
+        self._snapshot = self._take_snapshot()
+        self._next_poll = time.monotonic() + self.poll_interval
+
+    def _changes(self, timeout: Optional[float]) -> Iterable[Path]:
+        until_poll = max(0.0, self._next_poll - time.monotonic())
+        if timeout is not None and timeout < until_poll:
+            # A settle tick between walks; ``_take_settled`` re-checks the pending files
+            self._stopped.wait(timeout)
+            return []
+        if self._stopped.wait(until_poll):
+            return []
+        self._next_poll = time.monotonic() + self.poll_interval
+        snapshot = self._take_snapshot()
+        changed = [path for path, signature in snapshot.items() if self._snapshot.get(path) != signature]
+        self._snapshot = snapshot
+        return changed
+
+    def _take_snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for root, _, files in self._walk():
+            for name in files:
+                path = Path(root) / name
+                if not self.accept(path):
+                    continue
+                try:
+                    stat_result = path.stat()
+                except OSError:
+                    continue
+                snapshot[path] = (stat_result.st_size, stat_result.st_mtime_ns)
+        return snapshot
+
+class InotifyWatcher(DirectoryWatcher):
+    """Receives changes from the Linux kernel through inotify, so an idle library costs nothing.
+
+    Every directory in the tree gets its own watch, and directories created
+    later are watched as they appear. If the kernel's event queue
+    overflows, the whole tree is rescanned so that no arrival is lost.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        accept: PathPredicate,
+        settle_seconds: float,
+        walker: Optional[DirectoryWalker] = None
+    ):
+        super().__init__(directory, accept, settle_seconds, walker)
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError("inotify is not available on this platform")
+        self._fd = None
+        self._wake_read, self._wake_write = os.pipe()
+        self._watches: Dict[int, Path] = {}
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Check whether inotify can be used here."""
+        return _load_libc() is not None
+
+    def start(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._fd = fd
+        for root, _, _ in self._walk():
+            self._add_watch(Path(root))
+
+    def stop(self):
+        super().stop()
+        try:
+            os.write(self._wake_write, b"\0")
+        except OSError:
+            pass
+
+    def close(self):
+        super().close()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        for fd in (self._wake_read, self._wake_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _changes(self, timeout: Optional[float]) -> Iterable[Path]:
+        readable, _, _ = select.select([self._fd, self._wake_read], [], [], timeout)
+        if self._fd not in readable:
+            return []
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        changed = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                logging.warning(f"inotify event queue overflowed; rescanning {self.directory}")
+                changed.extend(self._rescan(self.directory))
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            parent = self._watches.get(wd)
+            if parent is None or not name:
+                continue
+            path = parent / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and self._enters(path):
+                    changed.extend(self._rescan(path))
+            else:
+                changed.append(path)
+        return changed
+
+    def _rescan(self, directory: Path) -> Iterator[Path]:
+        """Watch a directory tree and report every file already in it.
+
+        Files can land in a new directory before its watch is added, so
+        they are picked up by listing it once the watch is in place.
+        """
+        for root, _, files in self._walk(directory):
+            self._add_watch(Path(root))
+            for name in files:
+                yield Path(root) / name
+
+    def _add_watch(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            logging.warning(f"Cannot watch {directory}: {os.strerror(errno)}")
+            return
+        self._watches[wd] = directory
+
+def create_watcher(
+    directory: Path,
+    accept: PathPredicate,
+    settle_seconds: float,
+    poll_interval: float,
+    force_polling: bool = False,
+    walker: Optional[DirectoryWalker] = None
+) -> DirectoryWatcher:
+    """Start watching a directory with inotify where it works, and by polling otherwise.
+
+    Directories ``walker`` would not enter are not watched; which files are
+    reported is up to ``accept``.
+    """
+    if not force_polling and InotifyWatcher.is_supported():
+        watcher = InotifyWatcher(directory, accept, settle_seconds, walker)
+        try:
+            watcher.start()
+            return watcher
+        except OSError as e:
+            logging.warning(f"Cannot watch {directory} with inotify ({e}); falling back to polling")
+            watcher.close()
+
+    logging.info(f"Watching {directory} by polling every {poll_interval}s")
+    watcher = PollingWatcher(directory, accept, settle_seconds, poll_interval, walker)
+    watcher.start()
+    return watcher
+
+@lru_cache(maxsize=None)
+def _load_libc():
+    """The C library exposing the inotify calls, or None where they are unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
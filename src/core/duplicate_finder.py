@@ -0,0 +1,115 @@
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.core.media_file import MediaFile
+
+# Size of each block read from the head, middle and tail of a file for its sampled hash
+SAMPLE_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Size of each read while hashing a whole file
+FULL_HASH_CHUNK_BYTES = 16 * 1024 * 1024
+
+@dataclass
+class DuplicateGroup:
+    """Media files with the same content, of which only the primary needs transcoding."""
+    primary: MediaFile
+    copies: List[MediaFile] = field(default_factory=list)
+
+class DuplicateFinder:
+    """Groups media files that are hardlinks or byte-identical copies of one another.
+
+    Hardlinks are recognised by ``(st_dev, st_ino)`` without reading any
+    data. Remaining files that share their exact size are compared by a
+    BLAKE2b hash of a block from the head, the middle and the tail of the
+    file, each fetched with a single large read. With ``full_hash`` the
+    sampled match is confirmed by hashing the whole of every candidate,
+    which is slower but rules out files that differ only between samples.
+    """
+
+    def __init__(self, full_hash: bool = False, sample_block_bytes: int = SAMPLE_BLOCK_BYTES):
+        if sample_block_bytes < 1:
+            raise ValueError(f"sample_block_bytes must be positive, got {sample_block_bytes}")
+        self.full_hash = full_hash
+        self.sample_block_bytes = sample_block_bytes
+
+    def group(self, media_files: Iterable[MediaFile]) -> List[DuplicateGroup]:
+        """Partition media files into groups of identical content, in the order first seen.
+
+        The first file of each group becomes its primary. Files that cannot
+        be read are left in groups of their own.
+        """
+        groups: Dict[object, DuplicateGroup] = {}
+        by_size: Dict[int, List[Tuple[MediaFile, object]]] = defaultdict(list)
+        for media in media_files:
+            try:
+                stat_result = os.stat(media.path)
+            except OSError as e:
+                logging.warning(f"Could not check {media.path} for duplicates: {e}")
+                groups[("unread", media.path)] = DuplicateGroup(media)
+                continue
+            inode = (stat_result.st_dev, stat_result.st_ino)
+            if inode in groups:
+                logging.info(f"{media.path} is a hardlink of {groups[inode].primary.path}")
+                groups[inode].copies.append(media)
+                continue
+            groups[inode] = DuplicateGroup(media)
+            by_size[stat_result.st_size].append((media, inode))
+
+        for size, candidates in by_size.items():
+            if len(candidates) > 1:
+                self._merge_identical(size, candidates, groups)
+        return list(groups.values())
+
+    def _merge_identical(self, size: int, candidates: List[Tuple[MediaFile, object]], groups: Dict[object, DuplicateGroup]):
+        """Fold groups of equally sized files into the first group with the same content."""
+        seen: Dict[bytes, object] = {}
+        for media, inode in candidates:
+            digest = self._digest(media, size)
+            if digest is None:
+                continue
+            if digest not in seen:
+                seen[digest] = inode
+                continue
+            target = groups[seen[digest]]
+            merged = groups.pop(inode)
+            logging.info(f"{media.path} has the same content as {target.primary.path}")
+            target.copies.extend([merged.primary] + merged.copies)
+
+    def _digest(self, media: MediaFile, size: int) -> Optional[bytes]:
+        """The sampled hash of a file, extended by its full hash when confirmation is enabled."""
+        try:
+            digest = self.sampled_hash(media.path, size)
+            if self.full_hash:
+                digest += self.content_hash(media.path)
+            return digest
+        except OSError as e:
+            logging.warning(f"Could not check {media.path} for duplicates: {e}")
+            return None
+
+    def sampled_hash(self, path, size: int) -> bytes:
+        """Hash the head, middle and tail blocks of a file together with its size."""
+        hasher = hashlib.blake2b(str(size).encode("ascii"), digest_size=20)
+        block = self.sample_block_bytes
+        offsets = sorted({0, max(size // 2 - block // 2, 0), max(size - block, 0)})
+        with open(path, "rb", buffering=0) as source:
+            for offset in offsets:
+                source.seek(offset)
+                hasher.update(source.read(block))
+        return hasher.digest()
+
+    @staticmethod
+    def content_hash(path) -> bytes:
+        """Hash the whole of a file, reading it in large chunks into one reused buffer."""
+        hasher = hashlib.blake2b(digest_size=32)
+        buffer = bytearray(FULL_HASH_CHUNK_BYTES)
+        view = memoryview(buffer)
+        with open(path, "rb", buffering=0) as source:
+            while True:
+                count = source.readinto(buffer)
+                if not count:
+                    break
+                hasher.update(view[:count])
+        return hasher.digest()
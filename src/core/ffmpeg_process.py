@@ -0,0 +1,111 @@
+import asyncio
+import os
+import subprocess
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+# Longest piece of a single output line held in memory at once
+MAX_LINE_BYTES = 8192
+
+# Seconds a terminated child is given to exit before it is killed
+STOP_GRACE_SECONDS = 5.0
+
+@dataclass
+class FFmpegResult:
+    """Outcome of one ffmpeg process."""
+    returncode: int
+    stderr: str
+    cpu_seconds: Optional[float] = None
+
+class OutputTail:
+    """Keeps only the last lines of a process's output, optionally spilling all of it to a file.
+
+    Output is read in bounded pieces and carriage returns are treated as
+    line breaks, so memory stays constant however long the process runs
+    and however its output is punctuated.
+    """
+
+    def __init__(self, max_lines: int, log_path: Optional[Path] = None):
+        self._lines = deque(maxlen=max_lines)
+        self._pending = b""
+        self.log_path = log_path
+
+    def consume(self, stream: BinaryIO):
+        """Read a binary stream until EOF, keeping its tail and spilling it to the log file."""
+        with self._open_log() as log_file:
+            for chunk in iter(lambda: stream.readline(MAX_LINE_BYTES), b""):
+                self._keep(chunk, log_file)
+        self._flush()
+
+    async def consume_async(self, stream: asyncio.StreamReader):
+        """Read an asyncio stream until EOF, keeping its tail and spilling it to the log file."""
+        with self._open_log() as log_file:
+            while True:
+                chunk = await stream.read(MAX_LINE_BYTES)
+                if not chunk:
+                    break
+                self._keep(chunk, log_file)
+        self._flush()
+
+    def text(self) -> str:
+        """The retained lines, decoded and joined."""
+        return "\n".join(line.decode("utf-8", errors="replace") for line in self._lines)
+
+    def _open_log(self):
+        return open(self.log_path, "ab") if self.log_path is not None else nullcontext()
+
+    def _keep(self, chunk: bytes, log_file: Optional[BinaryIO]):
+        """Spill a chunk and retain its complete lines, holding back an unfinished last line."""
+        if log_file is not None:
+            log_file.write(chunk)
+        lines = (self._pending + chunk.replace(b"\r", b"\n")).split(b"\n")
+        self._pending = lines.pop()
+        if len(self._pending) >= MAX_LINE_BYTES:
+            lines.append(self._pending)
+            self._pending = b""
+        for line in lines:
+            if line.strip():
+                self._lines.append(line[:MAX_LINE_BYTES])
+
+    def _flush(self):
+        if self._pending.strip():
+            self._lines.append(self._pending)
+        self._pending = b""
+
+def wait_for_exit(process: subprocess.Popen) -> Optional[float]:
+    """Wait for a child process to exit and return the CPU time it used.
+
+    The CPU time (user plus system) comes from ``wait4`` and is None where
+    that is unavailable or the process was already reaped elsewhere.
+    """
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        process.wait()
+        return None
+    process.returncode = _exit_code(status)
+    return rusage.ru_utime + rusage.ru_stime
+
+def _exit_code(status: int) -> int:
+    """Convert a wait status into a Popen-style return code."""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+async def stop_process(process: asyncio.subprocess.Process, grace_seconds: float = STOP_GRACE_SECONDS):
+    """Terminate an asyncio child process, kill it if it lingers, and reap it."""
+    if process.returncode is None:
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), grace_seconds)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            process.kill()
+    await process.wait()
@@ -0,0 +1,302 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from src.config.settings import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, DEFAULT_WORKER_POLL_SECONDS
+from src.core.job_journal import JobJournal
+from src.core.media_file import MediaFile
+
+@dataclass
+class Lease:
+    """A job handed to a worker, valid until ``expires_at`` unless renewed by a heartbeat."""
+    lease_id: str
+    path: Path
+    worker: str
+    expires_at: float
+
+class JobCoordinator:
+    """Hands transcode jobs out to worker processes over HTTP and collects their outcomes.
+
+    Workers on other hosts, sharing the media storage, ask for a job with
+    ``POST /lease``, renew their lease with ``POST /heartbeat`` while the job
+    runs and report its outcome with ``POST /complete``; every request and
+    response body is a JSON object, and ``GET /status`` reports the queue.
+    A lease that is not renewed within ``lease_seconds`` expires, and its job
+    goes back to the front of the queue for another worker, up to
+    ``max_attempts`` leases per job. Late reports on an expired lease are
+    refused. With a journal, job states are recorded here, on the
+    coordinator, so an interrupted run can be resumed.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        poll_interval: float = DEFAULT_WORKER_POLL_SECONDS,
+        journal: Optional[JobJournal] = None
+    ):
+        if lease_seconds <= 0:
+            raise ValueError(f"lease_seconds must be positive, got {lease_seconds}")
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.journal = journal
+        self.dry_run = False
+        self._pending = deque()
+        self._leases: Dict[str, Lease] = {}
+        self._attempts: Dict[Path, int] = {}
+        self._sources: Dict[Path, Optional[Tuple[int, int]]] = {}
+        self._results: Dict[Path, bool] = {}
+        self._workers: Dict[str, float] = {}
+        self._told_finished = set()
+        self._closing = False
+        self._condition = threading.Condition()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """The address workers reach the coordinator at."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve workers on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="coordinator", daemon=True)
+        self._thread.start()
+        logging.info(f"Coordinator listening on {self.url}")
+
+    def run(self, media_files: Iterable[MediaFile], dry_run: bool = False) -> Dict[Path, bool]:
+        """Queue media files for the workers and wait until each has succeeded or failed.
+
+        Files are taken from ``media_files`` as they arrive, so a stream is
+        handed out while it is still being scanned. Returns whether each file
+        succeeded, keyed by path, like ``JobScheduler.run``.
+        """
+        self.dry_run = dry_run
+        paths = []
+        try:
+            for media in media_files:
+                paths.append(media.path)
+                self.add(media.path)
+            with self._condition:
+                while not all(path in self._results for path in paths):
+                    self._condition.wait(min(self.lease_seconds, self.poll_interval))
+                    self._expire_leases()
+        except KeyboardInterrupt:
+            logging.warning(f"Interrupted; returning {len(self._leases)} leased jobs to the journal's queue")
+            with self._condition:
+                for lease in self._leases.values():
+                    self._requeue_journal(lease.path)
+                self._leases.clear()
+                self._pending.clear()
+            raise
+        return {path: self._results.get(path, False) for path in paths}
+
+    def add(self, path: Path):
+        """Queue a job, unless it is already queued, leased or finished in this run.
+
+        A finished job is queued again if its source's size or mtime has
+        changed since it was added, so a file modified while watching is
+        transcoded afresh.
+        """
+        try:
+            stat_result = os.stat(path)
+            source = (stat_result.st_size, stat_result.st_mtime_ns)
+        except OSError:
+            source = None
+        with self._condition:
+            if path in self._attempts:
+                if path not in self._results or source is None or source == self._sources[path]:
+                    return
+                logging.info(f"{path} changed since it was transcoded; queueing it again")
+                del self._results[path]
+            self._attempts[path] = 0
+            self._sources[path] = source
+            self._pending.append(path)
+            self._condition.notify_all()
+
+    def lease(self, worker: str) -> Optional[Lease]:
+        """Hand the next queued job to a worker, or return None if there is none right now."""
+        with self._condition:
+            self._workers[worker] = time.monotonic()
+            self._expire_leases()
+            if self._closing:
+                self._told_finished.add(worker)
+                self._condition.notify_all()
+                return None
+            if not self._pending:
+                return None
+            path = self._pending.popleft()
+            self._attempts[path] += 1
+            attempt = self._attempts[path]
+            lease = Lease(uuid.uuid4().hex, path, worker, time.monotonic() + self.lease_seconds)
+            self._leases[lease.lease_id] = lease
+        if self.journal is not None and not self.dry_run:
+            self.journal.mark_running(path)
+        logging.info(f"Leased {path} to {worker} (attempt {attempt})")
+        return lease
+
+    def heartbeat(self, lease_id: str) -> bool:
+        """Renew a lease, returning False if it has expired or is unknown."""
+        with self._condition:
+            self._expire_leases()
+            lease = self._leases.get(lease_id)
+            if lease is None:
+                return False
+            lease.expires_at = time.monotonic() + self.lease_seconds
+            self._workers[lease.worker] = time.monotonic()
+            return True
+
+    def complete(self, lease_id: str, success: bool, error: Optional[str] = None) -> bool:
+        """Record the outcome of a leased job, returning False if the lease has expired or is unknown."""
+        with self._condition:
+            self._expire_leases()
+            lease = self._leases.pop(lease_id, None)
+            if lease is None:
+                return False
+            self._results[lease.path] = success
+            self._condition.notify_all()
+        if success:
+            logging.info(f"{lease.worker} finished {lease.path}")
+        else:
+            logging.error(f"{lease.worker} failed {lease.path}: {error or 'no error reported'}")
+        self._update_journal(lease.path, success, error)
+        return True
+
+    def status(self) -> dict:
+        """Counts of queued, leased, succeeded and failed jobs, and the workers seen recently."""
+        with self._condition:
+            now = time.monotonic()
+            return {
+                "queued": len(self._pending),
+                "leased": len(self._leases),
+                "succeeded": sum(self._results.values()),
+                "failed": sum(not success for success in self._results.values()),
+                "workers": sorted(w for w, seen in self._workers.items() if now - seen < self.lease_seconds)
+            }
+
+    def close(self, linger: Optional[float] = None):
+        """Tell polling workers there is no more work, then stop serving.
+
+        Workers seen within the last lease are given up to ``linger``
+        seconds, two poll intervals by default, to ask for work and learn
+        that the run is over.
+        """
+        linger = 2 * self.poll_interval if linger is None else linger
+        deadline = time.monotonic() + linger
+        with self._condition:
+            self._closing = True
+            while True:
+                now = time.monotonic()
+                waiting = [
+                    worker for worker, seen in self._workers.items()
+                    if worker not in self._told_finished and now - seen < self.lease_seconds
+                ]
+                if not waiting or now >= deadline:
+                    break
+                self._condition.wait(deadline - now)
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+
+    def _expire_leases(self):
+        """Return the jobs of expired leases to the front of the queue, or fail them after too many attempts."""
+        now = time.monotonic()
+        expired = [lease for lease in self._leases.values() if lease.expires_at <= now]
+        requeued = []
+        for lease in expired:
+            del self._leases[lease.lease_id]
+            if self._attempts[lease.path] >= self.max_attempts:
+                logging.error(f"Giving up on {lease.path}: its lease expired {self._attempts[lease.path]} times")
+                self._results[lease.path] = False
+                self._update_journal(lease.path, False, "Lease expired")
+            else:
+                logging.warning(f"Lease on {lease.path} held by {lease.worker} expired; re-assigning it")
+                requeued.append(lease.path)
+                self._requeue_journal(lease.path)
+        self._pending.extendleft(reversed(requeued))
+        if expired:
+            self._condition.notify_all()
+
+    def _update_journal(self, path: Path, success: bool, error: Optional[str]):
+        if self.journal is None or self.dry_run:
+            return
+        if success:
+            self.journal.mark_done(path)
+        else:
+            self.journal.mark_failed(path, error)
+
+    def _requeue_journal(self, path: Path):
+        if self.journal is not None and not self.dry_run:
+            self.journal.requeue(path)
+
+    def _handle(self, method: str, endpoint: str, body: dict):
+        """Answer one worker request, returning the status code and the response body."""
+        if method == "GET" and endpoint == "/status":
+            return HTTPStatus.OK, self.status()
+        if method != "POST":
+            return HTTPStatus.NOT_FOUND, {"error": f"unknown endpoint {method} {endpoint}"}
+        try:
+            if endpoint == "/lease":
+                lease = self.lease(str(body["worker"]))
+                if lease is None:
+                    return HTTPStatus.OK, {"job": None, "finished": self._closing, "retry_after": self.poll_interval}
+                return HTTPStatus.OK, {
+                    "job": {"lease": lease.lease_id, "path": str(lease.path), "dry_run": self.dry_run},
+                    "lease_seconds": self.lease_seconds
+                }
+            if endpoint == "/heartbeat":
+                renewed = self.heartbeat(str(body["lease"]))
+            elif endpoint == "/complete":
+                renewed = self.complete(str(body["lease"]), bool(body["success"]), body.get("error"))
+            else:
+                return HTTPStatus.NOT_FOUND, {"error": f"unknown endpoint {method} {endpoint}"}
+        except KeyError as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"missing field {e}"}
+        if not renewed:
+            return HTTPStatus.CONFLICT, {"error": "lease expired"}
+        return HTTPStatus.OK, {"ok": True}
+
+    def _handler_class(self):
+        coordinator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond(*coordinator._handle("GET", self.path, {}))
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError as e:
+                    self._respond(HTTPStatus.BAD_REQUEST, {"error": f"invalid JSON: {e}"})
+                    return
+                self._respond(*coordinator._handle("POST", self.path, body))
+
+            def _respond(self, status: int, body: dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logging.debug(f"Coordinator request from {self.address_string()}: {format % args}")
+
+        return Handler
@@ -0,0 +1,148 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class JobJournal:
+    """Persistent SQLite record of every transcode job's state and attempts.
+
+    Jobs move from queued to running to done or failed. The journal is
+    written before and after each ffmpeg run, so a crash leaves unfinished
+    jobs in the queued or running state, ready to be picked up by a resumed
+    run. The size and mtime of each source are recorded when it is queued,
+    so a file replaced after its job finished is queued afresh. Sources are
+    recorded by absolute path, whatever directory the run started in.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " path TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL,"
+            " error TEXT,"
+            " size INTEGER,"
+            " mtime_ns INTEGER)"
+        )
+        # Journals written before sources were identified lack these columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("size", "mtime_ns"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} INTEGER")
+        self._conn.commit()
+
+    def enqueue(self, file_path: Path, stat_result: Optional[os.stat_result] = None):
+        """Queue a job unless it has already completed on the same source.
+
+        A source whose size or mtime differs from when it was last queued
+        is a new file: its job is queued again with its attempts reset.
+        The source is stat'ed here unless ``stat_result`` is given.
+        """
+        if stat_result is None:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                pass
+        size, mtime_ns = (stat_result.st_size, stat_result.st_mtime_ns) if stat_result is not None else (None, None)
+        # An unknown identity, on either side, is taken to be unchanged
+        changed = (
+            "(jobs.size IS NOT NULL AND excluded.size IS NOT NULL "
+            "AND (jobs.size != excluded.size OR jobs.mtime_ns != excluded.mtime_ns))"
+        )
+        requeued = f"(jobs.state != '{DONE}' OR {changed})"
+        self._execute(
+            "INSERT INTO jobs (path, state, updated_at, size, mtime_ns) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET "
+            f"state = CASE WHEN {requeued} THEN excluded.state ELSE jobs.state END, "
+            f"updated_at = CASE WHEN {requeued} THEN excluded.updated_at ELSE jobs.updated_at END, "
+            f"attempts = CASE WHEN {changed} THEN 0 ELSE jobs.attempts END, "
+            f"error = CASE WHEN {changed} THEN NULL ELSE jobs.error END, "
+            "size = coalesce(excluded.size, jobs.size), mtime_ns = coalesce(excluded.mtime_ns, jobs.mtime_ns)",
+            (self._key(file_path), QUEUED, time.time(), size, mtime_ns)
+        )
+
+    def mark_running(self, file_path: Path):
+        """Record that an attempt at a job has started."""
+        self._execute(
+            "INSERT INTO jobs (path, state, attempts, updated_at) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT(path) DO UPDATE SET state = excluded.state, attempts = jobs.attempts + 1, "
+            "updated_at = excluded.updated_at, error = NULL",
+            (self._key(file_path), RUNNING, time.time())
+        )
+
+    def mark_done(self, file_path: Path):
+        """Record that a job completed successfully."""
+        self._set_state(file_path, DONE, None)
+
+    def mark_failed(self, file_path: Path, error: Optional[str] = None):
+        """Record that a job's latest attempt failed."""
+        self._set_state(file_path, FAILED, error)
+
+    def requeue(self, file_path: Path):
+        """Return an interrupted job to the queue without counting it as a failure."""
+        self._set_state(file_path, QUEUED, None)
+
+    def state(self, file_path: Path) -> Optional[str]:
+        """Return a job's current state, or None if it was never queued."""
+        row = self._query("SELECT state FROM jobs WHERE path = ?", (self._key(file_path),))
+        return row[0][0] if row else None
+
+    def attempts(self, file_path: Path) -> int:
+        """Return how many times a job has been started."""
+        row = self._query("SELECT attempts FROM jobs WHERE path = ?", (self._key(file_path),))
+        return row[0][0] if row else 0
+
+    def unfinished(self, directory: Path, max_attempts: int) -> List[Path]:
+        """List jobs below a directory that still need to run.
+
+        Queued and interrupted (running) jobs are always included; failed
+        jobs only while they have been attempted fewer than ``max_attempts``
+        times.
+        """
+        directory = self._key(directory)
+        prefix = os.path.join(directory, "")
+        rows = self._query(
+            "SELECT path FROM jobs "
+            "WHERE (path = ? OR substr(path, 1, ?) = ?) "
+            "AND (state IN (?, ?) OR (state = ? AND attempts < ?)) "
+            "ORDER BY path",
+            (directory, len(prefix), prefix, QUEUED, RUNNING, FAILED, max_attempts)
+        )
+        return [Path(path) for (path,) in rows]
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return os.path.abspath(file_path)
+
+    def _set_state(self, file_path: Path, state: str, error: Optional[str]):
+        self._execute(
+            "UPDATE jobs SET state = ?, updated_at = ?, error = ? WHERE path = ?",
+            (state, time.time(), error, self._key(file_path))
+        )
+
+    def _execute(self, sql: str, params: tuple):
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
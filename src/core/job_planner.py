@@ -0,0 +1,162 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional
+from src.core.media_file import MediaFile
+from src.core.transcode_decision import TranscodeAction, TranscodeDecision
+
+# Pixels libx264 at preset medium encodes per CPU-second, roughly 7 fps of 1080p per core
+ESTIMATED_ENCODE_PIXELS_PER_CPU_SECOND = 15_000_000
+
+# Bytes a stream copy moves per CPU-second; remuxing is bound by I/O rather than CPU
+ESTIMATED_COPY_BYTES_PER_CPU_SECOND = 200 * 1024 ** 2
+
+# Seconds of audio the AAC encoder processes per CPU-second
+ESTIMATED_AUDIO_SECONDS_PER_CPU_SECOND = 200.0
+
+@dataclass
+class PlannedJob:
+    """A candidate file with the estimated cost and benefit of transcoding it."""
+    media_file: MediaFile
+    decision: TranscodeDecision
+    savings_bytes: Optional[int]
+    output_bytes: Optional[int]
+    cpu_seconds: Optional[float]
+
+    @property
+    def savings_per_cpu_second(self) -> Optional[float]:
+        """Bytes expected to be reclaimed per CPU-second spent, or None if either is unknown."""
+        if self.savings_bytes is None or not self.cpu_seconds:
+            return None
+        return self.savings_bytes / self.cpu_seconds
+
+class JobPlanner:
+    """Orders transcode jobs by expected payoff and keeps a run within its budgets.
+
+    Each file's action, output size and savings come from the transcoder's
+    decision, and its CPU cost is taken from sample encodes when the
+    decision has them, or else estimated from the probed resolution,
+    frame rate and duration. Ranked jobs start with the most bytes
+    reclaimed per CPU-second; files whose payoff cannot be estimated follow
+    in their original order.
+
+    Budgets are checked as each job is about to start. Once ``max_runtime``
+    seconds have passed no further job is started, and a job expected to
+    overrun the remaining time, or to push the estimated output past
+    ``max_output_bytes``, is passed over in favour of cheaper ones. Jobs
+    already running are always allowed to finish.
+    """
+
+    def __init__(
+        self,
+        decide: Callable[[MediaFile], TranscodeDecision],
+        threads_per_job: int,
+        max_runtime: Optional[float] = None,
+        max_output_bytes: Optional[int] = None
+    ):
+        if threads_per_job < 1:
+            raise ValueError(f"threads_per_job must be at least 1, got {threads_per_job}")
+        self.decide = decide
+        self.threads_per_job = threads_per_job
+        self.max_runtime = max_runtime
+        self.max_output_bytes = max_output_bytes
+
+    def estimate(self, media_file: MediaFile) -> PlannedJob:
+        """Estimate the cost and benefit of transcoding one file."""
+        decision = self.decide(media_file)
+        if decision.action is TranscodeAction.SKIP:
+            return PlannedJob(media_file, decision, 0, 0, 0.0)
+        return PlannedJob(
+            media_file,
+            decision,
+            decision.estimated_savings_bytes(media_file),
+            decision.estimated_output_bytes,
+            decision.estimated_cpu_seconds or estimate_cpu_seconds(media_file, decision.action)
+        )
+
+    def rank(self, media_files: Iterable[MediaFile]) -> List[PlannedJob]:
+        """Estimate every file and order them by savings per CPU-second, best first."""
+        jobs = [self.estimate(media) for media in media_files]
+        known = sorted(
+            (job for job in jobs if job.savings_per_cpu_second is not None),
+            key=lambda job: job.savings_per_cpu_second,
+            reverse=True
+        )
+        unknown = [job for job in jobs if job.savings_per_cpu_second is None]
+        for position, job in enumerate(known + unknown, start=1):
+            logging.info(f"Priority {position}: {job.media_file.path} ({self._describe(job)})")
+        return known + unknown
+
+    def within_budget(self, jobs: Iterable[PlannedJob]) -> Iterator[MediaFile]:
+        """Yield the media files of jobs that can be started without exceeding a budget.
+
+        The runtime budget is measured from the first file requested.
+        """
+        started = None
+        output_bytes = 0
+        passed_over = 0
+        for job in jobs:
+            if started is None:
+                started = time.monotonic()
+            elapsed = time.monotonic() - started
+
+            if self.max_runtime is not None and elapsed >= self.max_runtime:
+                logging.warning(f"Runtime budget of {self.max_runtime:.0f}s reached; no further jobs will be started")
+                return
+            wall_seconds = self.estimate_wall_seconds(job)
+            if self.max_runtime is not None and wall_seconds is not None and \
+                    elapsed + wall_seconds > self.max_runtime:
+                logging.info(
+                    f"Passing over {job.media_file.path}: expected to take {wall_seconds:.0f}s, "
+                    f"{self.max_runtime - elapsed:.0f}s of the runtime budget left"
+                )
+                passed_over += 1
+                continue
+
+            job_output = job.output_bytes if job.output_bytes is not None else job.media_file.size_bytes
+            if self.max_output_bytes is not None and output_bytes + job_output > self.max_output_bytes:
+                logging.info(
+                    f"Passing over {job.media_file.path}: expected output of {job_output / 1024 ** 3:.2f} GB "
+                    f"would exceed the output budget"
+                )
+                passed_over += 1
+                continue
+
+            output_bytes += job_output
+            yield job.media_file
+
+        if passed_over:
+            logging.info(f"{passed_over} jobs were passed over to stay within budget")
+
+    def estimate_wall_seconds(self, job: PlannedJob) -> Optional[float]:
+        """Expected duration of a job running on ``threads_per_job`` threads."""
+        if job.cpu_seconds is None:
+            return None
+        return job.cpu_seconds / self.threads_per_job
+
+    @staticmethod
+    def _describe(job: PlannedJob) -> str:
+        savings = "unknown" if job.savings_bytes is None else f"{job.savings_bytes / 1024 ** 3:.2f} GB"
+        cpu = "unknown" if job.cpu_seconds is None else f"{job.cpu_seconds:.0f} CPU-s"
+        return f"{job.decision.action.value}; estimated savings {savings} for {cpu}"
+
+def estimate_cpu_seconds(media_file: MediaFile, action: TranscodeAction) -> Optional[float]:
+    """Rough CPU time an action takes on a file, or None when the file lacks the details needed."""
+    if action is TranscodeAction.SKIP:
+        return 0.0
+    copy_seconds = media_file.size_bytes / ESTIMATED_COPY_BYTES_PER_CPU_SECOND
+    if action is TranscodeAction.REMUX:
+        return copy_seconds
+    if not media_file.duration:
+        return None
+
+    audio_seconds = media_file.duration * max(len(media_file.audio_streams), 1)
+    audio_cpu_seconds = audio_seconds / ESTIMATED_AUDIO_SECONDS_PER_CPU_SECOND
+    if action is TranscodeAction.COPY_VIDEO:
+        return copy_seconds + audio_cpu_seconds
+
+    video = media_file.video_stream
+    if video is None or not (video.width and video.height and video.frame_rate):
+        return None
+    pixels = video.width * video.height * video.frame_rate * media_file.duration
+    return pixels / ESTIMATED_ENCODE_PIXELS_PER_CPU_SECOND + audio_cpu_seconds
@@ -0,0 +1,86 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sized
+from src.core.media_file import MediaFile
+from src.interfaces.i_transcoder import ITranscoder
+from src.utils import profiler
+
+class JobScheduler:
+    """Runs several transcode jobs at once under a shared CPU thread budget.
+
+    Each job is started with an equal share of the threads not already held
+    by running jobs, so threads released by a finished job are handed to the
+    jobs started after it. An interrupt (SIGINT) cancels every running job
+    through the transcoder and stops new ones from being launched.
+    """
+
+    def __init__(self, transcoder: ITranscoder, max_jobs: int, thread_budget: Optional[int] = None):
+        if max_jobs < 1:
+            raise ValueError(f"max_jobs must be at least 1, got {max_jobs}")
+        self.transcoder = transcoder
+        self.max_jobs = max_jobs
+        self.thread_budget = max(thread_budget or max_jobs, max_jobs)
+
+    def run(self, media_files: Iterable[MediaFile], dry_run: bool = False) -> Dict[Path, bool]:
+        """Transcode every media file and return whether each one succeeded.
+
+        When ``media_files`` has a known length, the last jobs are given the
+        threads that would otherwise be reserved for jobs that will never
+        come; for a stream each job gets an equal share of the free slots.
+        """
+        results = {}
+        remaining = len(media_files) if isinstance(media_files, Sized) else None
+        queue = iter(media_files)
+        running = {}
+        free_threads = self.thread_budget
+        exhausted = False
+
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+            try:
+                while True:
+                    while not exhausted and len(running) < self.max_jobs:
+                        media = next(queue, None)
+                        if media is None:
+                            exhausted = True
+                            break
+                        slots = self.max_jobs - len(running)
+                        if remaining is not None:
+                            slots = min(slots, remaining)
+                            remaining -= 1
+                        threads = max(1, free_threads // slots)
+                        free_threads -= threads
+                        logging.info(f"Starting job with {threads} threads: {media.path}")
+                        future = executor.submit(self._run_job, media, dry_run, threads, time.perf_counter_ns())
+                        running[future] = (media, threads)
+
+                    if not running:
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        media, threads = running.pop(future)
+                        free_threads += threads
+                        results[media.path] = self._result(future, media)
+            except KeyboardInterrupt:
+                logging.warning(f"Interrupted; cancelling {len(running)} running jobs")
+                self.transcoder.cancel()
+                for future, (media, _) in running.items():
+                    results[media.path] = self._result(future, media)
+
+        return results
+
+    def _run_job(self, media: MediaFile, dry_run: bool, threads: int, submitted_ns: int) -> bool:
+        """Transcode one file on a worker thread, recording how long it waited for the thread."""
+        profiler.record("transcode.queue_wait", submitted_ns, time.perf_counter_ns(), file=media.path)
+        return self.transcoder.transcode(media, dry_run=dry_run, threads=threads)
+
+    @staticmethod
+    def _result(future, media: MediaFile) -> bool:
+        """Return a finished job's outcome, logging unexpected errors as failures."""
+        try:
+            return bool(future.result())
+        except Exception as e:
+            logging.error(f"Transcoding job failed for {media.path}: {e}")
+            return False
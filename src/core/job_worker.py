@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from src.config.settings import DEFAULT_LEASE_SECONDS, DEFAULT_WORKER_POLL_SECONDS
+from src.core.media_scanner import MediaScanner
+from src.core.transcoder import Transcoder
+
+# Seconds before a request to the coordinator is abandoned
+REQUEST_TIMEOUT = 10.0
+
+class LeaseLost(Exception):
+    """Raised when the coordinator no longer recognises a worker's lease."""
+
+class JobWorker:
+    """Transcodes jobs leased from a ``JobCoordinator`` on shared storage.
+
+    Up to ``max_jobs`` jobs run at once, each with a transcoder of its own
+    from ``transcoder_factory``, so a job whose lease is lost can be
+    cancelled without touching the others. While a job runs its lease is
+    renewed four times per lease period. A job whose lease the coordinator
+    refuses, or which could not be renewed for half a lease, is cancelled,
+    so it has stopped before the coordinator hands it to another worker.
+    Only files below ``root``, where the shared storage is mounted, are
+    accepted. The worker exits once the coordinator reports that the run is
+    over, or after failing to reach it for ``retry_seconds``.
+    """
+
+    def __init__(
+        self,
+        coordinator_url: str,
+        scanner: MediaScanner,
+        transcoder_factory: Callable[[], Transcoder],
+        root: Optional[Path] = None,
+        max_jobs: int = 1,
+        worker_id: Optional[str] = None,
+        retry_seconds: float = 60.0
+    ):
+        if max_jobs < 1:
+            raise ValueError(f"max_jobs must be at least 1, got {max_jobs}")
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.scanner = scanner
+        self.transcoder_factory = transcoder_factory
+        self.root = Path(root).resolve() if root is not None else None
+        self.max_jobs = max_jobs
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.retry_seconds = retry_seconds
+        self._stopped = threading.Event()
+        self._results: Dict[Path, bool] = {}
+        self._results_lock = threading.Lock()
+
+    def run(self) -> Dict[Path, bool]:
+        """Lease and transcode jobs until there are none left, returning whether each one succeeded."""
+        logging.info(f"Worker {self.worker_id} taking jobs from {self.coordinator_url}")
+        threads = [
+            threading.Thread(target=self._work, name=f"worker-{slot}", daemon=True)
+            for slot in range(self.max_jobs)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            logging.warning("Interrupted; abandoning leased jobs")
+            self.stop()
+            raise
+        return dict(self._results)
+
+    def stop(self):
+        """Stop taking new jobs."""
+        self._stopped.set()
+
+    def _work(self):
+        """Lease jobs one after another until the run is over."""
+        unreachable_since = None
+        while not self._stopped.is_set():
+            try:
+                _, response = self._request("/lease", {"worker": self.worker_id})
+            except OSError as e:
+                unreachable_since = unreachable_since or time.monotonic()
+                if time.monotonic() - unreachable_since >= self.retry_seconds:
+                    logging.error(f"Giving up on coordinator {self.coordinator_url}: {e}")
+                    self.stop()
+                    return
+                logging.warning(f"Could not reach coordinator {self.coordinator_url}: {e}")
+                self._stopped.wait(DEFAULT_WORKER_POLL_SECONDS)
+                continue
+            unreachable_since = None
+
+            job = response.get("job")
+            if job is not None:
+                self._run_job(job, float(response.get("lease_seconds", DEFAULT_LEASE_SECONDS)))
+            elif response.get("finished"):
+                logging.info("Coordinator has no more work")
+                self.stop()
+            else:
+                self._stopped.wait(float(response.get("retry_after", DEFAULT_WORKER_POLL_SECONDS)))
+
+    def _run_job(self, job: dict, lease_seconds: float):
+        """Transcode one leased job while renewing its lease, then report the outcome."""
+        lease_id, path = job["lease"], Path(job["path"])
+        transcoder = self.transcoder_factory()
+        lost = threading.Event()
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat,
+            args=(lease_id, path, lease_seconds, transcoder, lost, finished),
+            name=f"heartbeat-{lease_id[:8]}",
+            daemon=True
+        )
+        heartbeat.start()
+
+        error = None
+        try:
+            if self.root is not None and self.root not in path.resolve().parents:
+                raise ValueError(f"{path} is outside the shared storage root {self.root}")
+            success = bool(transcoder.transcode(self.scanner.scan_file(path), dry_run=bool(job.get("dry_run"))))
+            if not success:
+                error = f"Transcoding failed on {self.worker_id}"
+        except Exception as e:
+            logging.error(f"Transcoding job failed for {path}: {e}")
+            success, error = False, str(e)
+        finally:
+            finished.set()
+            heartbeat.join()
+
+        if lost.is_set():
+            logging.warning(f"Lease on {path} was lost; its outcome is not reported")
+            return
+        with self._results_lock:
+            self._results[path] = success
+        try:
+            self._request("/complete", {"lease": lease_id, "success": success, "error": error})
+        except LeaseLost:
+            logging.warning(f"Coordinator refused the outcome of {path}: its lease had expired")
+        except OSError as e:
+            logging.error(f"Could not report the outcome of {path}: {e}")
+
+    def _heartbeat(
+        self,
+        lease_id: str,
+        path: Path,
+        lease_seconds: float,
+        transcoder: Transcoder,
+        lost: threading.Event,
+        finished: threading.Event
+    ):
+        """Renew a lease until its job finishes, cancelling the job if the lease is lost."""
+        renewed_at = time.monotonic()
+        while not finished.wait(lease_seconds / 4):
+            try:
+                self._request("/heartbeat", {"lease": lease_id})
+                renewed_at = time.monotonic()
+                continue
+            except LeaseLost:
+                logging.error(f"Coordinator revoked the lease on {path}; cancelling it")
+            except OSError as e:
+                if time.monotonic() - renewed_at < lease_seconds / 2:
+                    logging.warning(f"Could not renew the lease on {path}: {e}")
+                    continue
+                logging.error(f"Could not renew the lease on {path} for {lease_seconds / 2:.0f}s; cancelling it")
+            lost.set()
+            transcoder.cancel()
+            return
+
+    def _request(self, endpoint: str, body: dict) -> Tuple[int, dict]:
+        """POST a JSON body to the coordinator and return the status and decoded response.
+
+        Raises LeaseLost when the coordinator refuses a lease, and OSError
+        when it cannot be reached or answers with another error.
+        """
+        request = urllib.request.Request(
+            self.coordinator_url + endpoint,
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                return response.status, json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            if e.code == 409:
+                raise LeaseLost(endpoint) from e
+            raise
+        except ValueError as e:
+            raise OSError(f"Invalid response from coordinator: {e}") from e
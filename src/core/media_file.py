@@ -1,9 +1,121 @@
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Resolves a probed field by name, returning every field it learned on the way
+Prober = Callable[[str], Dict[str, Any]]
+
+# The MediaFile attributes filled in by probing
+PROBED_FIELDS = ("format", "duration", "bit_rate", "streams")
+
+class ProbedField:
+    """Descriptor for a MediaFile attribute that is filled in by probing on first access.
+
+    Values passed to the constructor are used as-is. A field left as None is
+    resolved through the instance's ``prober`` the first time it is read, so
+    files that are filtered out on cheap ``stat`` data never spawn a probe.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return None
+        value = instance.__dict__.get(self.name)
+        if value is None and instance.prober is not None:
+            value = instance.resolve(self.name)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
 
 @dataclass
+class StreamInfo:
+    """Data class describing one stream inside a media file."""
+    index: int
+    codec_type: str
+    codec_name: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bit_rate: Optional[int] = None
+    frame_rate: Optional[float] = None
+
+@dataclass(repr=False, eq=False)
 class MediaFile:
-    """Data class representing a media file."""
+    """Data class representing a media file.
+
+    Printing or comparing a media file never probes it: the representation
+    shows probed fields only once they are resolved, and two media files
+    are equal when their path and size are. A pickled copy keeps the fields
+    resolved so far but not the prober, so it never probes either.
+    """
     path: Path
     size_gb: float
-    format: str
\ No newline at end of file
+    format: Optional[str] = ProbedField()
+    duration: Optional[float] = ProbedField()
+    bit_rate: Optional[int] = ProbedField()
+    streams: Optional[List[StreamInfo]] = ProbedField()
+    prober: Optional[Prober] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not isinstance(self.path, Path):
+            raise TypeError(f"path must be a Path, got {type(self.path).__name__}")
+        if self.size_gb < 0:
+            raise ValueError(f"size_gb must not be negative, got {self.size_gb}")
+        self._probe_lock = threading.Lock()
+        self._probed = set()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={self.__dict__.get(name)!r}" for name in PROBED_FIELDS)
+        return f"MediaFile(path={self.path!r}, size_gb={self.size_gb!r}, {fields})"
+
+    def __eq__(self, other):
+        if not isinstance(other, MediaFile):
+            return NotImplemented
+        return (self.path, self.size_gb) == (other.path, other.size_gb)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_probe_lock"]
+        state["prober"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._probe_lock = threading.Lock()
+
+    def resolve(self, name: str) -> Any:
+        """Probe for a field unless it has already been resolved, and return its value."""
+        with self._probe_lock:
+            if name not in self._probed:
+                self._fill(self.prober(name))
+                self._probed.add(name)
+        return self.__dict__.get(name)
+
+    def apply(self, fields: Dict[str, Any]):
+        """Fill in probed fields obtained elsewhere, so they are never probed again."""
+        with self._probe_lock:
+            self._fill(fields)
+
+    def _fill(self, fields: Dict[str, Any]):
+        for key, value in fields.items():
+            if self.__dict__.get(key) is None:
+                self.__dict__[key] = value
+            self._probed.add(key)
+
+    @property
+    def size_bytes(self) -> int:
+        """The file size in bytes."""
+        return int(self.size_gb * (1024 ** 3))
+
+    @property
+    def video_stream(self) -> Optional[StreamInfo]:
+        """The first video stream, if the file has been probed and has one."""
+        return next((s for s in self.streams or [] if s.codec_type == "video"), None)
+
+    @property
+    def audio_streams(self) -> List[StreamInfo]:
+        """All audio streams, empty if the file has not been probed."""
+        return [s for s in self.streams or [] if s.codec_type == "audio"]
@@ -1,35 +1,245 @@
+import asyncio
+import json
+import logging
 import os
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List
-from src.core.media_file import MediaFile
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from src.config.settings import DEFAULT_EXCLUDE_GLOBS, DEFAULT_PROBE_TIMEOUT, DEFAULT_PRUNE_DIRS
+from src.core.container_sniffer import sniff_container
+from src.core.directory_walker import DirectoryWalker
+from src.core.ffmpeg_process import stop_process
+from src.core.media_file import MediaFile, StreamInfo
+from src.core.probe_cache import ProbeCache
+from src.core.scan_filters import ScanFilter
+from src.interfaces.i_async_media_scanner import IAsyncMediaScanner
+from src.interfaces.i_media_scanner import IMediaScanner
+from src.utils.loop_semaphore import LoopSemaphore
+from src.utils.parsing import to_float, to_int
+from src.utils.profiler import span
 
-class MediaScanner:
-    def __init__(self, supported_extensions: tuple):
+# Container and stream details requested from ffprobe in a single call
+PROBE_ENTRIES = (
+    "format=format_name,duration,bit_rate"
+    ":stream=index,codec_type,codec_name,width,height,bit_rate,avg_frame_rate"
+)
+
+# Reported for a file ffprobe could not read; every field is given, so none is probed again
+PROBE_FAILED = {"format": "Unknown", "duration": None, "bit_rate": None, "streams": None}
+
+class MediaScanner(IMediaScanner, IAsyncMediaScanner):
+    """Concrete implementation of IMediaScanner and IAsyncMediaScanner backed by ffprobe."""
+
+    def __init__(
+        self,
+        supported_extensions: tuple,
+        max_workers: int = 1,
+        probe_timeout: Optional[float] = DEFAULT_PROBE_TIMEOUT,
+        cache: Optional[ProbeCache] = None,
+        filters: Sequence[ScanFilter] = (),
+        probe_on_scan: bool = True,
+        walker: Optional[DirectoryWalker] = None
+    ):
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
         self.supported_extensions = supported_extensions
+        self.walker = walker or DirectoryWalker(
+            supported_extensions, exclude=DEFAULT_EXCLUDE_GLOBS, prune_dirs=DEFAULT_PRUNE_DIRS
+        )
+        self.max_workers = max_workers
+        self.probe_timeout = probe_timeout
+        self.cache = cache
+        self.filters = tuple(filters)
+        self.probe_on_scan = probe_on_scan
+        # Files found by the latest directory scan that a filter rejected
+        self.filtered_count = 0
+        self._probe_slots = LoopSemaphore(max_workers)
+
+    def scan_file(self, file_path: Path) -> MediaFile:
+        """Scan a single media file and return its metadata."""
+        return self._process_media_file(file_path)
 
     def scan_directory(self, directory: Path) -> List[MediaFile]:
         """Scan a directory for media files and return their metadata."""
-        media_files = []
-        for file_path in self._get_all_files(directory):
-            if self.is_media_file(file_path):
-                media_files.append(self._process_media_file(file_path))
-        return media_files
-
-    def _get_all_files(self, directory: Path) -> List[Path]:
-        """Retrieve all files from the directory recursively."""
-        for root, _, files in os.walk(directory):
-            for file in files:
-                yield Path(root) / file
+        return list(self.iter_directory(directory))
+
+    def iter_directory(self, directory: Path) -> Iterator[MediaFile]:
+        """Scan a directory for media files, yielding their metadata as each is found.
+
+        The directory is walked by ``walker``, and only files accepted by
+        every filter, which see nothing but the path and its ``stat``
+        result, are yielded. With ``probe_on_scan`` their
+        format is probed concurrently on up to ``max_workers`` threads with a
+        bounded read-ahead; otherwise probing is left until a probed field is
+        first read. Files are yielded, by absolute path, in the order in
+        which they were found on disk. When a probe cache is configured and
+        the walk runs to completion, entries for files that no longer exist
+        below ``directory`` are evicted.
+        """
+        seen_paths = []
+        candidates = self._iter_candidates(directory, seen_paths)
+
+        if self.max_workers == 1 or not self.probe_on_scan:
+            for file_path, stat_result in candidates:
+                yield self._process_media_file(file_path, stat_result)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                pending = deque()
+                for file_path, stat_result in candidates:
+                    pending.append(executor.submit(self._process_media_file, file_path, stat_result))
+                    if len(pending) >= self.max_workers * 2:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+
+        if self.cache is not None:
+            self.cache.evict_missing(directory, seen_paths)
+
+    async def scan_file_async(self, file_path: Path) -> MediaFile:
+        """Scan a single media file without blocking the event loop on ffprobe."""
+        return await self._process_media_file_async(file_path)
+
+    async def scan_directory_async(self, directory: Path) -> List[MediaFile]:
+        """Scan a directory for media files without blocking the event loop on ffprobe."""
+        return [media async for media in self.iter_directory_async(directory)]
+
+    async def iter_directory_async(self, directory: Path) -> AsyncIterator[MediaFile]:
+        """Scan a directory for media files, yielding their metadata as each is found.
+
+        The asyncio counterpart of ``iter_directory``: the directory is
+        walked in a worker thread, and with ``probe_on_scan`` every field is
+        probed up front by asyncio subprocesses, at most ``max_workers`` at
+        a time, so reading a field afterwards never blocks the event loop.
+        Files are yielded in the order in which they were found on disk.
+        """
+        seen_paths = []
+        loop = asyncio.get_running_loop()
+        candidates = await loop.run_in_executor(None, lambda: list(self._iter_candidates(directory, seen_paths)))
+
+        pending = deque()
+        try:
+            for file_path, stat_result in candidates:
+                pending.append(asyncio.ensure_future(self._process_media_file_async(file_path, stat_result)))
+                if len(pending) >= self.max_workers * 2:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if self.cache is not None:
+            self.cache.evict_missing(directory, seen_paths)
+
+    def _iter_candidates(self, directory: Path, seen_paths: list) -> Iterator[Tuple[Path, os.stat_result]]:
+        """Yield media files below a directory, with their stat result, that pass every filter.
+
+        The files rejected by a filter are counted in ``filtered_count``.
+        """
+        self.filtered_count = 0
+        # Absolute paths keep probe cache and journal keys independent of the working directory
+        for file_path, stat_result in self.walker.walk(Path(os.path.abspath(directory))):
+            if self.cache is not None:
+                seen_paths.append(file_path)
+            if all(accept(file_path, stat_result) for accept in self.filters):
+                yield file_path, stat_result
+            else:
+                self.filtered_count += 1
 
     def is_media_file(self, file_path: Path) -> bool:
         """Check if the file has a supported media file extension."""
         return file_path.suffix.lower() in self.supported_extensions
 
-    def _process_media_file(self, file_path: Path) -> MediaFile:
+    def _process_media_file(self, file_path: Path, stat_result: Optional[os.stat_result] = None) -> MediaFile:
         """Generate metadata for a single media file."""
-        size_gb = self.get_file_size_gb(file_path)
-        fmt = self.probe_format(file_path)
-        return MediaFile(path=file_path, size_gb=size_gb, format=fmt)
+        with span("scan.file"):
+            if stat_result is None:
+                stat_result = file_path.stat()
+            media = MediaFile(
+                path=file_path,
+                size_gb=stat_result.st_size / (1024 ** 3),
+                prober=partial(self._probe_fields, file_path, stat_result)
+            )
+            if self.probe_on_scan:
+                media.resolve("format")
+            return media
+
+    async def _process_media_file_async(
+        self,
+        file_path: Path,
+        stat_result: Optional[os.stat_result] = None
+    ) -> MediaFile:
+        """Generate metadata for a single media file, probing every field asynchronously."""
+        if stat_result is None:
+            stat_result = file_path.stat()
+        media = MediaFile(
+            path=file_path,
+            size_gb=stat_result.st_size / (1024 ** 3),
+            prober=partial(self._probe_fields, file_path, stat_result)
+        )
+        if self.probe_on_scan:
+            async with self._probe_slots:
+                media.apply(await self._probe_all_fields_async(file_path, stat_result))
+        return media
+
+    async def _probe_all_fields_async(self, file_path: Path, stat_result: os.stat_result) -> Dict[str, Any]:
+        """Resolve every probed field, preferring the probe cache over running ffprobe.
+
+        When ffprobe fails, the format is still read from the file header
+        if it can be recognized there.
+        """
+        cached = self._cached_fields(file_path, stat_result, "streams")
+        if cached is not None:
+            return cached
+
+        data = await self.probe_media_async(file_path, timeout=self.probe_timeout)
+        if data["format"] == "Unknown":
+            return dict(PROBE_FAILED, format=sniff_container(file_path) or "Unknown")
+        return self._store_probe(file_path, stat_result, data)
+
+    def _probe_fields(self, file_path: Path, stat_result: os.stat_result, name: str) -> Dict[str, Any]:
+        """Resolve a probed field, preferring the probe cache over running ffprobe.
+
+        The container format is read from the file header when it can be
+        recognized there; ffprobe only runs for other fields or for headers
+        that are unknown or ambiguous.
+        """
+        cached = self._cached_fields(file_path, stat_result, name)
+        if cached is not None:
+            return cached
+
+        if name == "format":
+            fmt = sniff_container(file_path)
+            if fmt is not None:
+                return self._store_probe(file_path, stat_result, {"format": fmt})
+
+        return self._store_probe(file_path, stat_result, self.probe_media(file_path, timeout=self.probe_timeout))
+
+    def _cached_fields(self, file_path: Path, stat_result: os.stat_result, name: str) -> Optional[Dict[str, Any]]:
+        """The cached fields of an unchanged file, if the cache holds ``name`` for it."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(file_path, stat_result)
+        if cached is None or name not in cached:
+            return None
+        return self._to_media_fields(cached)
+
+    def _store_probe(self, file_path: Path, stat_result: os.stat_result, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache probe data unless the probe failed, and return it as MediaFile field values."""
+        if self.cache is not None and data["format"] != "Unknown":
+            self.cache.put(file_path, stat_result, data)
+        return self._to_media_fields(data)
+
+    @staticmethod
+    def _to_media_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert JSON-friendly probe data into MediaFile field values."""
+        fields = dict(data)
+        if fields.get("streams") is not None:
+            fields["streams"] = [StreamInfo(**stream) for stream in fields["streams"]]
+        return fields
 
     @staticmethod
     def get_file_size_gb(file_path: Path) -> float:
@@ -38,19 +248,114 @@ class MediaScanner:
         return size_bytes / (1024 ** 3)
 
     @staticmethod
-    def probe_format(file_path: Path) -> str:
-        """Determine the format of the media file using external tools."""
+    def probe_format(file_path: Path, timeout: Optional[float] = None) -> str:
+        """Determine the format of the media file, from its header when possible."""
+        fmt = sniff_container(file_path)
+        if fmt is not None:
+            return fmt
+        return MediaScanner.probe_media(file_path, timeout=timeout)["format"]
+
+    @staticmethod
+    def probe_media(file_path: Path, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Probe the container and every stream of a media file with a single ffprobe call.
+
+        A probe that runs longer than ``timeout`` seconds is killed and the
+        file is reported with an "Unknown" format and every other field
+        empty, so one hung file cannot stall a scan and is not probed again
+        for each field read afterwards.
+
+        Returns:
+            Dict[str, Any]: The ``format``, ``duration``, ``bit_rate`` and
+            ``streams`` of the file, in a JSON-serializable form.
+        """
         try:
-            cmd = [
-                "ffprobe",
-                "-v", "error",
-                "-show_entries", "format=format_name",
-                "-of", "json",
-                str(file_path)
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            return data["format"].get("format_name", "Unknown")
+            cmd = MediaScanner.build_probe_command(file_path)
+            with span("scan.ffprobe", file=file_path):
+                result = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=timeout)
+            return MediaScanner.parse_probe_output(json.loads(result.stdout))
+        except subprocess.TimeoutExpired:
+            logging.error(f"Timed out after {timeout}s probing {file_path}")
+            return dict(PROBE_FAILED)
         except Exception as e:
-            logging.error(f"Failed to probe format for {file_path}: {e}")
-            return "Unknown"
+            logging.error(f"Failed to probe {file_path}: {e}")
+            return dict(PROBE_FAILED)
+
+    @staticmethod
+    async def probe_media_async(file_path: Path, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Probe a media file like ``probe_media``, as an asyncio subprocess.
+
+        A probe that times out is terminated and reported with an "Unknown"
+        format; if the awaiting task is cancelled, ffprobe is terminated
+        before the cancellation propagates.
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *MediaScanner.build_probe_command(file_path),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            logging.error(f"Failed to probe {file_path}: {e}")
+            return dict(PROBE_FAILED)
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            await stop_process(process)
+            logging.error(f"Timed out after {timeout}s probing {file_path}")
+            return dict(PROBE_FAILED)
+        except asyncio.CancelledError:
+            await stop_process(process)
+            raise
+
+        if process.returncode != 0:
+            logging.error(f"Failed to probe {file_path}: {stderr.decode('utf-8', errors='replace').strip()}")
+            return dict(PROBE_FAILED)
+        try:
+            return MediaScanner.parse_probe_output(json.loads(stdout))
+        except ValueError as e:
+            logging.error(f"Failed to probe {file_path}: {e}")
+            return dict(PROBE_FAILED)
+
+    @staticmethod
+    def build_probe_command(file_path: Path) -> List[str]:
+        """Construct the ffprobe command that reports a file's container and streams as JSON."""
+        return [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", PROBE_ENTRIES,
+            "-of", "json",
+            str(file_path)
+        ]
+
+    @staticmethod
+    def parse_probe_output(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the fields TranscodePy uses from ffprobe's JSON output."""
+        container = data.get("format", {})
+        return {
+            "format": container.get("format_name", "Unknown"),
+            "duration": to_float(container.get("duration")),
+            "bit_rate": to_int(container.get("bit_rate")),
+            "streams": [
+                {
+                    "index": stream.get("index", idx),
+                    "codec_type": stream.get("codec_type", "unknown"),
+                    "codec_name": stream.get("codec_name"),
+                    "width": to_int(stream.get("width")),
+                    "height": to_int(stream.get("height")),
+                    "bit_rate": to_int(stream.get("bit_rate")),
+                    "frame_rate": _to_frame_rate(stream.get("avg_frame_rate"))
+                }
+                for idx, stream in enumerate(data.get("streams", []))
+            ]
+        }
+
+def _to_frame_rate(value) -> Optional[float]:
+    """Convert an ffprobe rate such as "24000/1001" to frames per second."""
+    if not value or "/" not in value:
+        return to_float(value)
+    num, den = value.split("/", 1)
+    num, den = to_float(num), to_float(den)
+    if not num or not den:
+        return None
+    return num / den
@@ -0,0 +1,157 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from src.core.media_file import MediaFile
+from src.core.segment_encoder import FFmpegRunner
+
+# Probes a file, returning its format, duration and streams like MediaScanner.probe_media
+Prober = Callable[[Path], Dict[str, Any]]
+
+# An output's duration may differ from the source's by this many seconds,
+# or by DURATION_TOLERANCE_RATIO of the source's duration if that is more
+DURATION_TOLERANCE_SECONDS = 1.0
+DURATION_TOLERANCE_RATIO = 0.005
+
+SSIM_PATTERN = re.compile(r"SSIM .*All:([0-9.]+)")
+PSNR_PATTERN = re.compile(r"PSNR .*average:([0-9.]+|inf)")
+
+@dataclass
+class VerificationResult:
+    """The outcome of verifying one output, with the problems found, if any."""
+    problems: List[str] = field(default_factory=list)
+    duration_delta: Optional[float] = None
+    ssim: Optional[float] = None
+    psnr: Optional[float] = None
+
+    @property
+    def passed(self) -> bool:
+        return not self.problems
+
+class OutputVerifier:
+    """Checks a transcoded output against its source without decoding either in full.
+
+    The output is probed and its duration and streams compared with the
+    source's: durations must agree within a small tolerance, and the output
+    must have a video and an audio stream exactly when the source does,
+    without gaining streams. For re-encodes, ``sample_count`` clips of
+    ``sample_seconds`` are compared with the same clips of the source by
+    SSIM and PSNR, all clips at once, and the worst clip must meet
+    ``min_ssim`` and ``min_psnr``. Stream copies keep the source's video,
+    so they are only checked for parity.
+    """
+
+    def __init__(
+        self,
+        run_ffmpeg: FFmpegRunner,
+        probe: Prober,
+        sample_count: int,
+        sample_seconds: float,
+        min_ssim: Optional[float] = None,
+        min_psnr: Optional[float] = None
+    ):
+        if sample_count < 1:
+            raise ValueError(f"sample_count must be at least 1, got {sample_count}")
+        if sample_seconds <= 0:
+            raise ValueError(f"sample_seconds must be positive, got {sample_seconds}")
+        self.run_ffmpeg = run_ffmpeg
+        self.probe = probe
+        self.sample_count = sample_count
+        self.sample_seconds = sample_seconds
+        self.min_ssim = min_ssim
+        self.min_psnr = min_psnr
+
+    def verify(self, media_file: MediaFile, output_file: Path, compare_quality: bool = True) -> VerificationResult:
+        """Verify an output, comparing sampled picture quality when ``compare_quality`` is set."""
+        verification = VerificationResult()
+        output = self.probe(output_file)
+        if output.get("format") == "Unknown":
+            verification.problems.append("output could not be probed")
+            return verification
+
+        self._check_duration(media_file, output, verification)
+        self._check_streams(media_file, output, verification)
+        if compare_quality and media_file.video_stream is not None and media_file.duration:
+            self._compare_samples(media_file, output_file, verification)
+        return verification
+
+    def sample_offsets(self, duration: float) -> List[float]:
+        """Start times of the clips compared in a file of the given duration."""
+        length = min(self.sample_seconds, duration)
+        span = duration - length
+        return [span * (idx + 1) / (self.sample_count + 1) for idx in range(self.sample_count)]
+
+    def build_compare_command(self, source: Path, output_file: Path, offset: float) -> List[str]:
+        """Construct the FFmpeg command that measures SSIM and PSNR of one clip of the output.
+
+        The output is scaled to the source's size first, so a downscaled
+        output is compared with what it was made from.
+        """
+        clip = ["-ss", f"{offset:.3f}", "-t", str(self.sample_seconds)]
+        return [
+            "ffmpeg",
+            "-hide_banner",
+            "-nostats"
+        ] + clip + ["-i", str(output_file)] + clip + ["-i", str(source)] + [
+            "-filter_complex",
+            "[0:v:0][1:v:0]scale2ref[dist][ref];[dist]split[d0][d1];[ref]split[r0][r1];[d0][r0]ssim;[d1][r1]psnr",
+            "-an",
+            "-f", "null",
+            "-"
+        ]
+
+    @staticmethod
+    def _check_duration(media_file: MediaFile, output: Dict[str, Any], verification: VerificationResult):
+        if not media_file.duration:
+            return
+        if not output.get("duration"):
+            verification.problems.append("output duration is unknown")
+            return
+        verification.duration_delta = output["duration"] - media_file.duration
+        tolerance = max(DURATION_TOLERANCE_SECONDS, media_file.duration * DURATION_TOLERANCE_RATIO)
+        if abs(verification.duration_delta) > tolerance:
+            verification.problems.append(
+                f"output lasts {output['duration']:.1f}s, source {media_file.duration:.1f}s"
+            )
+
+    @staticmethod
+    def _check_streams(media_file: MediaFile, output: Dict[str, Any], verification: VerificationResult):
+        if media_file.streams is None:
+            return
+        for codec_type in ("video", "audio"):
+            source_count = sum(1 for s in media_file.streams if s.codec_type == codec_type)
+            output_count = sum(1 for s in output.get("streams") or [] if s["codec_type"] == codec_type)
+            if (output_count > 0) != (source_count > 0) or output_count > source_count:
+                verification.problems.append(
+                    f"output has {output_count} {codec_type} streams, source {source_count}"
+                )
+
+    def _compare_samples(self, media_file: MediaFile, output_file: Path, verification: VerificationResult):
+        """Measure every clip in parallel and keep the scores of the worst one."""
+        commands = [
+            self.build_compare_command(media_file.path, output_file, offset)
+            for offset in self.sample_offsets(media_file.duration)
+        ]
+        with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+            results = list(executor.map(self.run_ffmpeg, commands))
+
+        ssim_scores, psnr_scores = [], []
+        for result in results:
+            ssim = SSIM_PATTERN.search(result.stderr)
+            psnr = PSNR_PATTERN.search(result.stderr)
+            if result.returncode != 0 or ssim is None or psnr is None:
+                last_line = result.stderr.strip().splitlines()[-1:] or ["no output"]
+                logging.warning(f"Could not compare a clip of {output_file} with its source: {last_line[0]}")
+                verification.problems.append("a sampled clip could not be compared")
+                return
+            ssim_scores.append(float(ssim.group(1)))
+            psnr_scores.append(float(psnr.group(1)))
+
+        verification.ssim = min(ssim_scores)
+        verification.psnr = min(psnr_scores)
+        if self.min_ssim is not None and verification.ssim < self.min_ssim:
+            verification.problems.append(f"SSIM {verification.ssim:.4f} is below {self.min_ssim}")
+        if self.min_psnr is not None and verification.psnr < self.min_psnr:
+            verification.problems.append(f"PSNR {verification.psnr:.2f} dB is below {self.min_psnr}")
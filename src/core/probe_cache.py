@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+class ProbeCache:
+    """Persistent SQLite cache of probe results keyed by file identity.
+
+    An entry is only considered valid while the file's path, size,
+    modification time (in nanoseconds) and inode all match the values
+    recorded when it was probed, so any rewrite of the file invalidates it.
+    Paths are stored absolute, so a library reached through different
+    relative paths shares its entries.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS probe_cache ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, file_path: Path, stat_result: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Return the cached probe data for a file, or None if missing or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, data FROM probe_cache WHERE path = ?",
+                (self._key(file_path),)
+            ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, inode, data = row
+        if (size, mtime_ns, inode) != self._identity(stat_result):
+            return None
+        return json.loads(data)
+
+    def put(self, file_path: Path, stat_result: os.stat_result, data: Dict[str, Any]):
+        """Store probe data for a file, replacing any previous entry."""
+        size, mtime_ns, inode = self._identity(stat_result)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probe_cache (path, size, mtime_ns, inode, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._key(file_path), size, mtime_ns, inode, json.dumps(data))
+            )
+            self._conn.commit()
+
+    def evict_missing(self, directory: Path, seen_paths: Iterable[Path]) -> int:
+        """Drop entries below a directory whose files are gone since its latest scan.
+
+        Entries not seen in the scan are only dropped once their file is
+        confirmed missing, so a scan with tighter exclusion, pruning or depth
+        rules keeps the entries of files it merely skipped.
+
+        Returns:
+            int: The number of evicted entries.
+        """
+        prefix = os.path.join(self._key(directory), "")
+        seen = {self._key(p) for p in seen_paths}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM probe_cache WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix)
+            ).fetchall()
+        stale = [(path,) for (path,) in rows if path not in seen and not os.path.exists(path)]
+        if stale:
+            with self._lock:
+                self._conn.executemany("DELETE FROM probe_cache WHERE path = ?", stale)
+                self._conn.commit()
+        if stale:
+            logging.info(f"Evicted {len(stale)} stale probe cache entries under {directory}")
+        return len(stale)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM probe_cache")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _key(file_path: Path) -> str:
+        return os.path.abspath(file_path)
+
+    @staticmethod
+    def _identity(stat_result: os.stat_result) -> tuple:
+        return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
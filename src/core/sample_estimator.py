@@ -0,0 +1,118 @@
+import logging
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.core.media_file import MediaFile
+from src.core.segment_encoder import FFmpegRunner
+
+@dataclass
+class SampleEstimate:
+    """Output size and encode time of a full encode, extrapolated from samples."""
+    output_bytes: int
+    encode_seconds: float
+    cpu_seconds: Optional[float]
+    sampled_seconds: float
+
+class SampleEstimator:
+    """Predicts the result of an encode by encoding a few short samples of the source.
+
+    ``sample_count`` clips of ``sample_seconds`` each are taken at evenly
+    spaced points, away from the very start and end of the file where
+    titles and credits tend to be unrepresentative. Each clip is encoded
+    with the codec arguments of the real encode, and the size and time of
+    the clips are scaled up by the ratio of the file's duration to the
+    sampled duration. Estimates are kept per file, so deciding on a file
+    again does not repeat its samples.
+    """
+
+    def __init__(self, run_ffmpeg: FFmpegRunner, sample_count: int, sample_seconds: float):
+        if sample_count < 1:
+            raise ValueError(f"sample_count must be at least 1, got {sample_count}")
+        if sample_seconds <= 0:
+            raise ValueError(f"sample_seconds must be positive, got {sample_seconds}")
+        self.run_ffmpeg = run_ffmpeg
+        self.sample_count = sample_count
+        self.sample_seconds = sample_seconds
+        self._estimates: Dict[Tuple[Path, int], Optional[SampleEstimate]] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, media_file: MediaFile, codec_args: List[str], threads: int) -> Optional[SampleEstimate]:
+        """Estimate a full encode of a file, or None if it cannot be sampled.
+
+        Files without a known duration, and files so short that sampling
+        would take a large share of the full encode, are not sampled.
+        """
+        key = (media_file.path, media_file.size_bytes)
+        with self._lock:
+            if key in self._estimates:
+                return self._estimates[key]
+
+        estimate = None
+        if media_file.duration and media_file.duration >= 2 * self.sample_count * self.sample_seconds:
+            estimate = self._sample(media_file, codec_args, threads)
+        with self._lock:
+            self._estimates[key] = estimate
+        return estimate
+
+    def sample_offsets(self, duration: float) -> List[float]:
+        """Start times of the samples taken from a file of the given duration."""
+        span = duration - self.sample_seconds
+        return [span * (idx + 1) / (self.sample_count + 1) for idx in range(self.sample_count)]
+
+    def build_sample_command(
+        self,
+        input_file: Path,
+        output_file: Path,
+        offset: float,
+        codec_args: List[str],
+        threads: int
+    ) -> List[str]:
+        """Construct the FFmpeg command that encodes one sample."""
+        return [
+            "ffmpeg",
+            "-ss", f"{offset:.3f}",
+            "-i", str(input_file),
+            "-t", str(self.sample_seconds)
+        ] + codec_args + [
+            "-threads", str(threads),
+            "-f", "matroska",
+            "-y", str(output_file)
+        ]
+
+    def _sample(self, media_file: MediaFile, codec_args: List[str], threads: int) -> Optional[SampleEstimate]:
+        """Encode every sample of a file and extrapolate the full encode from them."""
+        sample_bytes = 0
+        encode_seconds = 0.0
+        cpu_times = []
+        with tempfile.TemporaryDirectory(prefix="transcode-samples-") as work:
+            for idx, offset in enumerate(self.sample_offsets(media_file.duration)):
+                sample_file = Path(work) / f"sample_{idx:02d}.mkv"
+                started = time.monotonic()
+                result = self.run_ffmpeg(
+                    self.build_sample_command(media_file.path, sample_file, offset, codec_args, threads)
+                )
+                encode_seconds += time.monotonic() - started
+                if result.returncode != 0 or not sample_file.exists():
+                    last_line = result.stderr.strip().splitlines()[-1:] or ["no output"]
+                    logging.warning(f"Could not encode a sample of {media_file.path}: {last_line[0]}")
+                    return None
+                sample_bytes += sample_file.stat().st_size
+                if result.cpu_seconds is not None:
+                    cpu_times.append(result.cpu_seconds)
+
+        sampled_seconds = self.sample_count * self.sample_seconds
+        scale = media_file.duration / sampled_seconds
+        estimate = SampleEstimate(
+            output_bytes=int(sample_bytes * scale),
+            encode_seconds=encode_seconds * scale,
+            cpu_seconds=sum(cpu_times) * scale if len(cpu_times) == self.sample_count else None,
+            sampled_seconds=sampled_seconds
+        )
+        logging.info(
+            f"Sampled {sampled_seconds:.0f}s of {media_file.path}: projected output "
+            f"{estimate.output_bytes / 1024 ** 3:.2f} GB in {estimate.encode_seconds:.0f}s"
+        )
+        return estimate
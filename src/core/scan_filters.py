@@ -0,0 +1,24 @@
+import os
+from pathlib import Path
+from typing import Callable, Iterable
+
+# Decides from a path and its stat result whether a file is worth probing
+ScanFilter = Callable[[Path, os.stat_result], bool]
+
+def min_size_filter(min_size_gb: float) -> ScanFilter:
+    """Accept only files larger than the given size in gigabytes."""
+    min_size_bytes = min_size_gb * (1024 ** 3)
+
+    def accept(file_path: Path, stat_result: os.stat_result) -> bool:
+        return stat_result.st_size > min_size_bytes
+
+    return accept
+
+def extension_filter(extensions: Iterable[str]) -> ScanFilter:
+    """Accept only files with one of the given extensions (case-insensitive)."""
+    allowed = {ext.lower() for ext in extensions}
+
+    def accept(file_path: Path, stat_result: os.stat_result) -> bool:
+        return file_path.suffix.lower() in allowed
+
+    return accept
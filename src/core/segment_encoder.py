@@ -0,0 +1,149 @@
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List
+from src.core.ffmpeg_process import FFmpegResult
+
+# Runs an FFmpeg command to completion
+FFmpegRunner = Callable[[List[str]], FFmpegResult]
+
+class SegmentEncoder:
+    """Encodes a single large file as keyframe-aligned segments in parallel.
+
+    The video stream is cut with stream copy, which can only split on
+    keyframes, into segments of roughly ``segment_seconds``. The segments
+    are encoded concurrently, each by its own ffmpeg process, and then
+    joined losslessly with the concat demuxer. Audio is encoded once from
+    the untouched source while joining, so it cannot drift against the
+    video at segment boundaries. No more segments are encoded at once than
+    the job has threads, so ``max_workers`` is lowered for jobs with fewer.
+    """
+
+    def __init__(self, run_ffmpeg: FFmpegRunner, segment_seconds: float, max_workers: int):
+        if segment_seconds <= 0:
+            raise ValueError(f"segment_seconds must be positive, got {segment_seconds}")
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+        self.run_ffmpeg = run_ffmpeg
+        self.segment_seconds = segment_seconds
+        self.max_workers = max_workers
+
+    def encode(
+        self,
+        input_file: Path,
+        output_file: Path,
+        video_args: List[str],
+        audio_args: List[str],
+        threads: int,
+        overwrite_flag: List[str]
+    ) -> FFmpegResult:
+        """Encode a file segment by segment.
+
+        Intermediate segments are written to a temporary directory next to
+        the output, which is removed once the final file has been joined.
+
+        Returns:
+            FFmpegResult: The first failing step, or the final join, with the
+            CPU time of every step added up.
+        """
+        with tempfile.TemporaryDirectory(prefix=f".{input_file.stem}_segments_", dir=output_file.parent) as work:
+            work_dir = Path(work)
+            results = [self.run_ffmpeg(self.build_split_command(input_file, work_dir))]
+            if results[-1].returncode != 0:
+                return self._combine(results)
+
+            sources = sorted(work_dir.glob("source_*.mkv"))
+            if not sources:
+                return FFmpegResult(1, f"No segments were produced from {input_file}")
+            # Never run more segments at once than the job has threads for
+            workers = max(1, min(self.max_workers, threads))
+            if workers < self.max_workers:
+                logging.warning(
+                    f"Encoding segments of {input_file} on {workers} workers instead of {self.max_workers}: "
+                    f"the job has only {threads} threads"
+                )
+            logging.info(f"Encoding {len(sources)} segments of {input_file} on {workers} workers")
+
+            segment_threads = max(1, threads // workers)
+            encoded = [work_dir / source.name.replace("source_", "encoded_") for source in sources]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results.extend(executor.map(
+                    self.run_ffmpeg,
+                    [
+                        self.build_segment_command(source, target, video_args, segment_threads)
+                        for source, target in zip(sources, encoded)
+                    ]
+                ))
+            if any(result.returncode != 0 for result in results):
+                return self._combine(results)
+
+            concat_list = work_dir / "segments.txt"
+            concat_list.write_text("".join(f"file '{self._escape(path)}'\n" for path in encoded))
+            results.append(self.run_ffmpeg(
+                self.build_concat_command(concat_list, input_file, output_file, audio_args, overwrite_flag)
+            ))
+            return self._combine(results)
+
+    @staticmethod
+    def _combine(results: List[FFmpegResult]) -> FFmpegResult:
+        """Merge step results into one, keeping the first failure and the total CPU time."""
+        failed = next((result for result in results if result.returncode != 0), results[-1])
+        cpu_times = [result.cpu_seconds for result in results if result.cpu_seconds is not None]
+        return FFmpegResult(failed.returncode, failed.stderr, sum(cpu_times) if cpu_times else None)
+
+    def build_split_command(self, input_file: Path, work_dir: Path) -> List[str]:
+        """Construct the FFmpeg command that cuts the video stream into keyframe-aligned segments."""
+        return [
+            "ffmpeg",
+            "-i", str(input_file),
+            "-map", "0:v:0",
+            "-c", "copy",
+            "-an",
+            "-f", "segment",
+            "-segment_time", str(self.segment_seconds),
+            "-segment_format", "matroska",
+            "-reset_timestamps", "1",
+            str(work_dir / "source_%05d.mkv")
+        ]
+
+    @staticmethod
+    def build_segment_command(source: Path, target: Path, video_args: List[str], threads: int) -> List[str]:
+        """Construct the FFmpeg command that encodes one video segment."""
+        return [
+            "ffmpeg",
+            "-i", str(source),
+            "-map", "0:v:0"
+        ] + video_args + [
+            "-an",
+            "-threads", str(threads),
+            "-f", "matroska",
+            "-y", str(target)
+        ]
+
+    @staticmethod
+    def build_concat_command(
+        concat_list: Path,
+        input_file: Path,
+        output_file: Path,
+        audio_args: List[str],
+        overwrite_flag: List[str]
+    ) -> List[str]:
+        """Construct the FFmpeg command that joins encoded segments with the source audio."""
+        return [
+            "ffmpeg",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(concat_list),
+            "-i", str(input_file),
+            "-map", "0:v",
+            "-map", "1:a?",
+            "-c:v", "copy"
+        ] + audio_args + [
+            "-f", "matroska"
+        ] + overwrite_flag + [str(output_file)]
+
+    @staticmethod
+    def _escape(path: Path) -> str:
+        """Quote a path for an FFmpeg concat list."""
+        return str(path.resolve()).replace("'", "'\\''")
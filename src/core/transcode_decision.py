@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+from src.core.media_file import MediaFile
+
+# Codecs the output format uses, which can be kept by stream copy
+TARGET_VIDEO_CODEC = "h264"
+TARGET_AUDIO_CODEC = "aac"
+
+# Audio bitrate of a re-encoded audio stream, in bits per second
+TARGET_AUDIO_BIT_RATE = 128_000
+
+# Rough bits per pixel per frame produced by libx264 at CRF 23, preset medium
+ESTIMATED_BITS_PER_PIXEL = 0.1
+
+# An H.264 source is only copied when its bitrate is within this factor of
+# what a re-encode is expected to produce; above it re-encoding still pays
+COPY_BIT_RATE_TOLERANCE = 1.5
+
+class TranscodeAction(Enum):
+    """What to do with a media file to bring it to the target format."""
+    REENCODE = "re-encode"
+    REMUX = "remux"
+    COPY_VIDEO = "copy video, re-encode audio"
+    SKIP = "skip"
+
+@dataclass
+class TranscodeDecision:
+    """The chosen action for a media file and the output size it should yield.
+
+    The encode time and CPU time are only known when the decision has been
+    refined by encoding samples of the file.
+    """
+    action: TranscodeAction
+    reason: str
+    estimated_output_bytes: Optional[int] = None
+    estimated_encode_seconds: Optional[float] = None
+    estimated_cpu_seconds: Optional[float] = None
+
+    def estimated_savings_bytes(self, media_file: MediaFile) -> Optional[int]:
+        """Bytes expected to be reclaimed, or None if the output size is unknown."""
+        if self.action is TranscodeAction.SKIP:
+            return 0
+        if self.estimated_output_bytes is None:
+            return None
+        return media_file.size_bytes - self.estimated_output_bytes
+
+    def estimated_savings_ratio(self, media_file: MediaFile) -> Optional[float]:
+        """Share of the source size expected to be reclaimed, or None if unknown."""
+        savings = self.estimated_savings_bytes(media_file)
+        if savings is None or not media_file.size_bytes:
+            return None
+        return savings / media_file.size_bytes
+
+def decide_action(media_file: MediaFile) -> TranscodeDecision:
+    """Choose the cheapest action that brings a file to H.264/AAC in Matroska.
+
+    A file is re-encoded unless its probed streams show that its video is
+    already H.264 at a bitrate close to what a re-encode would produce; in
+    that case only non-AAC audio is re-encoded, and a file whose streams
+    are all compliant is remuxed into Matroska or skipped if it already is.
+    """
+    reencoded_bytes = _estimate_reencode_bytes(media_file)
+    if not media_file.streams:
+        return TranscodeDecision(TranscodeAction.REENCODE, "stream details unavailable", reencoded_bytes)
+
+    video = media_file.video_stream
+    video_bit_rate = _video_bit_rate(media_file)
+    target_bit_rate = _estimate_video_bit_rate(media_file)
+    if video is not None and video.codec_name != TARGET_VIDEO_CODEC:
+        return TranscodeDecision(TranscodeAction.REENCODE, f"video codec is {video.codec_name}", reencoded_bytes)
+    if video is not None and video_bit_rate and target_bit_rate and \
+            video_bit_rate > target_bit_rate * COPY_BIT_RATE_TOLERANCE:
+        return TranscodeDecision(
+            TranscodeAction.REENCODE,
+            f"H.264 video at {video_bit_rate / 1e6:.1f} Mb/s is well above the expected "
+            f"{target_bit_rate / 1e6:.1f} Mb/s",
+            reencoded_bytes
+        )
+
+    audio_codecs = sorted({
+        s.codec_name or "unknown" for s in media_file.audio_streams if s.codec_name != TARGET_AUDIO_CODEC
+    })
+    if audio_codecs:
+        return TranscodeDecision(
+            TranscodeAction.COPY_VIDEO,
+            f"video is already H.264, audio is {', '.join(audio_codecs)}",
+            _estimate_copy_video_bytes(media_file)
+        )
+
+    if (media_file.format or "").startswith("matroska"):
+        return TranscodeDecision(TranscodeAction.SKIP, "already H.264/AAC in Matroska", media_file.size_bytes)
+    return TranscodeDecision(
+        TranscodeAction.REMUX,
+        f"streams are already H.264/AAC in {media_file.format}",
+        media_file.size_bytes
+    )
+
+def _video_bit_rate(media_file: MediaFile) -> Optional[int]:
+    """The source video bitrate, derived from the container when the stream lacks one."""
+    video = media_file.video_stream
+    if video is not None and video.bit_rate:
+        return video.bit_rate
+    if not media_file.bit_rate:
+        return None
+    audio_bit_rate = sum(s.bit_rate or 0 for s in media_file.audio_streams)
+    return max(media_file.bit_rate - audio_bit_rate, 0) or None
+
+def _estimate_video_bit_rate(media_file: MediaFile) -> Optional[float]:
+    """The video bitrate a re-encode is expected to produce."""
+    video = media_file.video_stream
+    if video is None or not (video.width and video.height and video.frame_rate):
+        return None
+    return video.width * video.height * video.frame_rate * ESTIMATED_BITS_PER_PIXEL
+
+def _estimate_reencode_bytes(media_file: MediaFile) -> Optional[int]:
+    """Expected output size of a full re-encode."""
+    if not media_file.duration:
+        return None
+    video_bit_rate = _estimate_video_bit_rate(media_file)
+    if video_bit_rate is None:
+        return None
+    source_bit_rate = _video_bit_rate(media_file)
+    if source_bit_rate:
+        video_bit_rate = min(video_bit_rate, source_bit_rate)
+    audio_bit_rate = TARGET_AUDIO_BIT_RATE if media_file.audio_streams else 0
+    return int(media_file.duration * (video_bit_rate + audio_bit_rate) / 8)
+
+def _estimate_copy_video_bytes(media_file: MediaFile) -> Optional[int]:
+    """Expected output size when only the audio is re-encoded."""
+    if not media_file.duration:
+        return None
+    audio = media_file.audio_streams
+    if not audio or any(s.bit_rate is None for s in audio):
+        return None
+    saved_bits = (sum(s.bit_rate for s in audio) - TARGET_AUDIO_BIT_RATE) * media_file.duration
+    return int(media_file.size_bytes - saved_bits / 8)
@@ -0,0 +1,36 @@
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+@dataclass
+class JobMetrics:
+    """Resource usage and outcome of one transcode job."""
+    path: str
+    output_path: str
+    action: str
+    success: bool
+    wall_seconds: float
+    cpu_seconds: Optional[float]
+    input_bytes: int
+    output_bytes: Optional[int]
+    compression_ratio: Optional[float]
+    verified: Optional[bool] = None
+    ssim: Optional[float] = None
+    psnr: Optional[float] = None
+
+class MetricsRecorder:
+    """Appends JobMetrics to a JSON lines file, one object per finished job."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def record(self, metrics: JobMetrics):
+        """Append a job's metrics to the file."""
+        line = json.dumps(asdict(metrics), sort_keys=True)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
@@ -0,0 +1,100 @@
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from src.utils.parsing import to_float, to_int
+
+@dataclass
+class TranscodeProgress:
+    """A snapshot of a running ffmpeg job, as reported by ``-progress``."""
+    path: Path
+    frame: Optional[int] = None
+    fps: Optional[float] = None
+    speed: Optional[float] = None
+    out_time_seconds: Optional[float] = None
+    bitrate_kbps: Optional[float] = None
+    total_size: Optional[int] = None
+    percent: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    finished: bool = False
+
+# Receives every progress snapshot of every job
+ProgressListener = Callable[[TranscodeProgress], None]
+
+class ProgressParser:
+    """Incrementally parses ffmpeg ``-progress`` output into TranscodeProgress snapshots.
+
+    ffmpeg writes blocks of ``key=value`` lines, each closed by a
+    ``progress=continue`` or ``progress=end`` line; a snapshot is published
+    to every listener when a block closes.
+    """
+
+    def __init__(self, path: Path, duration: Optional[float], listeners: List[ProgressListener]):
+        self.path = path
+        self.duration = duration
+        self.listeners = listeners
+        self._fields: Dict[str, str] = {}
+
+    def feed(self, line: str):
+        """Consume one line of ffmpeg progress output."""
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return
+        if key != "progress":
+            self._fields[key] = value
+            return
+        snapshot = self._snapshot(finished=value == "end")
+        self._fields = {}
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logging.error(f"Progress listener failed for {self.path}: {e}")
+
+    def _snapshot(self, finished: bool) -> TranscodeProgress:
+        """Build a snapshot from the fields of the block that just closed."""
+        out_time_us = to_float(self._fields.get("out_time_us") or self._fields.get("out_time_ms"))
+        out_time = out_time_us / 1_000_000 if out_time_us is not None else None
+        speed = to_float(self._fields.get("speed", "").rstrip("x"))
+        bitrate = to_float(self._fields.get("bitrate", "").replace("kbits/s", ""))
+
+        percent = eta = None
+        if self.duration and out_time is not None:
+            percent = min(100.0, 100.0 * out_time / self.duration)
+            if speed:
+                eta = max(0.0, (self.duration - out_time) / speed)
+        if finished:
+            percent, eta = 100.0, 0.0
+
+        return TranscodeProgress(
+            path=self.path,
+            frame=to_int(self._fields.get("frame")),
+            fps=to_float(self._fields.get("fps")),
+            speed=speed,
+            out_time_seconds=out_time,
+            bitrate_kbps=bitrate,
+            total_size=to_int(self._fields.get("total_size")),
+            percent=percent,
+            eta_seconds=eta,
+            finished=finished
+        )
+
+class ProgressLogger:
+    """Progress listener that logs each job's progress at most once per interval."""
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self._last_logged: Dict[Path, float] = {}
+
+    def __call__(self, progress: TranscodeProgress):
+        now = time.monotonic()
+        if not progress.finished and now - self._last_logged.get(progress.path, float("-inf")) < self.interval:
+            return
+        self._last_logged[progress.path] = now
+        percent = "?" if progress.percent is None else f"{progress.percent:.1f}"
+        eta = "?" if progress.eta_seconds is None else f"{progress.eta_seconds:.0f}s"
+        logging.info(
+            f"Progress {progress.path.name}: {percent}% | fps={progress.fps} | "
+            f"speed={progress.speed}x | bitrate={progress.bitrate_kbps}kbit/s | ETA {eta}"
+        )
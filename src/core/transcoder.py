@@ -1,53 +1,351 @@
+import asyncio
+import errno
+import hashlib
 import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
+from collections import Counter
+from src.config.settings import (
+    DEFAULT_SAMPLE_SECONDS, DEFAULT_SEGMENT_SECONDS, DEFAULT_SEGMENT_WORKERS, DEFAULT_STDERR_TAIL_LINES,
+    DEFAULT_VERIFY_SAMPLE_SECONDS
+)
+from src.core.device_limiter import DeviceLimiter
+from src.core.ffmpeg_process import FFmpegResult, OutputTail, stop_process, wait_for_exit
+from src.core.job_journal import JobJournal
 from src.core.media_file import MediaFile
+from src.core.media_scanner import MediaScanner
+from src.core.output_verifier import OutputVerifier, VerificationResult
+from src.core.sample_estimator import SampleEstimator
+from src.core.segment_encoder import SegmentEncoder
+from src.core.transcode_decision import TranscodeAction, TranscodeDecision, decide_action
+from src.core.transcode_metrics import JobMetrics, MetricsRecorder
+from src.core.transcode_progress import ProgressListener, ProgressParser
+from src.interfaces.i_async_transcoder import IAsyncTranscoder
 from src.interfaces.i_transcoder import ITranscoder
+from src.utils.loop_semaphore import LoopSemaphore
+from src.utils.profiler import record, span
 import subprocess
-from typing import List
+from typing import List, Optional, Tuple
 
-class Transcoder(ITranscoder):
-    """Concrete implementation of ITranscoder for transcoding media files."""
+class Transcoder(ITranscoder, IAsyncTranscoder):
+    """Concrete implementation of ITranscoder and IAsyncTranscoder for transcoding media files."""
 
-    def __init__(self, threads: int, overwrite: bool):
+    VIDEO_CODEC_ARGS = ["-c:v", "libx264", "-preset", "medium", "-crf", "23"]
+    AUDIO_CODEC_ARGS = ["-c:a", "aac", "-b:a", "128k"]
+
+    def __init__(
+        self,
+        threads: int,
+        overwrite: bool,
+        split_threshold_gb: Optional[float] = None,
+        segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+        segment_workers: int = DEFAULT_SEGMENT_WORKERS,
+        smart_remux: bool = True,
+        metrics: Optional[MetricsRecorder] = None,
+        stderr_tail_lines: int = DEFAULT_STDERR_TAIL_LINES,
+        ffmpeg_log_dir: Optional[Path] = None,
+        journal: Optional[JobJournal] = None,
+        max_async_jobs: Optional[int] = None,
+        sample_count: int = 0,
+        sample_seconds: float = DEFAULT_SAMPLE_SECONDS,
+        min_savings_ratio: Optional[float] = None,
+        scratch_dir: Optional[Path] = None,
+        device_limiter: Optional[DeviceLimiter] = None,
+        verify_samples: int = 0,
+        verify_sample_seconds: float = DEFAULT_VERIFY_SAMPLE_SECONDS,
+        min_ssim: Optional[float] = None,
+        min_psnr: Optional[float] = None,
+        reject_unverified: bool = False
+    ):
         self.threads = threads
         self.overwrite = overwrite
+        self.smart_remux = smart_remux
+        self.metrics = metrics
+        self.journal = journal
+        self.stderr_tail_lines = stderr_tail_lines
+        self.ffmpeg_log_dir = ffmpeg_log_dir
+        if ffmpeg_log_dir is not None:
+            Path(ffmpeg_log_dir).mkdir(parents=True, exist_ok=True)
+        self.scratch_dir = scratch_dir
+        if scratch_dir is not None:
+            Path(scratch_dir).mkdir(parents=True, exist_ok=True)
+        self.device_limiter = device_limiter
+        self._progress_listeners: List[ProgressListener] = []
+        self.split_threshold_gb = split_threshold_gb
+        self.segment_encoder = SegmentEncoder(self._run_ffmpeg, segment_seconds, segment_workers)
+        self.sample_estimator = SampleEstimator(self._run_ffmpeg, sample_count, sample_seconds) if sample_count else None
+        self.min_savings_ratio = min_savings_ratio
+        self.verifier = OutputVerifier(
+            self._run_ffmpeg, MediaScanner.probe_media, verify_samples, verify_sample_seconds, min_ssim, min_psnr
+        ) if verify_samples else None
+        self.reject_unverified = reject_unverified
+        self.verification_counts = Counter()
+        self._verification_lock = threading.Lock()
+        self._processes = set()
+        self._processes_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self.max_async_jobs = max_async_jobs
+        self._async_processes = set()
+        self._async_job_slots = LoopSemaphore(max_async_jobs) if max_async_jobs else None
 
-    def transcode(self, media_file: MediaFile, dry_run: bool = False) -> bool:
-        """Transcode a media file into a standardized format."""
-        output_file = self.generate_output_filename(media_file.path)
-        logging.info(f"Preparing to transcode: {media_file.path}")
-        logging.info(f"Output will be saved to: {output_file}")
+    def transcode(self, media_file: MediaFile, dry_run: bool = False, threads: Optional[int] = None) -> bool:
+        """Transcode a media file into a standardized format.
 
-        if not self._can_proceed_with_transcoding(output_file, dry_run):
+        ``threads`` overrides the configured ffmpeg thread count for this job.
+        With ``smart_remux``, streams that already match the target format
+        are copied instead of re-encoded, and compliant files are skipped.
+        Re-encodes of files larger than ``split_threshold_gb`` run in
+        parallel segments. FFmpeg writes to a ``.part`` file, in the scratch
+        directory if one is configured, that only replaces the output once
+        the encode has succeeded, so an interrupted job never leaves a
+        truncated output behind. With a device limiter, ffmpeg only starts
+        once a read slot is free on the source's device and a write slot on
+        the device it writes to. With verification enabled, the finished
+        ``.part`` file is checked against the source before it is published,
+        and with ``reject_unverified`` an output that fails is discarded.
+        """
+        prepared = self._prepare(media_file, dry_run)
+        if prepared is None:
             return False
+        decision, partial_file, output_file = prepared
+
+        if decision.action is TranscodeAction.REENCODE and self.should_split(media_file):
+            return self._execute_segmented(media_file, partial_file, output_file, threads or self.threads)
+
+        command = self.build_ffmpeg_command(media_file.path, partial_file, threads=threads, action=decision.action)
+        return self._execute_transcoding(command, media_file, partial_file, output_file, action=decision.action)
+
+    async def transcode_async(
+        self,
+        media_file: MediaFile,
+        dry_run: bool = False,
+        threads: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """Transcode a media file like ``transcode``, with ffmpeg as an asyncio subprocess.
+
+        At most ``max_async_jobs`` encodes run at once. An encode that runs
+        longer than ``timeout`` seconds is stopped and reported as failed;
+        cancelling the awaiting task stops ffmpeg, discards the partial
+        output and returns the job to the journal's queue. Files above the
+        split threshold are encoded by a single ffmpeg process.
+        """
+        if self.sample_estimator is not None:
+            # Sample encodes run synchronously, so keep them off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self.decide, media_file)
+        prepared = self._prepare(media_file, dry_run)
+        if prepared is None:
+            return False
+        decision, partial_file, output_file = prepared
+
+        command = self.build_ffmpeg_command(media_file.path, partial_file, threads=threads, action=decision.action)
+        if self._async_job_slots is None:
+            return await self._execute_transcoding_async(
+                command, media_file, partial_file, output_file, decision.action, timeout
+            )
+        async with self._async_job_slots:
+            return await self._execute_transcoding_async(
+                command, media_file, partial_file, output_file, decision.action, timeout
+            )
+
+    def add_progress_listener(self, listener: ProgressListener):
+        """Register a callback that receives live progress of every transcode."""
+        self._progress_listeners.append(listener)
 
-        command = self.build_ffmpeg_command(media_file.path, output_file)
-        return self._execute_transcoding(command, media_file, output_file)
+    def decide(self, media_file: MediaFile) -> TranscodeDecision:
+        """Choose how a media file should be brought to the target format.
+
+        With sampling enabled, the expected size and time of a re-encode are
+        taken from sample encodes of the file. A re-encode projected to
+        reclaim less than ``min_savings_ratio`` of the source is skipped,
+        when a minimum is set.
+        """
+        if not self.smart_remux:
+            decision = TranscodeDecision(TranscodeAction.REENCODE, "smart remux disabled")
+        else:
+            decision = decide_action(media_file)
+        if decision.action is not TranscodeAction.REENCODE:
+            return decision
+
+        if self.sample_estimator is not None:
+            estimate = self.sample_estimator.estimate(
+                media_file, self.codec_args(TranscodeAction.REENCODE), self.threads
+            )
+            if estimate is not None:
+                decision = TranscodeDecision(
+                    decision.action,
+                    f"{decision.reason}; sized from {estimate.sampled_seconds:.0f}s of samples",
+                    estimate.output_bytes,
+                    estimate.encode_seconds,
+                    estimate.cpu_seconds
+                )
+
+        if self.min_savings_ratio is None:
+            return decision
+        ratio = decision.estimated_savings_ratio(media_file)
+        if ratio is not None and ratio < self.min_savings_ratio:
+            return TranscodeDecision(
+                TranscodeAction.SKIP,
+                f"projected savings of {ratio:.0%} are below the minimum of {self.min_savings_ratio:.0%}",
+                decision.estimated_output_bytes,
+                decision.estimated_encode_seconds,
+                decision.estimated_cpu_seconds
+            )
+        return decision
+
+    def cancel(self):
+        """Stop all running ffmpeg processes and refuse to start new ones."""
+        self._cancelled.set()
+        with self._processes_lock:
+            processes = list(self._processes)
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in list(self._async_processes):
+            if process.returncode is None:
+                try:
+                    process.terminate()
+                except ProcessLookupError:
+                    pass
+
+    def share_output(self, media_file: MediaFile, duplicate: MediaFile, dry_run: bool = False) -> bool:
+        """Give a duplicate of a transcoded file the same output, without transcoding it again.
+
+        The output is hardlinked next to the duplicate where the filesystem
+        allows it, and copied otherwise.
+        """
+        source = self.generate_output_filename(media_file.path)
+        target = self.generate_output_filename(duplicate.path)
+        if target.exists() and not self.overwrite:
+            logging.warning(f"Output file already exists and overwrite is disabled: {target}")
+            return False
+        if dry_run:
+            logging.info(f"Dry run enabled. Would share {source} with duplicate {duplicate.path}")
+            return False
+
+        staged = target.with_name(f"{target.name}.part")
+        staged.unlink(missing_ok=True)
+        try:
+            try:
+                os.link(source, staged)
+            except OSError:
+                shutil.copyfile(source, staged)
+            os.replace(staged, target)
+        except OSError as e:
+            staged.unlink(missing_ok=True)
+            logging.error(f"Could not share output {source} with duplicate {duplicate.path}: {e}")
+            return False
+
+        logging.info(f"Shared output of {media_file.path} with duplicate: {target}")
+        if self.journal is not None:
+            self.journal.mark_done(duplicate.path)
+        return True
+
+    def should_split(self, media_file: MediaFile) -> bool:
+        """Check whether a file is large enough to be encoded in parallel segments."""
+        return self.split_threshold_gb is not None and media_file.size_gb > self.split_threshold_gb
 
     @staticmethod
     def generate_output_filename(input_file: Path) -> Path:
         """Generate the output file name based on the input file."""
         return input_file.with_name(f"{input_file.stem}_transcoded.mkv")
 
-    def build_ffmpeg_command(self, input_file: Path, output_file: Path) -> List[str]:
+    @staticmethod
+    def is_output_file(file_path: Path) -> bool:
+        """Check whether a file is the output of a transcode rather than a source."""
+        return file_path.suffix == ".mkv" and file_path.stem.endswith("_transcoded")
+
+    def partial_output_filename(self, output_file: Path) -> Path:
+        """The temporary file an output is written to until its encode succeeds.
+
+        In a scratch directory the name is prefixed with a digest of the
+        output's location, so sources with the same name in different
+        directories cannot collide.
+        """
+        if self.scratch_dir is None:
+            return output_file.with_name(f"{output_file.name}.part")
+        digest = hashlib.sha1(str(output_file.resolve()).encode("utf-8")).hexdigest()[:12]
+        return Path(self.scratch_dir) / f"{digest}_{output_file.name}.part"
+
+    def build_ffmpeg_command(
+        self,
+        input_file: Path,
+        output_file: Path,
+        threads: Optional[int] = None,
+        action: TranscodeAction = TranscodeAction.REENCODE
+    ) -> List[str]:
         """Construct the FFmpeg command for transcoding."""
         overwrite_flag = ["-y"] if self.overwrite else ["-n"]
 
         return [
             "ffmpeg",
-            "-i", str(input_file),
-            "-c:v", "libx264",
-            "-preset", "medium",
-            "-crf", "23",
-            "-c:a", "aac",
-            "-b:a", "128k",
+            "-i", str(input_file)
+        ] + self.codec_args(action) + [
+            "-threads", str(threads or self.threads),
             "-f", "matroska"
         ] + overwrite_flag + [str(output_file)]
 
-    def _can_proceed_with_transcoding(self, output_file: Path, dry_run: bool) -> bool:
+    def codec_args(self, action: TranscodeAction) -> List[str]:
+        """Return the FFmpeg codec arguments that carry out an action."""
+        if action is TranscodeAction.REMUX:
+            return ["-c:v", "copy", "-c:a", "copy"]
+        if action is TranscodeAction.COPY_VIDEO:
+            return ["-c:v", "copy"] + self.AUDIO_CODEC_ARGS
+        return self.VIDEO_CODEC_ARGS + self.AUDIO_CODEC_ARGS
+
+    @staticmethod
+    def _log_decision(media_file: MediaFile, decision: TranscodeDecision):
+        """Log the chosen action for a file with its estimated savings and encode time."""
+        savings = decision.estimated_savings_bytes(media_file)
+        savings_text = "unknown" if savings is None else f"{savings / (1024 ** 3):.2f} GB"
+        ratio = decision.estimated_savings_ratio(media_file)
+        if ratio is not None and decision.action is not TranscodeAction.SKIP:
+            savings_text += f" ({ratio:.0%})"
+        if decision.estimated_encode_seconds is not None:
+            savings_text += f"; estimated encode time: {decision.estimated_encode_seconds / 60:.1f} min"
+        logging.info(
+            f"Plan for {media_file.path}: {decision.action.value} ({decision.reason}); "
+            f"estimated savings: {savings_text}"
+        )
+
+    def _prepare(self, media_file: MediaFile, dry_run: bool) -> Optional[Tuple[TranscodeDecision, Path, Path]]:
+        """Decide what to do with a file and clear the way for its output.
+
+        Returns:
+            Optional[Tuple[TranscodeDecision, Path, Path]]: The decision, the
+            partial file ffmpeg writes to and the final output, or None if
+            there is nothing to run.
+        """
+        output_file = self.generate_output_filename(media_file.path)
+        logging.info(f"Preparing to transcode: {media_file.path}")
+        logging.info(f"Output will be saved to: {output_file}")
+
+        with span("transcode.decide", file=media_file.path):
+            decision = self.decide(media_file)
+        self._log_decision(media_file, decision)
+        if decision.action is TranscodeAction.SKIP:
+            if self.journal is not None and not dry_run:
+                self.journal.mark_done(media_file.path)
+            return None
+
+        if not self._can_proceed_with_transcoding(media_file, output_file, dry_run):
+            return None
+
+        partial_file = self.partial_output_filename(output_file)
+        partial_file.unlink(missing_ok=True)
+        return decision, partial_file, output_file
+
+    def _can_proceed_with_transcoding(self, media_file: MediaFile, output_file: Path, dry_run: bool) -> bool:
         """Determine if transcoding can proceed based on conditions."""
         if output_file.exists() and not self.overwrite:
             logging.warning(f"Output file already exists and overwrite is disabled: {output_file}")
+            if self.journal is not None and not dry_run:
+                self.journal.mark_done(media_file.path)
             return False
 
         if dry_run:
@@ -56,15 +354,360 @@ class Transcoder(ITranscoder):
 
         return True
 
-    @staticmethod
-    def _execute_transcoding(command: List[str], media_file: MediaFile, output_file: Path) -> bool:
+    def _execute_transcoding(
+        self,
+        command: List[str],
+        media_file: MediaFile,
+        partial_file: Path,
+        output_file: Path,
+        action: TranscodeAction = TranscodeAction.REENCODE
+    ) -> bool:
         """Execute the FFmpeg command and handle the process output."""
+        if self._cancelled.is_set():
+            logging.warning(f"Transcoding cancelled before it started: {media_file.path}")
+            return False
+
+        if self.journal is not None:
+            self.journal.mark_running(media_file.path)
+        logging.info(f"Executing FFmpeg command: {' '.join(command)}")
+
+        with span("transcode.execute", file=media_file.path), self._io_slots(media_file.path, partial_file):
+            started = time.monotonic()
+            try:
+                result = self._run_ffmpeg(
+                    command, self._progress_parser(media_file), log_path=self._log_path(media_file)
+                )
+            except OSError as e:
+                logging.error(f"Could not start FFmpeg for {media_file.path}: {e}")
+                result = FFmpegResult(1, str(e))
+        return self._handle_result(result, media_file, partial_file, output_file, action, time.monotonic() - started)
+
+    async def _execute_transcoding_async(
+        self,
+        command: List[str],
+        media_file: MediaFile,
+        partial_file: Path,
+        output_file: Path,
+        action: TranscodeAction,
+        timeout: Optional[float]
+    ) -> bool:
+        """Execute the FFmpeg command as an asyncio subprocess and handle the outcome."""
+        if self._cancelled.is_set():
+            logging.warning(f"Transcoding cancelled before it started: {media_file.path}")
+            return False
+
+        if self.journal is not None:
+            self.journal.mark_running(media_file.path)
         logging.info(f"Executing FFmpeg command: {' '.join(command)}")
 
         try:
-            subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            logging.info(f"Successfully transcoded: {output_file}")
-            return True
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Transcoding failed for {media_file.path}: {e.stderr}")
-            return False
\ No newline at end of file
+            async with self._io_slots_async(media_file.path, partial_file):
+                started = time.monotonic()
+                try:
+                    result = await self._run_ffmpeg_async(
+                        command, self._progress_parser(media_file), self._log_path(media_file), timeout
+                    )
+                except OSError as e:
+                    logging.error(f"Could not start FFmpeg for {media_file.path}: {e}")
+                    result = FFmpegResult(1, str(e))
+        except asyncio.CancelledError:
+            logging.warning(f"Transcoding cancelled for {media_file.path}; removing partial output")
+            partial_file.unlink(missing_ok=True)
+            if self.journal is not None:
+                self.journal.requeue(media_file.path)
+            raise
+        if self.verifier is not None:
+            # Verification runs ffmpeg synchronously, so keep it off the event loop
+            return await asyncio.get_running_loop().run_in_executor(None, partial(
+                self._handle_result, result, media_file, partial_file, output_file, action, time.monotonic() - started
+            ))
+        return self._handle_result(result, media_file, partial_file, output_file, action, time.monotonic() - started)
+
+    def _progress_parser(self, media_file: MediaFile) -> Optional[ProgressParser]:
+        """A parser feeding a job's progress to the listeners, if any are registered."""
+        if not self._progress_listeners:
+            return None
+        return ProgressParser(media_file.path, media_file.duration, self._progress_listeners)
+
+    def _execute_segmented(self, media_file: MediaFile, partial_file: Path, output_file: Path, threads: int) -> bool:
+        """Encode a large file in parallel segments and handle the outcome."""
+        if self._cancelled.is_set():
+            logging.warning(f"Transcoding cancelled before it started: {media_file.path}")
+            return False
+
+        if self.journal is not None:
+            self.journal.mark_running(media_file.path)
+
+        logging.info(f"Encoding {media_file.path} in segments of {self.segment_encoder.segment_seconds}s")
+        overwrite_flag = ["-y"] if self.overwrite else ["-n"]
+
+        encoder = self.segment_encoder
+        log_path = self._log_path(media_file)
+        if log_path is not None:
+            encoder = SegmentEncoder(
+                partial(self._run_ffmpeg, log_path=log_path), encoder.segment_seconds, encoder.max_workers
+            )
+
+        with span("transcode.execute", file=media_file.path), self._io_slots(media_file.path, partial_file):
+            started = time.monotonic()
+            try:
+                result = encoder.encode(
+                    media_file.path, partial_file, self.VIDEO_CODEC_ARGS, self.AUDIO_CODEC_ARGS, threads, overwrite_flag
+                )
+            except OSError as e:
+                logging.error(f"Could not run segmented encode for {media_file.path}: {e}")
+                result = FFmpegResult(1, str(e))
+        return self._handle_result(
+            result, media_file, partial_file, output_file, TranscodeAction.REENCODE, time.monotonic() - started
+        )
+
+    def _io_slots(self, source: Path, partial_file: Path):
+        """Hold the device slots for reading a source and writing its partial output."""
+        if self.device_limiter is None:
+            return nullcontext()
+        return self.device_limiter.hold(reads=[source], writes=[partial_file.parent])
+
+    def _io_slots_async(self, source: Path, partial_file: Path):
+        """Await the device slots for reading a source and writing its partial output."""
+        if self.device_limiter is None:
+            return nullcontext()
+        return self.device_limiter.hold_async(reads=[source], writes=[partial_file.parent])
+
+    def _publish(self, partial_file: Path, output_file: Path):
+        """Move a finished output into place, copying it over when it was written on another device.
+
+        A copy lands in a ``.part`` file next to the output first, so the
+        output still only ever appears complete.
+        """
+        try:
+            os.replace(partial_file, output_file)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        staged = output_file.with_name(f"{output_file.name}.part")
+        slots = nullcontext() if self.device_limiter is None else \
+            self.device_limiter.hold(reads=[partial_file], writes=[output_file.parent])
+        with slots:
+            logging.info(f"Copying finished output from the scratch directory to {output_file}")
+            try:
+                shutil.copyfile(partial_file, staged)
+                os.replace(staged, output_file)
+            except OSError:
+                staged.unlink(missing_ok=True)
+                raise
+        partial_file.unlink()
+
+    def _log_path(self, media_file: MediaFile) -> Optional[Path]:
+        """The file a job's complete ffmpeg output is spilled to, if logging is enabled.
+
+        The name carries a digest of the source's location, so sources with
+        the same name in different directories get logs of their own.
+        """
+        if self.ffmpeg_log_dir is None:
+            return None
+        digest = hashlib.sha1(str(media_file.path.resolve()).encode("utf-8")).hexdigest()[:12]
+        return Path(self.ffmpeg_log_dir) / f"{media_file.path.stem}_{digest}.ffmpeg.log"
+
+    def _run_ffmpeg(
+        self,
+        command: List[str],
+        progress: Optional[ProgressParser] = None,
+        log_path: Optional[Path] = None
+    ) -> FFmpegResult:
+        """Run an FFmpeg command as a cancellable child process.
+
+        With a progress parser, ffmpeg is asked to report ``-progress`` on
+        stdout, which is parsed line by line while the process runs. Only
+        the last ``stderr_tail_lines`` lines of stderr are kept in memory;
+        with a ``log_path`` the complete output is appended to that file.
+        """
+        if self._cancelled.is_set():
+            return FFmpegResult(1, "Cancelled")
+        if progress is not None:
+            command = [command[0], "-progress", "pipe:1", "-nostats"] + command[1:]
+
+        started_ns = time.perf_counter_ns()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with self._processes_lock:
+            self._processes.add(process)
+        stderr_tail = OutputTail(self.stderr_tail_lines, log_path)
+        try:
+            stderr_reader = threading.Thread(target=stderr_tail.consume, args=(process.stderr,), daemon=True)
+            stderr_reader.start()
+            for line in process.stdout:
+                if progress is not None:
+                    progress.feed(line.decode("utf-8", errors="replace"))
+            stderr_reader.join()
+            cpu_seconds = wait_for_exit(process)
+        finally:
+            with self._processes_lock:
+                self._processes.discard(process)
+            record("transcode.ffmpeg", started_ns, time.perf_counter_ns(), output=command[-1])
+        return FFmpegResult(process.returncode, stderr_tail.text(), cpu_seconds)
+
+    async def _run_ffmpeg_async(
+        self,
+        command: List[str],
+        progress: Optional[ProgressParser] = None,
+        log_path: Optional[Path] = None,
+        timeout: Optional[float] = None
+    ) -> FFmpegResult:
+        """Run an FFmpeg command as an asyncio subprocess, stopping it on timeout or cancellation.
+
+        Output is handled as in ``_run_ffmpeg``. The CPU time of the process
+        is not collected, since asyncio reaps its children itself.
+        """
+        if self._cancelled.is_set():
+            return FFmpegResult(1, "Cancelled")
+        if progress is not None:
+            command = [command[0], "-progress", "pipe:1", "-nostats"] + command[1:]
+
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        self._async_processes.add(process)
+        stderr_tail = OutputTail(self.stderr_tail_lines, log_path)
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    stderr_tail.consume_async(process.stderr),
+                    self._feed_progress(process.stdout, progress),
+                    process.wait()
+                ),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            await stop_process(process)
+            return FFmpegResult(1, f"Timed out after {timeout}s\n{stderr_tail.text()}")
+        except asyncio.CancelledError:
+            await stop_process(process)
+            raise
+        finally:
+            self._async_processes.discard(process)
+        return FFmpegResult(process.returncode, stderr_tail.text())
+
+    @staticmethod
+    async def _feed_progress(stream: asyncio.StreamReader, progress: Optional[ProgressParser]):
+        """Read ffmpeg's stdout to EOF, passing ``-progress`` lines to the parser."""
+        async for line in stream:
+            if progress is not None:
+                progress.feed(line.decode("utf-8", errors="replace"))
+
+    def _handle_result(
+        self,
+        result: FFmpegResult,
+        media_file: MediaFile,
+        partial_file: Path,
+        output_file: Path,
+        action: TranscodeAction,
+        wall_seconds: float
+    ) -> bool:
+        """Verify and publish or discard the output of a transcode, then log and record the outcome."""
+        verification = None
+        if self._cancelled.is_set():
+            logging.warning(f"Transcoding cancelled for {media_file.path}; removing partial output")
+            success = False
+        elif result.returncode != 0:
+            log_path = self._log_path(media_file)
+            full_log = f" (full log: {log_path})" if log_path is not None else ""
+            logging.error(f"Transcoding failed for {media_file.path}{full_log}: {result.stderr}")
+            success = False
+        else:
+            verification = self._verify(media_file, partial_file, output_file, action)
+            if verification is not None and not verification.passed and self.reject_unverified:
+                result = FFmpegResult(1, f"Verification failed: {'; '.join(verification.problems)}", result.cpu_seconds)
+                success = False
+            else:
+                try:
+                    with span("transcode.publish", file=output_file):
+                        self._publish(partial_file, output_file)
+                    logging.info(f"Successfully transcoded: {output_file}")
+                    success = True
+                except OSError as e:
+                    logging.error(f"Could not move finished output into place for {media_file.path}: {e}")
+                    result = FFmpegResult(1, str(e), result.cpu_seconds)
+                    success = False
+        if not success:
+            partial_file.unlink(missing_ok=True)
+
+        self._update_journal(media_file, success, result)
+        self._record_metrics(media_file, output_file, action, success, wall_seconds, result.cpu_seconds, verification)
+        return success
+
+    def _verify(
+        self,
+        media_file: MediaFile,
+        partial_file: Path,
+        output_file: Path,
+        action: TranscodeAction
+    ) -> Optional[VerificationResult]:
+        """Check a finished output against its source and count the outcome, if verification is enabled."""
+        if self.verifier is None:
+            return None
+        with span("transcode.verify", file=media_file.path):
+            verification = self.verifier.verify(
+                media_file, partial_file, compare_quality=action is TranscodeAction.REENCODE
+            )
+
+        scores = ""
+        if verification.ssim is not None:
+            scores = f" (SSIM {verification.ssim:.4f}, PSNR {verification.psnr:.2f} dB)"
+        if verification.passed:
+            outcome = "passed"
+            logging.info(f"Verified {output_file}{scores}")
+        elif self.reject_unverified:
+            outcome = "rejected"
+            logging.error(f"Rejecting {output_file}{scores}: {'; '.join(verification.problems)}")
+        else:
+            outcome = "flagged"
+            logging.warning(f"Flagging {output_file} for review{scores}: {'; '.join(verification.problems)}")
+        with self._verification_lock:
+            self.verification_counts[outcome] += 1
+        return verification
+
+    def _update_journal(self, media_file: MediaFile, success: bool, result: FFmpegResult):
+        """Record a finished attempt in the job journal, if one is configured.
+
+        A cancelled job is returned to the queue rather than marked failed,
+        so a resumed run picks it up again.
+        """
+        if self.journal is None:
+            return
+        if success:
+            self.journal.mark_done(media_file.path)
+        elif self._cancelled.is_set():
+            self.journal.requeue(media_file.path)
+        else:
+            error = result.stderr.strip().splitlines()
+            self.journal.mark_failed(media_file.path, error[-1] if error else None)
+
+    def _record_metrics(
+        self,
+        media_file: MediaFile,
+        output_file: Path,
+        action: TranscodeAction,
+        success: bool,
+        wall_seconds: float,
+        cpu_seconds: Optional[float],
+        verification: Optional[VerificationResult] = None
+    ):
+        """Export the resource usage and verification outcome of a finished job, if metrics are enabled."""
+        if self.metrics is None:
+            return
+        output_bytes = output_file.stat().st_size if success and output_file.exists() else None
+        input_bytes = media_file.size_bytes
+        self.metrics.record(JobMetrics(
+            path=str(media_file.path),
+            output_path=str(output_file),
+            action=action.value,
+            success=success,
+            wall_seconds=round(wall_seconds, 3),
+            cpu_seconds=None if cpu_seconds is None else round(cpu_seconds, 3),
+            input_bytes=input_bytes,
+            output_bytes=output_bytes,
+            compression_ratio=round(output_bytes / input_bytes, 4) if output_bytes and input_bytes else None,
+            verified=None if verification is None else verification.passed,
+            ssim=None if verification is None else verification.ssim,
+            psnr=None if verification is None else verification.psnr
+        ))
@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import AsyncIterator, List
+from src.core.media_file import MediaFile
+
+class IAsyncMediaScanner(ABC):
+    """Interface for a Media Scanner that runs on an asyncio event loop.
+
+    Scans find and filter the same files as the synchronous scanner, with
+    these differences:
+
+    - The directory is walked to completion in a worker thread before the
+      first file is probed, rather than probing while the walk goes on.
+    - When probing on scan, every field of a file is probed up front by a
+      single ffprobe, so reading one afterwards never blocks the event loop.
+      The synchronous scan only resolves the format, from the file header
+      where it can be recognized, and leaves ffprobe for later field reads.
+    - The header is only read for the format when ffprobe fails.
+    """
+
+    @abstractmethod
+    async def scan_file_async(self, file_path: Path) -> MediaFile:
+        """Scan a single media file and return its metadata."""
+        pass
+
+    @abstractmethod
+    async def scan_directory_async(self, directory: Path) -> List[MediaFile]:
+        """Scan a directory for media files and return a list of their metadata."""
+        pass
+
+    @abstractmethod
+    def iter_directory_async(self, directory: Path) -> AsyncIterator[MediaFile]:
+        """Scan a directory for media files, yielding their metadata as each is found."""
+        pass
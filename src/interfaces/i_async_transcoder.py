@@ -0,0 +1,71 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+from src.core.media_file import MediaFile
+
+class IAsyncTranscoder(ABC):
+    """Interface for a Transcoder that runs on an asyncio event loop.
+
+    Jobs are prepared, decided, journaled, verified and published as by the
+    synchronous transcoder, with these differences:
+
+    - Files above the split threshold are encoded by a single ffmpeg
+      process instead of in parallel segments.
+    - Concurrent encodes are bounded per event loop by the transcoder's own
+      job limit, not by a scheduler's thread budget.
+    - An encode can be given a timeout, and cancelling the awaiting task
+      stops it and returns the job to the journal's queue.
+    - Sample encodes and output verification run synchronously in a worker
+      thread.
+    """
+
+    @abstractmethod
+    async def transcode_async(
+        self,
+        media_file: MediaFile,
+        dry_run: bool = False,
+        threads: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """Transcode a media file into a standardized format.
+
+        Cancelling the awaiting task stops the ffmpeg process and discards
+        its partial output.
+
+        Args:
+            media_file (MediaFile): The media file to transcode.
+            dry_run (bool): If True, simulate the transcoding process without performing it.
+            threads (Optional[int]): CPU threads for this job, overriding the configured default.
+            timeout (Optional[float]): Seconds after which the encode is stopped and reported as failed.
+
+        Returns:
+            bool: True if the transcoding was successful, False otherwise.
+        """
+        pass
+
+    @abstractmethod
+    def generate_output_filename(self, input_file: Path) -> Path:
+        """Generate the output file name based on the input file.
+
+        Args:
+            input_file (Path): The input file for which to generate the output filename.
+
+        Returns:
+            Path: The generated output file name.
+        """
+        pass
+
+    @abstractmethod
+    def add_progress_listener(self, listener):
+        """Register a callback for live transcode progress.
+
+        Args:
+            listener (Callable[[TranscodeProgress], None]): Called with a snapshot of
+                fps, speed, output time, bitrate and ETA each time ffmpeg reports progress.
+        """
+        pass
+
+    @abstractmethod
+    def cancel(self):
+        """Stop all running transcodes and refuse to start new ones."""
+        pass
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 from src.core.media_file import MediaFile
 
 class IMediaScanner(ABC):
@@ -14,4 +14,9 @@ class IMediaScanner(ABC):
     @abstractmethod
     def scan_directory(self, directory: Path) -> List[MediaFile]:
         """Scan a directory for media files and return a list of their metadata."""
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def iter_directory(self, directory: Path) -> Iterator[MediaFile]:
+        """Scan a directory for media files, yielding their metadata as each is found."""
+        pass
@@ -1,17 +1,19 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Optional
 from src.core.media_file import MediaFile
 
 class ITranscoder(ABC):
     """Interface for a Transcoder."""
 
     @abstractmethod
-    def transcode(self, media_file: MediaFile, dry_run: bool = False) -> bool:
+    def transcode(self, media_file: MediaFile, dry_run: bool = False, threads: Optional[int] = None) -> bool:
         """Transcode a media file into a standardized format.
 
         Args:
             media_file (MediaFile): The media file to transcode.
             dry_run (bool): If True, simulate the transcoding process without performing it.
+            threads (Optional[int]): CPU threads for this job, overriding the configured default.
 
         Returns:
             bool: True if the transcoding was successful, False otherwise.
@@ -31,12 +33,28 @@ class ITranscoder(ABC):
         pass
 
     @abstractmethod
-    def build_ffmpeg_command(self, input_file: Path, output_file: Path) -> list:
+    def add_progress_listener(self, listener):
+        """Register a callback for live transcode progress.
+
+        Args:
+            listener (Callable[[TranscodeProgress], None]): Called with a snapshot of
+                fps, speed, output time, bitrate and ETA each time ffmpeg reports progress.
+        """
+        pass
+
+    @abstractmethod
+    def cancel(self):
+        """Stop all running transcodes and refuse to start new ones."""
+        pass
+
+    @abstractmethod
+    def build_ffmpeg_command(self, input_file: Path, output_file: Path, threads: Optional[int] = None) -> list:
         """Construct the FFmpeg command for transcoding.
 
         Args:
             input_file (Path): The input media file.
             output_file (Path): The output media file.
+            threads (Optional[int]): CPU threads for the encode, overriding the configured default.
 
         Returns:
             list: The FFmpeg command as a list of arguments.
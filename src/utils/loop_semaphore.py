@@ -0,0 +1,34 @@
+import asyncio
+import threading
+import weakref
+
+class LoopSemaphore:
+    """Bounds concurrency like an ``asyncio.Semaphore``, separately on each event loop that uses it.
+
+    An ``asyncio.Semaphore`` belongs to the first loop that waits on it, so
+    an object holding one breaks when it is reused from a second
+    ``asyncio.run``. This keeps one semaphore per running loop instead,
+    dropped with the loop.
+    """
+
+    def __init__(self, value: int):
+        if value < 1:
+            raise ValueError(f"value must be at least 1, got {value}")
+        self.value = value
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def current(self) -> asyncio.Semaphore:
+        """The semaphore of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.value)
+            return semaphore
+
+    async def __aenter__(self):
+        await self.current().acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.current().release()
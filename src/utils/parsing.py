@@ -0,0 +1,15 @@
+from typing import Optional
+
+def to_int(value) -> Optional[int]:
+    """Convert a value reported by ffmpeg or ffprobe to an int, or None if it is missing or malformed."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def to_float(value) -> Optional[float]:
+    """Convert a value reported by ffmpeg or ffprobe to a float, or None if it is missing or malformed."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
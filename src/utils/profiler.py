@@ -0,0 +1,156 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Returned by ``span`` while profiling is off; a nullcontext can be entered any number of times
+_DISABLED = nullcontext()
+
+# The profiler spans are recorded to, or None while profiling is off
+_active: Optional["Profiler"] = None
+
+def span(name: str, **args):
+    """Time a block as a span of the active profiler, or do nothing while profiling is off.
+
+    Disabled, this is one global lookup returning a shared no-op context
+    manager, so it can stay in hot paths.
+    """
+    profiler = _active
+    if profiler is None:
+        return _DISABLED
+    return profiler.span(name, args)
+
+def record(name: str, start_ns: int, end_ns: int, **args):
+    """Record a span whose start and end were measured elsewhere with ``time.perf_counter_ns``."""
+    profiler = _active
+    if profiler is not None:
+        profiler.record(name, start_ns, end_ns, args)
+
+def enable(profiler: "Profiler"):
+    """Make a profiler the one spans are recorded to."""
+    global _active
+    _active = profiler
+
+def disable():
+    """Stop recording spans."""
+    global _active
+    _active = None
+
+def is_enabled() -> bool:
+    """Check whether spans are being recorded."""
+    return _active is not None
+
+@dataclass
+class PhaseStats:
+    """Aggregated durations of every span of one phase."""
+    count: int = 0
+    total_ns: int = 0
+    max_ns: int = 0
+    durations: List[int] = field(default_factory=list, repr=False)
+
+    def percentile(self, fraction: float) -> int:
+        ordered = sorted(self.durations)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0
+
+    def histogram(self) -> Dict[str, int]:
+        """Span counts in power-of-ten buckets from microseconds upwards."""
+        buckets = defaultdict(int)
+        for duration in self.durations:
+            buckets[int(math.log10(max(duration, 1000) / 1000))] += 1
+        return {f"<{_format_ns(10000 * 10 ** exponent)}": buckets[exponent] for exponent in sorted(buckets)}
+
+class Profiler:
+    """Collects timing spans of the phases of a run from every thread.
+
+    Spans are exported as Chrome trace-event JSON, which can be opened in
+    ``chrome://tracing`` or Perfetto, and aggregated into a per-phase
+    summary of counts, totals and percentiles.
+    """
+
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+        self._thread_names: Dict[int, str] = {}
+
+    @contextmanager
+    def span(self, name: str, args: Optional[Dict[str, Any]] = None):
+        """Time the enclosed block as a span."""
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start_ns, time.perf_counter_ns(), args)
+
+    def record(self, name: str, start_ns: int, end_ns: int, args: Optional[Dict[str, Any]] = None):
+        """Record a finished span."""
+        thread = threading.current_thread()
+        with self._lock:
+            self._thread_names.setdefault(thread.ident, thread.name)
+            self._spans.append((name, start_ns, end_ns, thread.ident, args))
+
+    def phases(self) -> Dict[str, PhaseStats]:
+        """Every recorded span aggregated by name."""
+        stats = defaultdict(PhaseStats)
+        with self._lock:
+            spans = list(self._spans)
+        for name, start_ns, end_ns, _, _ in spans:
+            phase = stats[name]
+            duration = end_ns - start_ns
+            phase.count += 1
+            phase.total_ns += duration
+            phase.max_ns = max(phase.max_ns, duration)
+            phase.durations.append(duration)
+        return dict(stats)
+
+    def summary(self) -> str:
+        """A table of every phase with its span count, total, percentiles and duration histogram."""
+        lines = [f"{'phase':<22}{'count':>8}{'total':>11}{'p50':>11}{'p95':>11}{'max':>11}  histogram"]
+        phases = sorted(self.phases().items(), key=lambda item: item[1].total_ns, reverse=True)
+        for name, phase in phases:
+            histogram = " ".join(f"{bucket}:{count}" for bucket, count in phase.histogram().items())
+            lines.append(
+                f"{name:<22}{phase.count:>8}{_format_ns(phase.total_ns):>11}{_format_ns(phase.percentile(0.5)):>11}"
+                f"{_format_ns(phase.percentile(0.95)):>11}{_format_ns(phase.max_ns):>11}  {histogram}"
+            )
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path: Path):
+        """Write every span as a complete ("X") event of the Chrome trace-event format."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self._spans)
+            thread_names = dict(self._thread_names)
+        origin = min((start_ns for _, start_ns, _, _, _ in spans), default=0)
+
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        for name, start_ns, end_ns, tid, args in spans:
+            event = {
+                "name": name,
+                "cat": name.split(".")[0],
+                "ph": "X",
+                "ts": (start_ns - origin) / 1000,
+                "dur": (end_ns - start_ns) / 1000,
+                "pid": pid,
+                "tid": tid
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            events.append(event)
+
+        Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+def _format_ns(duration_ns: int) -> str:
+    """Format a duration in the largest unit that keeps it above one."""
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if duration_ns >= scale:
+            return f"{duration_ns / scale:.3g}{unit}"
+    return f"{duration_ns}ns"
@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+from pathlib import Path
+from benchmarks.fixtures import MediaSpec, build_media_command, make_small_file_tree
+from benchmarks.suite import BenchmarkSuite, compare
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare_flags_regressions_in_either_direction(self):
+        """Test rates that drop and durations that grow beyond the tolerance are reported."""
+        baseline = {
+            "walk_rate": {"value": 1000.0, "unit": "files/s", "higher_is_better": True},
+            "scan_seconds": {"value": 10.0, "unit": "s", "higher_is_better": False},
+            "probe_rate": {"value": 50.0, "unit": "files/s", "higher_is_better": True}
+        }
+        results = {
+            "walk_rate": {"value": 800.0, "unit": "files/s", "higher_is_better": True},
+            "scan_seconds": {"value": 12.5, "unit": "s", "higher_is_better": False},
+            "probe_rate": {"value": 45.0, "unit": "files/s", "higher_is_better": True},
+            "encode_fps_medium": {"value": 30.0, "unit": "fps", "higher_is_better": True}
+        }
+
+        regressions = compare(results, baseline, tolerance=0.15)
+
+        self.assertEqual([r.split(":")[0] for r in regressions], ["walk_rate", "scan_seconds"])
+
+    def test_small_file_tree_is_deterministic(self):
+        """Test the same seed produces the same names and sizes."""
+        trees = []
+        for _ in range(2):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                root = Path(tmp_dir)
+                media_files = make_small_file_tree(root, directories=5, files_per_directory=10, seed=7)
+                listing = sorted((p.relative_to(root).as_posix(), p.stat().st_size) for p in root.rglob("*.*"))
+                trees.append((media_files, listing))
+        self.assertEqual(trees[0], trees[1])
+        self.assertEqual(len(trees[0][1]), 50)
+
+    def test_media_command_uses_lavfi_sources(self):
+        """Test fixtures are rendered from the testsrc and sine sources with the requested codecs."""
+        spec = MediaSpec("clip.ts", "mpeg2video", 720, 576, 10.0, container="mpegts")
+        command = build_media_command(spec, Path("/tmp/clip.ts"))
+        self.assertIn("testsrc=size=720x576:rate=25:duration=10.0", command)
+        self.assertEqual(command[command.index("-c:v") + 1], "mpeg2video")
+        self.assertEqual(command[-1], "/tmp/clip.ts")
+
+    def test_quick_walk_benchmark(self):
+        """Test the filesystem-only benchmarks run and report positive rates."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            measurements = BenchmarkSuite(Path(tmp_dir), quick=True).run(["walk", "scheduler_overhead"])
+        self.assertEqual([m.name for m in measurements], ["walk_rate", "scheduler_overhead"])
+        self.assertTrue(all(m.value > 0 for m in measurements))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,15 @@
+import argparse
+import json
+import tempfile
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
 from pathlib import Path
-from src.cli import CLI
-from src.core.media_file import MediaFile
+from src.cli import CLI, parse_address, parse_duration, parse_size
+from src.core.duplicate_finder import DuplicateGroup
+from src.core.media_file import MediaFile, StreamInfo
+from src.core.transcode_decision import decide_action
+from src.utils import profiler
 
 class TestCLI(unittest.TestCase):
     def setUp(self):
@@ -10,10 +17,66 @@ class TestCLI(unittest.TestCase):
         self.mock_args = {
             "path": "test_directory",
             "threads": 4,
+            "jobs": 1,
+            "thread_budget": None,
             "overwrite": True,
             "dry_run": False,
-            "size_threshold": 6.0
+            "size_threshold": 6.0,
+            "prioritize": False,
+            "max_runtime": None,
+            "max_output_bytes": None,
+            "progress": False,
+            "metrics_file": None,
+            "ffmpeg_log_dir": None,
+            "scratch_dir": None,
+            "max_reads_per_device": None,
+            "max_writes_per_device": None,
+            "always_reencode": False,
+            "split_threshold": 40.0,
+            "no_split": False,
+            "segment_seconds": 300.0,
+            "segment_workers": 4,
+            "probe_workers": 4,
+            "probe_timeout": 30.0,
+            "cache_path": Path("/tmp/probe_cache.sqlite3"),
+            "no_cache": True,
+            "rebuild_cache": False,
+            "stream": False,
+            "exclude": [],
+            "prune_dir": [],
+            "max_depth": None,
+            "symlinks": "files",
+            "watch": False,
+            "settle_seconds": 10.0,
+            "poll_interval": 30.0,
+            "force_polling": False,
+            "journal_path": Path("/tmp/jobs.sqlite3"),
+            "no_journal": True,
+            "resume": False,
+            "max_attempts": 3,
+            "sample_estimate": False,
+            "sample_count": 3,
+            "sample_seconds": 10.0,
+            "min_savings_ratio": None,
+            "dedupe": False,
+            "dedupe_full_hash": False,
+            "profile": False,
+            "trace": None,
+            "cprofile": None,
+            "verify": False,
+            "verify_samples": 3,
+            "verify_sample_seconds": 5.0,
+            "min_ssim": 0.95,
+            "min_psnr": None,
+            "reject_unverified": False,
+            "serve": None,
+            "worker": None,
+            "lease_seconds": 60.0,
+            "list_only": False
         }
+        exists_patcher = patch("src.cli.Path.exists", return_value=True)
+        exists_patcher.start()
+        self.addCleanup(exists_patcher.stop)
 
     @patch("argparse.ArgumentParser.parse_args")
     @patch("src.cli.MediaScanner")
@@ -23,12 +86,31 @@ class TestCLI(unittest.TestCase):
         mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
         mock_scanner = mock_media_scanner.return_value
         mock_scanner.scan_directory.return_value = []
+        mock_scanner.filtered_count = 0
 
         cli = CLI()
         with patch("builtins.print") as mock_print:
             cli.run()
             mock_print.assert_called_with("No media files found in the specified directory.")
 
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.Transcoder")
+    def test_all_files_below_threshold_message(self, mock_transcoder, mock_parse_args):
+        """Test a library whose files are all below the size threshold is not reported as empty."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            (Path(tmp_dir) / "small.mp4").write_bytes(b"\x00" * 1024)
+            for stream in (False, True):
+                self.mock_args.update(path=tmp_dir, dry_run=True, stream=stream)
+                mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+
+                cli = CLI()
+                with patch("builtins.print") as mock_print, self.assertLogs(level="INFO") as logs:
+                    cli.run()
+
+                mock_print.assert_not_called()
+                self.assertIn("No media files exceed the size threshold.", "\n".join(logs.output))
+        mock_transcoder.return_value.transcode.assert_not_called()
+
     @patch("argparse.ArgumentParser.parse_args")
     @patch("src.cli.MediaScanner")
     @patch("src.cli.Transcoder")
@@ -65,7 +147,8 @@ class TestCLI(unittest.TestCase):
 
         mock_transcoder_instance.transcode.assert_any_call(
             MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4"),
-            dry_run=False
+            dry_run=False,
+            threads=4
         )
 
     @patch("argparse.ArgumentParser.parse_args")
@@ -86,7 +169,8 @@ class TestCLI(unittest.TestCase):
 
         mock_transcoder_instance.transcode.assert_any_call(
             MediaFile(path=Path("/test/file2.mkv"), size_gb=8.0, format="mkv"),
-            dry_run=False
+            dry_run=False,
+            threads=4
         )
 
     @patch("argparse.ArgumentParser.parse_args")
@@ -107,8 +191,323 @@ class TestCLI(unittest.TestCase):
 
         mock_transcoder_instance.transcode.assert_called_once_with(
             MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4"),
-            dry_run=True
+            dry_run=True,
+            threads=4
         )
 
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.ProbeCache")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_rebuild_cache(self, mock_transcoder, mock_media_scanner, mock_probe_cache, mock_parse_args):
+        """Test CLI clears the probe cache when asked to rebuild it."""
+        self.mock_args.update(no_cache=False, rebuild_cache=True)
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        mock_media_scanner.return_value.scan_directory.return_value = []
+
+        cli = CLI()
+        cli.run()
+
+        mock_probe_cache.return_value.clear.assert_called_once()
+        mock_probe_cache.return_value.close.assert_called_once()
+        self.assertEqual(mock_media_scanner.call_args.kwargs["cache"], mock_probe_cache.return_value)
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.JobJournal")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_journal_queues_eligible_files(self, mock_transcoder, mock_media_scanner, mock_journal, mock_parse_args):
+        """Test eligible files are queued in the journal before transcoding starts."""
+        self.mock_args["no_journal"] = False
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        mock_media_scanner.return_value.scan_directory.return_value = [
+            MediaFile(path=Path("/test/small.mp4"), size_gb=1.0, format="mp4"),
+            MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4")
+        ]
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        mock_journal.return_value.enqueue.assert_called_once_with(Path("/test/file1.mp4"))
+        self.assertEqual(mock_transcoder.call_args.kwargs["journal"], mock_journal.return_value)
+        mock_journal.return_value.close.assert_called_once()
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.JobCoordinator")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_serve_hands_jobs_to_coordinator(self, mock_transcoder, mock_media_scanner, mock_coordinator, mock_parse_args):
+        """Test --serve queues eligible files on the coordinator instead of transcoding them here."""
+        self.mock_args["serve"] = ("0.0.0.0", 8765)
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        media = MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4")
+        mock_media_scanner.return_value.scan_directory.return_value = [media]
+        mock_coordinator.return_value.run.return_value = {media.path: True}
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        self.assertEqual(mock_coordinator.call_args.args, ("0.0.0.0", 8765))
+        mock_coordinator.return_value.start.assert_called_once()
+        mock_coordinator.return_value.run.assert_called_once_with([media], dry_run=False)
+        mock_coordinator.return_value.close.assert_called_once()
+        mock_transcoder.return_value.transcode.assert_not_called()
+
+    def test_parse_address(self):
+        """Test listening addresses accept a bare port or a host and port."""
+        self.assertEqual(parse_address("8765"), ("0.0.0.0", 8765))
+        self.assertEqual(parse_address("127.0.0.1:9000"), ("127.0.0.1", 9000))
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_address("localhost:http")
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.DuplicateFinder")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_dedupe_transcodes_each_group_once(self, mock_transcoder, mock_media_scanner, mock_finder, mock_parse_args):
+        """Test only the primary of a duplicate group is transcoded and its output is shared with the copies."""
+        self.mock_args["dedupe"] = True
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        original = MediaFile(path=Path("/test/a/movie.ts"), size_gb=20.0, format="mpegts")
+        copy = MediaFile(path=Path("/test/b/movie.ts"), size_gb=20.0, format="mpegts")
+        other = MediaFile(path=Path("/test/other.ts"), size_gb=8.0, format="mpegts")
+        mock_media_scanner.return_value.scan_directory.return_value = [original, copy, other]
+        mock_finder.return_value.group.return_value = [DuplicateGroup(original, [copy]), DuplicateGroup(other)]
+        mock_transcoder.return_value.transcode.return_value = True
+        mock_transcoder.return_value.share_output.return_value = True
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        transcoded = [c.args[0] for c in mock_transcoder.return_value.transcode.call_args_list]
+        self.assertEqual(transcoded, [original, other])
+        mock_transcoder.return_value.share_output.assert_called_once_with(original, copy, dry_run=False)
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.Path.is_file", return_value=True)
+    @patch("src.cli.JobJournal")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_resume_transcodes_unfinished_jobs(
+        self, mock_transcoder, mock_media_scanner, mock_journal, _mock_is_file, mock_parse_args
+    ):
+        """Test resume mode transcodes the journal's unfinished jobs without rescanning."""
+        self.mock_args.update(no_journal=False, resume=True)
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        mock_journal.return_value.unfinished.return_value = [Path("/test/file1.mp4")]
+        media = MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4")
+        mock_media_scanner.return_value.scan_file.return_value = media
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        mock_journal.return_value.unfinished.assert_called_once_with(Path("test_directory"), 3)
+        mock_media_scanner.return_value.scan_directory.assert_not_called()
+        mock_transcoder.return_value.transcode.assert_called_once_with(media, dry_run=False, threads=4)
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.Path.is_dir", return_value=True)
+    @patch("src.cli.create_watcher")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_watch_mode_transcodes_arrivals(
+        self, mock_transcoder, mock_media_scanner, mock_create_watcher, _mock_is_dir, mock_parse_args
+    ):
+        """Test watch mode processes the existing files, then each settled arrival above the threshold."""
+        self.mock_args["watch"] = True
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        existing = MediaFile(path=Path("/test/old.mp4"), size_gb=7.0, format="mp4")
+        arrivals = {
+            Path("/test/small.mp4"): MediaFile(path=Path("/test/small.mp4"), size_gb=1.0, format="mp4"),
+            Path("/test/new.mp4"): MediaFile(path=Path("/test/new.mp4"), size_gb=9.0, format="mp4")
+        }
+        mock_media_scanner.return_value.scan_directory.return_value = [existing]
+        mock_media_scanner.return_value.scan_file.side_effect = arrivals.get
+        watcher = mock_create_watcher.return_value
+        watcher.settled.return_value = iter(arrivals)
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        transcoded = [c.args[0] for c in mock_transcoder.return_value.transcode.call_args_list]
+        self.assertEqual(transcoded, [existing, arrivals[Path("/test/new.mp4")]])
+        self.assertEqual(mock_create_watcher.call_args.kwargs["settle_seconds"], 10.0)
+        watcher.close.assert_called_once()
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.Transcoder")
+    def test_watch_candidates_follow_scan_rules(self, mock_transcoder, mock_parse_args):
+        """Test watched arrivals are filtered by the same exclude, prune and depth rules as a scan."""
+        self.mock_args.update(exclude=["Extras"], prune_dir=["Samples"], max_depth=1)
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        mock_transcoder.return_value.is_output_file.return_value = False
+        root = Path("/test")
+
+        cli = CLI()
+        candidates = [
+            name for name in ("a.mkv", "Show/b.mkv", "Extras/c.mkv", "Samples/d.mkv", "@eaDir/e.mkv", "Show/S1/f.mkv")
+            if cli._is_watch_candidate(root, root / name)
+        ]
+        self.assertEqual(candidates, ["a.mkv", "Show/b.mkv"])
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_prioritize_orders_by_savings(self, mock_transcoder, mock_media_scanner, mock_parse_args):
+        """Test prioritized runs transcode the file with the best savings per CPU-second first."""
+        self.mock_args["prioritize"] = True
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        hd = MediaFile(path=Path("/test/hd.ts"), size_gb=8.0, format="mpegts", duration=3600.0, streams=[
+            StreamInfo(0, "video", "mpeg2video", width=1920, height=1080, frame_rate=25.0)
+        ])
+        sd = MediaFile(path=Path("/test/sd.ts"), size_gb=8.0, format="mpegts", duration=3600.0, streams=[
+            StreamInfo(0, "video", "mpeg2video", width=720, height=576, frame_rate=25.0)
+        ])
+        mock_media_scanner.return_value.scan_directory.return_value = [hd, sd]
+        mock_transcoder.return_value.decide.side_effect = decide_action
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        transcoded = [c.args[0] for c in mock_transcoder.return_value.transcode.call_args_list]
+        self.assertEqual(transcoded, [sd, hd])
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_trace_written_after_run(self, mock_transcoder, mock_media_scanner, mock_parse_args):
+        """Test --trace records spans during the run, writes them out and switches profiling off."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_file = Path(tmp_dir) / "trace.json"
+            self.mock_args["trace"] = trace_file
+            mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+            mock_media_scanner.return_value.scan_directory.side_effect = (
+                lambda _: [MediaFile(path=Path("/test/file1.mp4"), size_gb=1.0, format="mp4")]
+                if profiler.is_enabled() else []
+            )
+
+            cli = CLI()
+            with patch("builtins.print"):
+                cli.run()
+
+            self.assertIn("traceEvents", json.loads(trace_file.read_text()))
+        self.assertFalse(profiler.is_enabled())
+        mock_media_scanner.return_value.scan_directory.assert_called_once()
+
+    def test_parse_budget_units(self):
+        """Test sizes and durations accept unit suffixes."""
+        self.assertEqual(parse_size("500G"), 500 * 1024 ** 3)
+        self.assertEqual(parse_size("1.5T"), int(1.5 * 1024 ** 4))
+        self.assertEqual(parse_size("4096"), 4096)
+        self.assertEqual(parse_duration("90m"), 5400.0)
+        self.assertEqual(parse_duration("6h"), 21600.0)
+        self.assertEqual(parse_duration("30"), 30.0)
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_size("lots")
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_stream_mode_transcodes_as_found(self, mock_transcoder, mock_media_scanner, mock_parse_args):
+        """Test streaming mode hands each eligible file over before scanning the next."""
+        self.mock_args["stream"] = True
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        mock_transcoder_instance = mock_transcoder.return_value
+        events = []
+
+        def iter_directory(_):
+            for media in (
+                MediaFile(path=Path("/test/small.mp4"), size_gb=1.0, format="mp4"),
+                MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4"),
+                MediaFile(path=Path("/test/file2.mkv"), size_gb=8.0, format="mkv")
+            ):
+                events.append(("scanned", media.path.name))
+                yield media
+
+        mock_media_scanner.return_value.iter_directory.side_effect = iter_directory
+        mock_transcoder_instance.transcode.side_effect = (
+            lambda media, dry_run, threads: events.append(("transcoded", media.path.name))
+        )
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        self.assertEqual(events, [
+            ("scanned", "small.mp4"),
+            ("scanned", "file1.mp4"),
+            ("transcoded", "file1.mp4"),
+            ("scanned", "file2.mkv"),
+            ("transcoded", "file2.mkv")
+        ])
+        mock_media_scanner.return_value.scan_directory.assert_not_called()
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_list_only_mode(self, mock_transcoder, mock_media_scanner, mock_parse_args):
+        """Test list-only mode skips probing and transcoding."""
+        self.mock_args["list_only"] = True
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        mock_media_scanner.return_value.iter_directory.return_value = iter([
+            MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0)
+        ])
+
+        cli = CLI()
+        with patch("builtins.print") as mock_print:
+            cli.run()
+
+        mock_print.assert_called_once_with("1. /test/file1.mp4 | Size: 7.00 GB")
+        self.assertFalse(mock_media_scanner.call_args.kwargs["probe_on_scan"])
+        self.assertEqual(mock_media_scanner.call_args.kwargs["filters"], [])
+        mock_transcoder.return_value.transcode.assert_not_called()
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.core.job_scheduler.wait", side_effect=KeyboardInterrupt)
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_single_job_cancelled_on_interrupt(self, mock_transcoder, mock_media_scanner, _mock_wait, mock_parse_args):
+        """Test an interrupt cancels the running job when only one job runs at a time."""
+        self.mock_args["thread_budget"] = 8
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        media = MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4")
+        mock_media_scanner.return_value.scan_directory.return_value = [media]
+        cancelled = threading.Event()
+        transcoder = mock_transcoder.return_value
+        transcoder.transcode.side_effect = lambda media, dry_run, threads: not cancelled.wait(10)
+        transcoder.cancel.side_effect = cancelled.set
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        transcoder.cancel.assert_called_once_with()
+        transcoder.transcode.assert_called_once_with(media, dry_run=False, threads=8)
+
+    @patch("argparse.ArgumentParser.parse_args")
+    @patch("src.cli.JobScheduler")
+    @patch("src.cli.MediaScanner")
+    @patch("src.cli.Transcoder")
+    def test_parallel_jobs_use_scheduler(self, mock_transcoder, mock_media_scanner, mock_scheduler, mock_parse_args):
+        """Test CLI hands eligible files to the job scheduler when running several jobs."""
+        self.mock_args["jobs"] = 3
+        mock_parse_args.return_value = argparse.Namespace(**self.mock_args)
+        media = MediaFile(path=Path("/test/file1.mp4"), size_gb=7.0, format="mp4")
+        mock_media_scanner.return_value.scan_directory.return_value = [media]
+
+        cli = CLI()
+        with patch("builtins.print"):
+            cli.run()
+
+        self.assertEqual(mock_scheduler.call_args.kwargs["thread_budget"], 12)
+        mock_scheduler.return_value.run.assert_called_once_with([media], dry_run=False)
+        mock_transcoder.return_value.transcode.assert_not_called()
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
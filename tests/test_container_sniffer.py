@@ -0,0 +1,59 @@
+import tempfile
+import unittest
+from pathlib import Path
+from src.core.container_sniffer import sniff_container, sniff_header
+
+class TestContainerSniffer(unittest.TestCase):
+    def test_matroska(self):
+        """Test an EBML header is identified as Matroska/WebM."""
+        self.assertEqual(sniff_header(b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01"), "matroska,webm")
+
+    def test_mp4(self):
+        """Test an ftyp box is identified as MP4/MOV."""
+        self.assertEqual(sniff_header(b"\x00\x00\x00\x20ftypisom\x00\x00\x02\x00"), "mov,mp4,m4a,3gp,3g2,mj2")
+
+    def test_mov_starting_with_mdat(self):
+        """Test a QuickTime file without an ftyp box is still identified."""
+        self.assertEqual(sniff_header(b"\x00\x00\x00\x08wide\x00\x10\x00\x00mdat"), "mov,mp4,m4a,3gp,3g2,mj2")
+
+    def test_avi(self):
+        """Test a RIFF AVI header is identified."""
+        self.assertEqual(sniff_header(b"RIFF\x00\x10\x00\x00AVI LIST"), "avi")
+
+    def test_flv(self):
+        """Test an FLV signature is identified."""
+        self.assertEqual(sniff_header(b"FLV\x01\x05\x00\x00\x00\x09"), "flv")
+
+    def test_asf(self):
+        """Test the ASF header object GUID is identified."""
+        header = bytes.fromhex("3026b2758e66cf11a6d900aa0062ce6c") + b"\x00" * 16
+        self.assertEqual(sniff_header(header), "asf")
+
+    def test_mpegts(self):
+        """Test consecutive 188-byte packets with sync bytes are identified as MPEG-TS."""
+        packet = b"\x47" + b"\x00" * 187
+        self.assertEqual(sniff_header(packet * 4), "mpegts")
+
+    def test_m2ts(self):
+        """Test 192-byte timestamped packets are identified as MPEG-TS."""
+        packet = b"\x00\x00\x00\x00\x47" + b"\x00" * 187
+        self.assertEqual(sniff_header(packet * 4), "mpegts")
+
+    def test_unknown_header(self):
+        """Test an unrecognized header is left to ffprobe."""
+        self.assertIsNone(sniff_header(b"\x00" * 64))
+        self.assertIsNone(sniff_header(b"\x47" + b"\x00" * 200))
+
+    def test_unreadable_file(self):
+        """Test a file that cannot be opened is left to ffprobe."""
+        self.assertIsNone(sniff_container(Path("/nonexistent/file.mkv")))
+
+    def test_reads_from_file(self):
+        """Test sniffing reads the header from disk."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "clip.flv"
+            path.write_bytes(b"FLV\x01\x05" + b"\x00" * 10000)
+            self.assertEqual(sniff_container(path), "flv")
+
+if __name__ == "__main__":
+    unittest.main()
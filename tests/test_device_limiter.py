@@ -0,0 +1,88 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from src.core.device_limiter import DeviceLimiter
+
+DEVICES = {"/disk1/a.mkv": 1, "/disk1/b.mkv": 1, "/disk2/c.mkv": 2, "/ssd": 3}
+
+def _fake_device_of(path):
+    return DEVICES[str(path)]
+
+class TestDeviceLimiter(unittest.TestCase):
+    def _held_concurrently(self, limiter, first, second):
+        """Check whether a second job can take its slots while a first job holds its own."""
+        release_first = threading.Event()
+        first_held = threading.Event()
+
+        def hold_first():
+            with limiter.hold(**first):
+                first_held.set()
+                release_first.wait(5)
+
+        thread = threading.Thread(target=hold_first)
+        thread.start()
+        first_held.wait(5)
+        slots = limiter._slots(second.get("reads", ()), second.get("writes", ()))
+        available = all(semaphore.acquire(blocking=False) for semaphore in slots)
+        release_first.set()
+        thread.join(5)
+        return available
+
+    @patch.object(DeviceLimiter, "device_of", staticmethod(_fake_device_of))
+    def test_same_device_is_throttled(self):
+        """Test a second read from a busy disk waits while a read from another disk does not."""
+        limiter = DeviceLimiter(max_reads=1)
+        first = {"reads": [Path("/disk1/a.mkv")]}
+        self.assertFalse(self._held_concurrently(limiter, first, {"reads": [Path("/disk1/b.mkv")]}))
+        self.assertTrue(self._held_concurrently(limiter, first, {"reads": [Path("/disk2/c.mkv")]}))
+
+    @patch.object(DeviceLimiter, "device_of", staticmethod(_fake_device_of))
+    def test_reads_and_writes_are_limited_separately(self):
+        """Test writing to a disk does not use up its read slots, and unset limits are not enforced."""
+        limiter = DeviceLimiter(max_reads=1, max_writes=1)
+        first = {"reads": [Path("/disk1/a.mkv")], "writes": [Path("/ssd")]}
+        self.assertTrue(self._held_concurrently(limiter, first, {"writes": [Path("/disk1/b.mkv")]}))
+        self.assertFalse(self._held_concurrently(limiter, first, {"writes": [Path("/ssd")]}))
+        self.assertEqual(DeviceLimiter(max_writes=1)._slots([Path("/disk1/a.mkv")], []), [])
+
+    @patch.object(DeviceLimiter, "device_of", staticmethod(_fake_device_of))
+    def test_slots_taken_in_a_fixed_order(self):
+        """Test jobs naming the same devices in any order take their slots in the same order."""
+        limiter = DeviceLimiter(max_reads=1, max_writes=1)
+        forward = limiter._slots([Path("/disk2/c.mkv")], [Path("/ssd"), Path("/disk1/a.mkv")])
+        backward = limiter._slots([Path("/disk2/c.mkv")], [Path("/disk1/a.mkv"), Path("/ssd")])
+        self.assertEqual(forward, backward)
+
+    def test_device_of_missing_path_uses_ancestor(self):
+        """Test a write target that does not exist yet is placed on its parent's device."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            self.assertEqual(DeviceLimiter.device_of(root / "not" / "yet.mkv"), root.stat().st_dev)
+
+class TestDeviceLimiterAsync(unittest.IsolatedAsyncioTestCase):
+    @patch.object(DeviceLimiter, "device_of", staticmethod(_fake_device_of))
+    async def test_cancelled_wait_releases_slot(self):
+        """Test a job cancelled while waiting for a slot does not keep it once it is freed."""
+        limiter = DeviceLimiter(max_reads=1)
+        reads = [Path("/disk1/a.mkv")]
+        with limiter.hold(reads=reads):
+            waiting = asyncio.create_task(self._hold_async(limiter, reads))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+        await asyncio.sleep(0.05)
+
+        semaphore, = limiter._slots(reads, [])
+        self.assertTrue(semaphore.acquire(blocking=False))
+
+    @staticmethod
+    async def _hold_async(limiter, reads):
+        async with limiter.hold_async(reads=reads):
+            pass
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from src.core.directory_walker import DirectoryWalker
+
+class TestDirectoryWalker(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+    def _make_files(self, *names):
+        for name in names:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"\x00" * 8)
+
+    def _walk(self, walker):
+        return sorted(path.relative_to(self.root).as_posix() for path, _ in walker.walk(self.root))
+
+    def test_filters_on_extension(self):
+        """Test only files with a listed extension are found, case-insensitively."""
+        self._make_files("a.mkv", "B.MP4", "notes.txt", "Makefile", "sub/c.mkv")
+        self.assertEqual(self._walk(DirectoryWalker((".mkv", ".mp4"))), ["B.MP4", "a.mkv", "sub/c.mkv"])
+
+    def test_reuses_entry_stat(self):
+        """Test files are stat'ed through their directory entry only, never again by path."""
+        self._make_files("a.mkv", "sub/b.mkv")
+        with patch("os.stat", side_effect=AssertionError("stat called by path")):
+            found = list(DirectoryWalker((".mkv",)).walk(self.root))
+        self.assertEqual(sorted(stat_result.st_size for _, stat_result in found), [8, 8])
+
+    def test_prune_and_exclude(self):
+        """Test pruned directories are not entered and excluded names or paths are skipped."""
+        self._make_files(
+            "a.mkv", "a_transcoded.mkv", "@eaDir/a.mkv", ".Trash-1000/b.mkv", "Show/Extras/c.mkv", "Show/d.mkv"
+        )
+        walker = DirectoryWalker(
+            (".mkv",), exclude=("*_transcoded.mkv", "Show/Extras"), prune_dirs=("@eaDir", ".Trash*")
+        )
+        self.assertEqual(self._walk(walker), ["Show/d.mkv", "a.mkv"])
+
+    def test_max_depth(self):
+        """Test directories below the maximum depth are not entered."""
+        self._make_files("a.mkv", "one/b.mkv", "one/two/c.mkv")
+        self.assertEqual(self._walk(DirectoryWalker((".mkv",), max_depth=0)), ["a.mkv"])
+        self.assertEqual(self._walk(DirectoryWalker((".mkv",), max_depth=1)), ["a.mkv", "one/b.mkv"])
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks are not supported")
+    def test_symlink_policies(self):
+        """Test links are skipped, followed only to files, or followed everywhere without looping."""
+        self._make_files("library/a.mkv", "elsewhere/b.mkv")
+        (self.root / "library" / "link.mkv").symlink_to(self.root / "elsewhere" / "b.mkv")
+        (self.root / "library" / "linked_dir").symlink_to(self.root / "elsewhere")
+        (self.root / "library" / "loop").symlink_to(self.root / "library")
+        library = self.root / "library"
+
+        def walk(policy):
+            walker = DirectoryWalker((".mkv",), symlinks=policy)
+            return sorted(path.relative_to(library).as_posix() for path, _ in walker.walk(library))
+
+        self.assertEqual(walk("skip"), ["a.mkv"])
+        self.assertEqual(walk("files"), ["a.mkv", "link.mkv"])
+        self.assertEqual(walk("follow"), ["a.mkv", "link.mkv", "linked_dir/b.mkv"])
+
+    def test_includes_agrees_with_walk(self):
+        """Test a path is included exactly when a walk with the same rules finds it."""
+        names = [
+            "a.mkv", "a_transcoded.mkv", "notes.txt", "@eaDir/a.mkv", "Show/Extras/c.mkv", "Show/d.mkv",
+            "one/two/e.mkv"
+        ]
+        self._make_files(*names)
+        walkers = [
+            DirectoryWalker((".mkv",), exclude=("*_transcoded.mkv", "Show/Extras"), prune_dirs=("@eaDir",)),
+            DirectoryWalker((".mkv",), max_depth=1)
+        ]
+        for walker in walkers:
+            included = sorted(name for name in names if walker.includes(self.root, self.root / name))
+            self.assertEqual(included, self._walk(walker))
+        self.assertTrue(walkers[0].enters(self.root, self.root / "Show"))
+        self.assertFalse(walkers[0].enters(self.root, self.root / "Show" / "Extras"))
+        self.assertFalse(walkers[1].enters(self.root, self.root / "one" / "two"))
+        self.assertFalse(walkers[1].includes(self.root, Path("/elsewhere/a.mkv")))
+
+    def test_invalid_symlink_policy(self):
+        """Test an unknown symlink policy is rejected."""
+        with self.assertRaises(ValueError):
+            DirectoryWalker((".mkv",), symlinks="sometimes")
+
+if __name__ == "__main__":
+    unittest.main()
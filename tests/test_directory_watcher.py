@@ -0,0 +1,117 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from src.core.directory_walker import DirectoryWalker
+from src.core.directory_watcher import DirectoryWatcher, InotifyWatcher, PollingWatcher, create_watcher
+
+def _is_mkv(path: Path) -> bool:
+    return path.suffix == ".mkv"
+
+class TestDirectoryWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+    def _first_settled(self, watcher, arrive, timeout=10.0):
+        """Run ``arrive`` while the watcher is waiting and return the first file it reports."""
+        reported = []
+
+        def collect():
+            for path in watcher.settled():
+                reported.append(path)
+                watcher.stop()
+
+        thread = threading.Thread(target=collect, daemon=True)
+        thread.start()
+        arrive()
+        thread.join(timeout)
+        watcher.stop()
+        self.assertFalse(thread.is_alive(), "watcher did not report a settled file")
+        return reported[0]
+
+    def _arrive(self, *names):
+        """Create files in order, so the last one is the file expected to be reported."""
+        def arrive():
+            for name in names:
+                path = self.root / name
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b"\x00" * 16)
+        return arrive
+
+    def test_polling_reports_new_file(self):
+        """Test the polling watcher reports a file created after it started."""
+        (self.root / "existing.mkv").write_bytes(b"\x00")
+        watcher = PollingWatcher(self.root, _is_mkv, settle_seconds=0.1, poll_interval=0.05)
+        watcher.start()
+        self.addCleanup(watcher.close)
+
+        path = self._first_settled(watcher, self._arrive("notes.txt", "new.mkv"))
+        self.assertEqual(path, self.root / "new.mkv")
+
+    @unittest.skipUnless(InotifyWatcher.is_supported(), "inotify is not available")
+    def test_inotify_reports_file_in_new_directory(self):
+        """Test the inotify watcher follows new directories and ignores hidden ones."""
+        watcher = InotifyWatcher(self.root, _is_mkv, settle_seconds=0.1)
+        watcher.start()
+        self.addCleanup(watcher.close)
+
+        path = self._first_settled(watcher, self._arrive(".work/segment.mkv", "show/season 1/episode.mkv"))
+        self.assertEqual(path, self.root / "show" / "season 1" / "episode.mkv")
+
+    def test_walker_rules_prune_the_watch(self):
+        """Test directories the walker would not enter are neither walked nor watched."""
+        walker = DirectoryWalker((".mkv",), prune_dirs=("@eaDir",), exclude=("Extras",), max_depth=1)
+        for name in ("@eaDir/a.mkv", "Extras/b.mkv", "one/two/c.mkv", "one/d.mkv"):
+            self._arrive(name)()
+        watcher = PollingWatcher(self.root, _is_mkv, settle_seconds=0.1, poll_interval=0.05, walker=walker)
+
+        self.assertEqual(list(watcher._take_snapshot()), [self.root / "one" / "d.mkv"])
+
+    def test_growing_file_is_not_settled(self):
+        """Test a file whose size keeps changing is held back until it stops."""
+        watcher = PollingWatcher(self.root, _is_mkv, settle_seconds=60.0, poll_interval=1.0)
+        path = self.root / "download.mkv"
+        path.write_bytes(b"\x00")
+        watcher._pending[path] = (None, 0.0)
+
+        self.assertEqual(list(watcher._take_settled()), [])
+        path.write_bytes(b"\x00" * 2)
+        self.assertEqual(list(watcher._take_settled()), [])
+
+        signature, _ = watcher._pending[path]
+        watcher._pending[path] = (signature, 0.0)
+        self.assertEqual(list(watcher._take_settled()), [path])
+
+    def test_settle_ticks_do_not_walk_the_tree(self):
+        """Test the tree is walked once per poll interval while files wait to settle."""
+        watcher = PollingWatcher(self.root, _is_mkv, settle_seconds=0.1, poll_interval=60.0)
+        watcher.start()
+        self.addCleanup(watcher.close)
+        walks = []
+        snapshot = watcher._take_snapshot
+        watcher._take_snapshot = lambda: walks.append(1) or snapshot()
+
+        for _ in range(3):
+            self.assertEqual(list(watcher._changes(watcher._settle_tick())), [])
+        self.assertEqual(walks, [])
+
+        watcher._next_poll = 0.0
+        self._arrive("new.mkv")()
+        self.assertEqual(list(watcher._changes(watcher._settle_tick())), [self.root / "new.mkv"])
+        self.assertEqual(walks, [1])
+
+    def test_watcher_without_changes_cannot_be_created(self):
+        """Test a watcher must supply its own start and change notifications."""
+        with self.assertRaises(TypeError):
+            DirectoryWatcher(self.root, _is_mkv, settle_seconds=0.1)
+
+    def test_force_polling(self):
+        """Test polling can be chosen even where inotify is available."""
+        watcher = create_watcher(self.root, _is_mkv, settle_seconds=1.0, poll_interval=1.0, force_polling=True)
+        self.addCleanup(watcher.close)
+        self.assertIsInstance(watcher, PollingWatcher)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from src.core.duplicate_finder import DuplicateFinder
+from src.core.media_file import MediaFile
+
+class TestDuplicateFinder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+    def _media(self, name: str, content: bytes = None) -> MediaFile:
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if content is not None:
+            path.write_bytes(content)
+        return MediaFile(path=path, size_gb=path.stat().st_size / 1024 ** 3)
+
+    @staticmethod
+    def _names(groups):
+        return [[group.primary.path.name] + [m.path.name for m in group.copies] for group in groups]
+
+    @unittest.skipUnless(hasattr(os, "link"), "hardlinks are not supported")
+    def test_hardlinks_grouped_by_inode(self):
+        """Test hardlinks of one file form a single group without their content being read."""
+        original = self._media("a/movie.ts", b"\x01" * 4096)
+        os.link(original.path, self.root / "movie_link.ts")
+        link = self._media("movie_link.ts")
+        finder = DuplicateFinder()
+        finder.sampled_hash = None
+
+        self.assertEqual(self._names(finder.group([original, link])), [["movie.ts", "movie_link.ts"]])
+
+    def test_identical_copies_grouped_by_sampled_hash(self):
+        """Test byte-identical copies are grouped while same-sized files with other content are not."""
+        content = os.urandom(64 * 1024)
+        files = [
+            self._media("a/movie.ts", content),
+            self._media("other.ts", bytes(reversed(content))),
+            self._media("b/movie.ts", content),
+            self._media("small.ts", content[:1024])
+        ]
+
+        groups = DuplicateFinder(sample_block_bytes=4096).group(files)
+
+        self.assertEqual(self._names(groups), [["movie.ts", "movie.ts"], ["other.ts"], ["small.ts"]])
+        self.assertEqual(groups[0].copies[0].path, self.root / "b" / "movie.ts")
+
+    def test_full_hash_separates_files_differing_between_samples(self):
+        """Test files matching on every sampled block are only grouped when their whole content matches."""
+        content = bytearray(os.urandom(64 * 1024))
+        first = self._media("first.ts", bytes(content))
+        content[20 * 1024] ^= 0xFF
+        second = self._media("second.ts", bytes(content))
+
+        sampled = DuplicateFinder(sample_block_bytes=4096).group([first, second])
+        confirmed = DuplicateFinder(full_hash=True, sample_block_bytes=4096).group([first, second])
+
+        self.assertEqual(self._names(sampled), [["first.ts", "second.ts"]])
+        self.assertEqual(self._names(confirmed), [["first.ts"], ["second.ts"]])
+
+    def test_unreadable_files_stay_alone(self):
+        """Test files that vanished before they were checked are kept in groups of their own."""
+        gone = MediaFile(path=self.root / "gone.ts", size_gb=1.0)
+        with self.assertLogs(level="WARNING"):
+            groups = DuplicateFinder().group([gone])
+        self.assertEqual(self._names(groups), [["gone.ts"]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import io
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from src.core.ffmpeg_process import MAX_LINE_BYTES, OutputTail, wait_for_exit
+
+class TestFFmpegProcess(unittest.TestCase):
+    def test_exit_code_and_cpu_time(self):
+        """Test a child's exit code and CPU time are collected on exit."""
+        process = subprocess.Popen([sys.executable, "-c", "import sys; sum(range(10**6)); sys.exit(3)"])
+
+        cpu_seconds = wait_for_exit(process)
+
+        self.assertEqual(process.returncode, 3)
+        self.assertGreater(cpu_seconds, 0)
+
+    def test_killed_process(self):
+        """Test a child killed by a signal reports a negative return code."""
+        process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        process.kill()
+
+        wait_for_exit(process)
+
+        self.assertLess(process.returncode, 0)
+
+    def test_tail_keeps_last_lines(self):
+        """Test only the configured number of trailing lines is retained."""
+        tail = OutputTail(max_lines=3)
+        tail.consume(io.BytesIO(b"".join(f"warning {i}\n".encode() for i in range(10000))))
+        self.assertEqual(tail.text(), "warning 9997\nwarning 9998\nwarning 9999")
+
+    def test_tail_bounds_unterminated_output(self):
+        """Test carriage-return progress output without newlines stays bounded."""
+        tail = OutputTail(max_lines=2)
+        tail.consume(io.BytesIO(b"".join(f"frame={i}\r".encode() for i in range(100000))))
+
+        self.assertEqual(tail.text(), "frame=99998\nframe=99999")
+        self.assertTrue(all(len(line) <= MAX_LINE_BYTES for line in tail._lines))
+
+    def test_tail_spills_to_log_file(self):
+        """Test the complete output is written to the log file."""
+        output = b"".join(f"line {i}\n".encode() for i in range(100))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = Path(tmp_dir) / "job.ffmpeg.log"
+            tail = OutputTail(max_lines=1, log_path=log_path)
+            tail.consume(io.BytesIO(output))
+            self.assertEqual(log_path.read_bytes(), output)
+        self.assertEqual(tail.text(), "line 99")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+from pathlib import Path
+from src.core.job_coordinator import JobCoordinator
+from src.core.media_file import MediaFile
+
+class TestJobCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.coordinator = JobCoordinator(lease_seconds=0.4, max_attempts=2, poll_interval=0.05)
+        self.addCleanup(self.coordinator.close, linger=0)
+        self.paths = [Path(f"/shared/file{idx}.mkv") for idx in range(2)]
+        for path in self.paths:
+            self.coordinator.add(path)
+
+    def test_jobs_leased_in_order_once(self):
+        """Test each queued job is leased to one worker, and added again only once."""
+        self.coordinator.add(self.paths[0])
+        first = self.coordinator.lease("worker-a")
+        second = self.coordinator.lease("worker-b")
+
+        self.assertEqual((first.path, second.path), tuple(self.paths))
+        self.assertIsNone(self.coordinator.lease("worker-a"))
+        self.assertEqual(self.coordinator.status()["leased"], 2)
+
+    def test_changed_source_queued_again(self):
+        """Test a finished job is queued again once its source changes, and only then."""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = Path(tmp_dir.name) / "file.mkv"
+        path.write_bytes(b"\x00" * 8)
+        coordinator = JobCoordinator(lease_seconds=5.0, poll_interval=0.05)
+        self.addCleanup(coordinator.close, linger=0)
+        coordinator.add(path)
+        coordinator.complete(coordinator.lease("worker-a").lease_id, True)
+
+        coordinator.add(path)
+        self.assertIsNone(coordinator.lease("worker-a"))
+
+        path.write_bytes(b"\x00" * 16)
+        coordinator.add(path)
+        coordinator.add(path)
+        lease = coordinator.lease("worker-a")
+        self.assertEqual(lease.path, path)
+        self.assertIsNone(coordinator.lease("worker-b"))
+        self.assertEqual(coordinator.status()["succeeded"], 0)
+
+    def test_expired_lease_is_reassigned(self):
+        """Test a job whose worker stops sending heartbeats goes to the next worker first."""
+        dead = self.coordinator.lease("dead-worker")
+        time.sleep(0.45)
+
+        retry = self.coordinator.lease("worker-b")
+
+        self.assertEqual(retry.path, dead.path)
+        self.assertFalse(self.coordinator.heartbeat(dead.lease_id))
+        self.assertFalse(self.coordinator.complete(dead.lease_id, True))
+        self.assertTrue(self.coordinator.complete(retry.lease_id, True))
+
+    def test_heartbeats_keep_a_lease(self):
+        """Test a lease renewed by heartbeats outlives its lease period."""
+        lease = self.coordinator.lease("worker-a")
+        for _ in range(4):
+            time.sleep(0.1)
+            self.assertTrue(self.coordinator.heartbeat(lease.lease_id))
+        self.assertTrue(self.coordinator.complete(lease.lease_id, True))
+
+    def test_job_fails_after_max_attempts(self):
+        """Test a job whose leases keep expiring is failed instead of retried forever."""
+        journal = MagicMock()
+        self.coordinator.journal = journal
+        for _ in range(2):
+            self.assertEqual(self.coordinator.lease("crashing-worker").path, self.paths[0])
+            time.sleep(0.45)
+
+        self.assertEqual(self.coordinator.lease("worker-b").path, self.paths[1])
+        self.assertIsNone(self.coordinator.lease("worker-c"))
+        journal.mark_failed.assert_called_once_with(self.paths[0], "Lease expired")
+        self.assertEqual(journal.requeue.call_count, 1)
+        self.assertEqual(self.coordinator.status()["failed"], 1)
+
+    def test_http_protocol(self):
+        """Test workers lease, renew and complete jobs over HTTP and stale leases are refused."""
+        self.coordinator.start()
+
+        def post(endpoint, body):
+            request = urllib.request.Request(self.coordinator.url + endpoint, data=json.dumps(body).encode(), method="POST")
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    return response.status, json.loads(response.read())
+            except urllib.error.HTTPError as e:
+                return e.code, json.loads(e.read())
+
+        status, response = post("/lease", {"worker": "worker-a"})
+        self.assertEqual(status, 200)
+        job = response["job"]
+        self.assertEqual(job["path"], str(self.paths[0]))
+        self.assertEqual(post("/heartbeat", {"lease": job["lease"]})[0], 200)
+        self.assertEqual(post("/complete", {"lease": job["lease"], "success": True})[0], 200)
+        self.assertEqual(post("/complete", {"lease": job["lease"], "success": True})[0], 409)
+        self.assertEqual(post("/heartbeat", {})[0], 400)
+        with urllib.request.urlopen(self.coordinator.url + "/status", timeout=5) as response:
+            self.assertEqual(json.loads(response.read())["succeeded"], 1)
+
+    def test_run_waits_for_every_outcome(self):
+        """Test run returns once every file has an outcome reported by a worker."""
+        coordinator = JobCoordinator(lease_seconds=5.0, poll_interval=0.05)
+        self.addCleanup(coordinator.close, linger=0)
+        media_files = [MediaFile(path=path, size_gb=7.0) for path in self.paths]
+
+        def report(worker):
+            while (lease := coordinator.lease(worker)) is None:
+                time.sleep(0.01)
+            coordinator.complete(lease.lease_id, lease.path == self.paths[0])
+
+        workers = [threading.Thread(target=report, args=(f"worker-{idx}",)) for idx in range(2)]
+        for worker in workers:
+            worker.start()
+        results = coordinator.run(media_files)
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(results, {self.paths[0]: True, self.paths[1]: False})
+
+if __name__ == "__main__":
+    unittest.main()
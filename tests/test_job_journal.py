@@ -0,0 +1,121 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from src.core.job_journal import DONE, FAILED, QUEUED, RUNNING, JobJournal
+
+class TestJobJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.journal = JobJournal(self.root / "state" / "jobs.sqlite3")
+        self.addCleanup(self.journal.close)
+        self.media = self.root / "media"
+
+    def test_job_lifecycle(self):
+        """Test a job moves through the journal states and counts its attempts."""
+        path = self.media / "a.mp4"
+        self.journal.enqueue(path)
+        self.assertEqual(self.journal.state(path), QUEUED)
+
+        self.journal.mark_running(path)
+        self.assertEqual(self.journal.state(path), RUNNING)
+        self.journal.mark_failed(path, "Conversion failed!")
+        self.assertEqual(self.journal.state(path), FAILED)
+
+        self.journal.mark_running(path)
+        self.journal.mark_done(path)
+        self.assertEqual(self.journal.state(path), DONE)
+        self.assertEqual(self.journal.attempts(path), 2)
+
+    def test_enqueue_keeps_finished_jobs(self):
+        """Test re-queuing a finished job does not make it run again."""
+        path = self.media / "a.mp4"
+        self.journal.mark_running(path)
+        self.journal.mark_done(path)
+
+        self.journal.enqueue(path)
+        self.assertEqual(self.journal.state(path), DONE)
+
+    def test_enqueue_requeues_replaced_source(self):
+        """Test a finished job is queued afresh once its source changes size or mtime."""
+        path = self.media / "a.mp4"
+        self.media.mkdir()
+        path.write_bytes(b"\x00" * 8)
+        self.journal.enqueue(path)
+        self.journal.mark_running(path)
+        self.journal.mark_done(path)
+
+        self.journal.enqueue(path)
+        self.assertEqual(self.journal.state(path), DONE)
+
+        path.write_bytes(b"\x00" * 16)
+        self.journal.enqueue(path)
+        self.assertEqual(self.journal.state(path), QUEUED)
+        self.assertEqual(self.journal.attempts(path), 0)
+
+        self.journal.mark_running(path)
+        self.journal.mark_done(path)
+        os.utime(path, ns=(0, 0))
+        self.journal.enqueue(path)
+        self.assertEqual(self.journal.state(path), QUEUED)
+
+    def test_journal_without_source_columns_upgraded(self):
+        """Test a journal written before sources were identified is upgraded in place."""
+        db_path = self.root / "old.sqlite3"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute(
+            "CREATE TABLE jobs (path TEXT PRIMARY KEY, state TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL, error TEXT)"
+        )
+        conn.execute("INSERT INTO jobs VALUES (?, ?, 1, 0, NULL)", (str(self.media / "a.mp4"), DONE))
+        conn.commit()
+        conn.close()
+
+        journal = JobJournal(db_path)
+        self.addCleanup(journal.close)
+        journal.enqueue(self.media / "a.mp4")
+        self.assertEqual(journal.state(self.media / "a.mp4"), DONE)
+
+    def test_unfinished_jobs(self):
+        """Test resume picks queued and interrupted jobs, and failed ones until they run out of attempts."""
+        queued, interrupted, retry, exhausted, done = (
+            self.media / name for name in ("a.mp4", "b.mp4", "c.mp4", "d.mp4", "e.mp4")
+        )
+        self.journal.enqueue(queued)
+        self.journal.mark_running(interrupted)
+        self.journal.mark_running(retry)
+        self.journal.mark_failed(retry)
+        for _ in range(3):
+            self.journal.mark_running(exhausted)
+            self.journal.mark_failed(exhausted)
+        self.journal.mark_running(done)
+        self.journal.mark_done(done)
+        self.journal.enqueue(self.root / "elsewhere" / "f.mp4")
+
+        self.assertEqual(self.journal.unfinished(self.media, max_attempts=3), [queued, interrupted, retry])
+
+    def test_relative_paths_recorded_absolute(self):
+        """Test a job queued by a relative path is found by its absolute path and directory."""
+        self.media.mkdir()
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.root)
+        self.journal.enqueue(Path("media") / "a.mp4")
+
+        self.assertEqual(self.journal.state(self.media / "a.mp4"), QUEUED)
+        self.assertEqual(self.journal.unfinished(Path("media"), max_attempts=3), [self.media / "a.mp4"])
+
+    def test_journal_survives_reopen(self):
+        """Test job states persist across journal instances."""
+        path = self.media / "a.mp4"
+        self.journal.mark_running(path)
+        self.journal.close()
+
+        reopened = JobJournal(self.root / "state" / "jobs.sqlite3")
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.unfinished(self.media, max_attempts=3), [path])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from src.core.job_planner import JobPlanner, estimate_cpu_seconds
+from src.core.media_file import MediaFile, StreamInfo
+from src.core.transcode_decision import TranscodeAction, TranscodeDecision, decide_action
+
+GB = 1024 ** 3
+
+def _media(name: str, size_gb: float, codec: str = "mpeg2video", width: int = 1920, height: int = 1080,
+           duration: float = 3600.0) -> MediaFile:
+    return MediaFile(
+        path=Path(f"/test/{name}"),
+        size_gb=size_gb,
+        format="mpegts",
+        duration=duration,
+        streams=[
+            StreamInfo(0, "video", codec, width=width, height=height, frame_rate=25.0),
+            StreamInfo(1, "audio", "ac3", bit_rate=384_000)
+        ]
+    )
+
+class TestJobPlanner(unittest.TestCase):
+    def test_rank_by_savings_per_cpu_second(self):
+        """Test jobs freeing the most bytes per CPU-second come first and unknown payoffs last."""
+        small_hd = _media("small_hd.ts", 4.0)
+        large_sd = _media("large_sd.ts", 8.0, width=720, height=576)
+        large_hd = _media("large_hd.ts", 20.0)
+        unknown = MediaFile(path=Path("/test/unknown.avi"), size_gb=30.0, format="avi")
+        planner = JobPlanner(decide_action, threads_per_job=4)
+
+        ranked = planner.rank([unknown, small_hd, large_hd, large_sd])
+
+        self.assertEqual(
+            [job.media_file.path.name for job in ranked],
+            ["large_sd.ts", "large_hd.ts", "small_hd.ts", "unknown.avi"]
+        )
+
+    def test_estimate_cpu_seconds(self):
+        """Test re-encodes are costed by pixels and remuxes by bytes."""
+        media = _media("film.ts", 10.0)
+        reencode = estimate_cpu_seconds(media, TranscodeAction.REENCODE)
+        remux = estimate_cpu_seconds(media, TranscodeAction.REMUX)
+
+        self.assertAlmostEqual(reencode, 1920 * 1080 * 25 * 3600 / 15_000_000 + 18.0)
+        self.assertAlmostEqual(remux, 10 * GB / (200 * 1024 ** 2))
+        self.assertIsNone(estimate_cpu_seconds(MediaFile(path=Path("/test/a.avi"), size_gb=1.0), TranscodeAction.REENCODE))
+
+    def test_output_budget_passes_over_large_jobs(self):
+        """Test a job that would exceed the output budget is passed over for smaller ones."""
+        outputs = {"a.mkv": 60 * GB, "b.mkv": 50 * GB, "c.mkv": 30 * GB}
+        planner = JobPlanner(
+            lambda media: TranscodeDecision(TranscodeAction.REENCODE, "test", outputs[media.path.name]),
+            threads_per_job=4,
+            max_output_bytes=100 * GB
+        )
+        media_files = [MediaFile(path=Path(f"/test/{name}"), size_gb=100.0) for name in outputs]
+
+        allowed = list(planner.within_budget(planner.estimate(media) for media in media_files))
+
+        self.assertEqual([media.path.name for media in allowed], ["a.mkv", "c.mkv"])
+
+    def test_runtime_budget_stops_new_jobs(self):
+        """Test no job is started once the runtime budget is used up, and overlong jobs are passed over."""
+        planner = JobPlanner(decide_action, threads_per_job=1, max_runtime=3600.0)
+        long_job = _media("long.ts", 10.0)
+        short_jobs = [_media(f"short{i}.ts", 1.0, width=640, height=360, duration=600.0) for i in range(3)]
+        clock = iter([0.0, 0.0, 100.0, 400.0, 3700.0])
+
+        with patch("src.core.job_planner.time.monotonic", side_effect=lambda: next(clock)):
+            allowed = list(planner.within_budget(planner.estimate(m) for m in [long_job] + short_jobs))
+
+        self.assertEqual([media.path.name for media in allowed], ["short0.ts", "short1.ts"])
+
+    def test_skipped_files_cost_nothing(self):
+        """Test compliant files are planned with no cost, output or savings."""
+        media = MediaFile(
+            path=Path("/test/done.mkv"),
+            size_gb=5.0,
+            format="matroska,webm",
+            streams=[StreamInfo(0, "video", "h264"), StreamInfo(1, "audio", "aac")]
+        )
+        job = JobPlanner(decide_action, threads_per_job=2).estimate(media)
+        self.assertEqual((job.savings_bytes, job.output_bytes, job.cpu_seconds), (0, 0, 0.0))
+
+if __name__ == "__main__":
+    unittest.main()
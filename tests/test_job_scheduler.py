@@ -0,0 +1,79 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+from pathlib import Path
+from src.core.job_scheduler import JobScheduler
+from src.core.media_file import MediaFile
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self):
+        self.media_files = [
+            MediaFile(path=Path(f"/test/file{i}.mp4"), size_gb=7.0, format="mp4") for i in range(6)
+        ]
+
+    def test_runs_every_job(self):
+        """Test every file is transcoded and its outcome recorded."""
+        transcoder = MagicMock()
+        transcoder.transcode.side_effect = lambda media, dry_run, threads: media.path.name != "file3.mp4"
+
+        results = JobScheduler(transcoder, max_jobs=3, thread_budget=12).run(self.media_files)
+
+        self.assertEqual(len(results), 6)
+        self.assertFalse(results[Path("/test/file3.mp4")])
+        self.assertEqual(sum(results.values()), 5)
+
+    def test_thread_budget_never_exceeded(self):
+        """Test concurrent jobs never hold more threads than the budget."""
+        lock = threading.Lock()
+        held = {"now": 0, "peak": 0, "jobs": 0, "peak_jobs": 0}
+        barrier = threading.Barrier(3, timeout=5)
+
+        def transcode(media, dry_run, threads):
+            with lock:
+                held["now"] += threads
+                held["jobs"] += 1
+                held["peak"] = max(held["peak"], held["now"])
+                held["peak_jobs"] = max(held["peak_jobs"], held["jobs"])
+            if media.path.name in ("file0.mp4", "file1.mp4", "file2.mp4"):
+                barrier.wait()
+            with lock:
+                held["now"] -= threads
+                held["jobs"] -= 1
+            return True
+
+        transcoder = MagicMock()
+        transcoder.transcode.side_effect = transcode
+        JobScheduler(transcoder, max_jobs=3, thread_budget=12).run(self.media_files)
+
+        self.assertEqual(held["peak_jobs"], 3)
+        self.assertLessEqual(held["peak"], 12)
+
+    def test_last_job_gets_released_threads(self):
+        """Test a lone remaining job is given the whole budget."""
+        transcoder = MagicMock(return_value=True)
+
+        JobScheduler(transcoder, max_jobs=4, thread_budget=16).run(self.media_files[:1])
+
+        self.assertEqual(transcoder.transcode.call_args.kwargs["threads"], 16)
+
+    def test_interrupt_cancels_transcoder(self):
+        """Test an interrupt cancels running jobs instead of propagating."""
+        transcoder = MagicMock()
+        transcoder.transcode.return_value = False
+
+        def media_stream():
+            yield self.media_files[0]
+            raise KeyboardInterrupt
+
+        results = JobScheduler(transcoder, max_jobs=2, thread_budget=4).run(media_stream())
+
+        transcoder.cancel.assert_called_once()
+        self.assertEqual(results, {self.media_files[0].path: False})
+
+    def test_invalid_max_jobs(self):
+        """Test at least one job slot is required."""
+        with self.assertRaises(ValueError):
+            JobScheduler(MagicMock(), max_jobs=0)
+
+if __name__ == "__main__":
+    unittest.main()
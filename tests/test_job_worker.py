@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from src.core.job_coordinator import JobCoordinator
+from src.core.job_worker import JobWorker
+from src.core.media_file import MediaFile
+
+class FakeScanner:
+    """Builds media files from paths without probing them."""
+
+    def scan_file(self, path: Path) -> MediaFile:
+        return MediaFile(path=path, size_gb=path.stat().st_size / 1024 ** 3, format="mpegts")
+
+class FakeTranscoder:
+    """Appends the worker's process id to a marker next to each source, or blocks until cancelled."""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+
+    def transcode(self, media_file: MediaFile, dry_run: bool = False, threads=None) -> bool:
+        if media_file.path.name.startswith("hang"):
+            return not self.cancelled.wait(10)
+        with open(media_file.path.with_suffix(".done"), "a") as marker:
+            marker.write(f"{os.getpid()}\n")
+        return media_file.path.name != "broken.ts"
+
+    def cancel(self):
+        self.cancelled.set()
+
+def run_worker(url: str, root: str, worker_id: str):
+    """Entry point of a worker process."""
+    JobWorker(url, FakeScanner(), FakeTranscoder, root=Path(root), max_jobs=2, worker_id=worker_id).run()
+
+class TestJobWorker(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+
+    def _media(self, *names):
+        media_files = []
+        for name in names:
+            path = self.root / name
+            path.write_bytes(b"\x00" * 188)
+            media_files.append(MediaFile(path=path, size_gb=188 / 1024 ** 3))
+        return media_files
+
+    def test_worker_processes_share_the_queue(self):
+        """Test several worker processes against a loopback coordinator transcode every file once."""
+        media_files = self._media(*(f"file{idx}.ts" for idx in range(12)), "broken.ts")
+        coordinator = JobCoordinator(lease_seconds=5.0, poll_interval=0.05)
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=run_worker, args=(coordinator.url, str(self.root), f"worker-{idx}"))
+            for idx in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        coordinator.start()
+        try:
+            results = coordinator.run(media_files)
+        finally:
+            coordinator.close(linger=10)
+            for worker in workers:
+                worker.join(10)
+
+        self.assertEqual(sum(results.values()), 12)
+        self.assertFalse(results[self.root / "broken.ts"])
+        self.assertEqual([worker.exitcode for worker in workers], [0, 0, 0])
+        for media in media_files:
+            self.assertEqual(len(media.path.with_suffix(".done").read_text().splitlines()), 1)
+
+    def test_dead_worker_job_reassigned(self):
+        """Test a job leased by a worker that died is picked up by another once the lease expires."""
+        (media,) = self._media("file.ts")
+        coordinator = JobCoordinator(lease_seconds=0.4, poll_interval=0.05)
+        self.addCleanup(coordinator.close, linger=0)
+        coordinator.start()
+        coordinator.add(media.path)
+        coordinator.lease("dead-worker")
+
+        worker = JobWorker(coordinator.url, FakeScanner(), FakeTranscoder, root=self.root, worker_id="worker-b")
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        started = time.monotonic()
+        results = coordinator.run([media])
+        coordinator.close(linger=5)
+        thread.join(5)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual(results, {media.path: True})
+        self.assertEqual(worker._results, {media.path: True})
+
+    def test_revoked_lease_cancels_job(self):
+        """Test a worker whose lease is revoked cancels the job and does not report it."""
+        (media,) = self._media("hang.ts")
+        coordinator = JobCoordinator(lease_seconds=0.4, poll_interval=0.05)
+        self.addCleanup(coordinator.close, linger=0)
+        coordinator.start()
+        leases = []
+        lease = coordinator.lease
+        coordinator.lease = lambda worker: leases.append(lease(worker)) or leases[-1]
+        coordinator.add(media.path)
+
+        worker = JobWorker(coordinator.url, FakeScanner(), FakeTranscoder, root=self.root, worker_id="worker-a")
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        while not any(leases):
+            time.sleep(0.01)
+        coordinator.complete(leases[0].lease_id, False, "revoked")
+        coordinator.close(linger=5)
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(worker._results, {})
+
+    def test_jobs_outside_root_refused(self):
+        """Test a worker refuses a job outside the shared storage it was given."""
+        (media,) = self._media("file.ts")
+        coordinator = JobCoordinator(lease_seconds=5.0, poll_interval=0.05)
+        self.addCleanup(coordinator.close, linger=0)
+        coordinator.start()
+
+        worker = JobWorker(coordinator.url, FakeScanner(), FakeTranscoder, root=self.root / "elsewhere")
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        results = coordinator.run([media])
+        coordinator.close(linger=5)
+        thread.join(5)
+
+        self.assertEqual(results, {media.path: False})
+        self.assertFalse(media.path.with_suffix(".done").exists())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import asyncio
+import unittest
+from src.utils.loop_semaphore import LoopSemaphore
+
+class TestLoopSemaphore(unittest.TestCase):
+    def test_bounds_concurrency_on_each_loop(self):
+        """Test the limit holds on every event loop the semaphore is used from."""
+        semaphore = LoopSemaphore(2)
+        running = []
+        peaks = []
+
+        async def job():
+            async with semaphore:
+                running.append(1)
+                peaks.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        async def run_jobs():
+            await asyncio.gather(*(job() for _ in range(5)))
+
+        for _ in range(2):
+            asyncio.run(run_jobs())
+        self.assertEqual(max(peaks), 2)
+        self.assertEqual(len(peaks), 10)
+
+    def test_invalid_value(self):
+        """Test a semaphore must admit at least one holder."""
+        with self.assertRaises(ValueError):
+            LoopSemaphore(0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,12 @@
+import pickle
 import unittest
+from unittest.mock import MagicMock
 from pathlib import Path
 from src.core.media_file import MediaFile
 
+def probe_format(name):
+    return {"format": "matroska,webm"}
+
 class TestMediaFile(unittest.TestCase):
     def test_media_file_initialization(self):
         """Test initialization of MediaFile dataclass."""
@@ -28,5 +33,45 @@ class TestMediaFile(unittest.TestCase):
         with self.assertRaises(ValueError):
             MediaFile(path=test_path, size_gb=-1.0, format=test_format)
 
+    def test_format_probed_lazily(self):
+        """Test the format is probed on first access only."""
+        prober = MagicMock(return_value={"format": "matroska,webm"})
+        media_file = MediaFile(path=Path("/test/file.mkv"), size_gb=2.5, prober=prober)
+
+        prober.assert_not_called()
+        self.assertEqual(media_file.format, "matroska,webm")
+        self.assertEqual(media_file.format, "matroska,webm")
+        prober.assert_called_once_with("format")
+
+    def test_explicit_format_skips_prober(self):
+        """Test a format given to the constructor is never probed."""
+        prober = MagicMock()
+        media_file = MediaFile(path=Path("/test/file.mp4"), size_gb=2.5, format="mp4", prober=prober)
+
+        self.assertEqual(media_file.format, "mp4")
+        prober.assert_not_called()
+
+    def test_repr_and_equality_do_not_probe(self):
+        """Test printing and comparing a lazy media file leave its fields unprobed."""
+        prober = MagicMock(return_value={"format": "matroska,webm"})
+        media_file = MediaFile(path=Path("/test/file.mkv"), size_gb=2.5, prober=prober)
+
+        self.assertIn("format=None", repr(media_file))
+        self.assertEqual(media_file, MediaFile(path=Path("/test/file.mkv"), size_gb=2.5, format="matroska,webm"))
+        self.assertNotEqual(media_file, MediaFile(path=Path("/test/other.mkv"), size_gb=2.5))
+        prober.assert_not_called()
+
+    def test_pickle_keeps_resolved_fields(self):
+        """Test a media file can be pickled, keeping the fields resolved so far."""
+        media_file = MediaFile(path=Path("/test/file.mkv"), size_gb=2.5, prober=probe_format)
+        self.assertEqual(media_file.format, "matroska,webm")
+
+        copy = pickle.loads(pickle.dumps(media_file))
+
+        self.assertEqual(copy.format, "matroska,webm")
+        self.assertIsNone(copy.duration)
+        copy.apply({"duration": 60.0})
+        self.assertEqual(copy.duration, 60.0)
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,47 +1,187 @@
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
 from pathlib import Path
 from src.core.media_scanner import MediaScanner
 from src.core.media_file import MediaFile
+from src.core.scan_filters import extension_filter, min_size_filter
 
 class TestMediaScanner(unittest.TestCase):
     def setUp(self):
         self.scanner = MediaScanner(supported_extensions=(".mp4", ".mkv"))
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
 
-    @patch("os.walk")
-    def test_scan_directory_empty(self, mock_os_walk):
+    def _make_files(self, sizes):
+        """Create files of the given sizes in bytes and return their paths."""
+        paths = []
+        for name, size in sizes.items():
+            path = self.root / name
+            path.write_bytes(b"\x00" * size)
+            paths.append(path)
+        return paths
+
+    def test_scan_directory_empty(self):
         """Test scanning a directory with no files."""
-        mock_os_walk.return_value = [("/test", [], [])]
-        result = self.scanner.scan_directory(Path("/test"))
+        result = self.scanner.scan_directory(self.root)
         self.assertEqual(len(result), 0)
 
-    @patch("os.walk")
-    @patch("src.core.media_scanner.MediaScanner.is_media_file")
-    @patch("src.core.media_scanner.MediaScanner.get_file_size_gb")
-    @patch("src.core.media_scanner.MediaScanner.probe_format")
-    def test_scan_directory_with_files_count(self, mock_probe_format, mock_get_file_size_gb, mock_is_media_file, mock_os_walk):
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_scan_directory_with_files_count(self, mock_probe_media):
         """Test the number of files scanned."""
-        mock_os_walk.return_value = [("/test", [], ["file1.mp4", "file2.mkv"])]
-        mock_is_media_file.side_effect = lambda x: x.suffix in (".mp4", ".mkv")
-        mock_get_file_size_gb.side_effect = [2.5, 1.5]
-        mock_probe_format.side_effect = ["mp4", "mkv"]
+        self._make_files({"file1.mp4": 4, "file2.mkv": 2, "notes.txt": 1})
+        mock_probe_media.return_value = {"format": "mp4"}
 
-        result = self.scanner.scan_directory(Path("/test"))
+        result = self.scanner.scan_directory(self.root)
         self.assertEqual(len(result), 2)
 
-    @patch("os.walk")
-    @patch("src.core.media_scanner.MediaScanner.is_media_file")
-    @patch("src.core.media_scanner.MediaScanner.get_file_size_gb")
-    @patch("src.core.media_scanner.MediaScanner.probe_format")
-    def test_scan_directory_first_file(self, mock_probe_format, mock_get_file_size_gb, mock_is_media_file, mock_os_walk):
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_scan_directory_first_file(self, mock_probe_media):
         """Test the first scanned file."""
-        mock_os_walk.return_value = [("/test", [], ["file1.mp4", "file2.mkv"])]
-        mock_is_media_file.side_effect = lambda x: x.suffix in (".mp4", ".mkv")
-        mock_get_file_size_gb.side_effect = [2.5, 1.5]
-        mock_probe_format.side_effect = ["mp4", "mkv"]
+        (path,) = self._make_files({"file1.mp4": 1024 ** 2})
+        mock_probe_media.return_value = {"format": "mp4"}
+
+        result = self.scanner.scan_directory(self.root)
+        self.assertEqual(result[0], MediaFile(path, 1 / 1024, "mp4"))
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_scan_directory_parallel_keeps_order(self, mock_probe_media):
+        """Test concurrent probing returns files in walk order."""
+        self._make_files({f"file{i}.mp4": 1 for i in range(20)})
+        mock_probe_media.side_effect = lambda path, timeout=None: {"format": path.name}
+
+        scanner = MediaScanner(supported_extensions=(".mp4",), max_workers=8)
+        walk_order = [path.name for path, _ in scanner.walker.walk(self.root)]
+        result = scanner.scan_directory(self.root)
+        self.assertEqual([m.format for m in result], walk_order)
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_iter_directory_is_lazy(self, mock_probe_media):
+        """Test files are probed only as the caller consumes them."""
+        self._make_files({"file1.mp4": 1, "file2.mkv": 1, "file3.mp4": 1})
+        mock_probe_media.return_value = {"format": "mp4"}
+
+        first = next(self.scanner.iter_directory(self.root))
+
+        self.assertEqual(first.path, next(self.scanner.walker.walk(self.root))[0])
+        self.assertEqual(mock_probe_media.call_count, 1)
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_transcoded_outputs_not_scanned(self, mock_probe_media):
+        """Test the transcoder's outputs and pruned directories are left out of a scan."""
+        self._make_files({"film.mkv": 1, "film_transcoded.mkv": 1})
+        (self.root / "@eaDir").mkdir()
+        (self.root / "@eaDir" / "film.mkv").write_bytes(b"\x00")
+        mock_probe_media.return_value = {"format": "matroska,webm"}
+
+        result = self.scanner.scan_directory(self.root)
+        self.assertEqual([m.path for m in result], [self.root / "film.mkv"])
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_filters_skip_probe(self, mock_probe_media):
+        """Test files rejected on stat data are never probed."""
+        self._make_files({"small.mp4": 10, "large.mp4": 2000, "large.mkv": 2000})
+        mock_probe_media.return_value = {"format": "mp4"}
+        scanner = MediaScanner(
+            supported_extensions=(".mp4", ".mkv"),
+            filters=[min_size_filter(1000 / 1024 ** 3), extension_filter([".MP4"])]
+        )
+
+        result = scanner.scan_directory(self.root)
+
+        self.assertEqual([m.path.name for m in result], ["large.mp4"])
+        mock_probe_media.assert_called_once()
+        self.assertEqual(scanner.filtered_count, 2)
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_listing_without_probe(self, mock_probe_media):
+        """Test a scan that never reads the format costs no probes."""
+        self._make_files({"file1.mp4": 1, "file2.mkv": 1})
+        scanner = MediaScanner(supported_extensions=(".mp4", ".mkv"), probe_on_scan=False)
+
+        result = scanner.scan_directory(self.root)
+
+        self.assertEqual(len(result), 2)
+        mock_probe_media.assert_not_called()
+
+    @patch("subprocess.run")
+    def test_probe_media_single_call(self, mock_subprocess_run):
+        """Test one ffprobe call yields container and per-stream details."""
+        mock_subprocess_run.return_value = MagicMock(stdout=json.dumps({
+            "format": {"format_name": "matroska,webm", "duration": "5400.5", "bit_rate": "8000000"},
+            "streams": [
+                {"index": 0, "codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+                 "avg_frame_rate": "24000/1001"},
+                {"index": 1, "codec_type": "audio", "codec_name": "ac3", "bit_rate": "640000"}
+            ]
+        }))
+
+        result = MediaScanner.probe_media(Path("/test/file.mkv"))
+
+        mock_subprocess_run.assert_called_once()
+        self.assertEqual(result["format"], "matroska,webm")
+        self.assertEqual(result["duration"], 5400.5)
+        self.assertEqual(result["bit_rate"], 8000000)
+        self.assertAlmostEqual(result["streams"][0]["frame_rate"], 23.976, places=3)
+        self.assertEqual(result["streams"][1]["bit_rate"], 640000)
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_streams_resolved_with_format(self, mock_probe_media):
+        """Test reading the format also fills in the stream details."""
+        self._make_files({"file1.mkv": 1})
+        mock_probe_media.return_value = {
+            "format": "matroska,webm",
+            "duration": 60.0,
+            "bit_rate": 1000,
+            "streams": [{"index": 0, "codec_type": "video", "codec_name": "h264"}]
+        }
 
-        result = self.scanner.scan_directory(Path("/test"))
-        self.assertEqual(result[0], MediaFile(Path("/test/file1.mp4"), 2.5, "mp4"))
+        (media,) = self.scanner.scan_directory(self.root)
+
+        self.assertEqual(media.video_stream.codec_name, "h264")
+        self.assertEqual(media.duration, 60.0)
+        mock_probe_media.assert_called_once()
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_format_sniffed_without_ffprobe(self, mock_probe_media):
+        """Test a recognizable header is identified without running ffprobe."""
+        (self.root / "file1.mkv").write_bytes(b"\x1a\x45\xdf\xa3" + b"\x00" * 60)
+
+        (media,) = self.scanner.scan_directory(self.root)
+
+        self.assertEqual(media.format, "matroska,webm")
+        mock_probe_media.assert_not_called()
+
+    def test_invalid_max_workers(self):
+        """Test a probe pool needs at least one worker."""
+        with self.assertRaises(ValueError):
+            MediaScanner(supported_extensions=(".mp4",), max_workers=0)
+
+    @patch("subprocess.run")
+    def test_probe_format_timeout(self, mock_subprocess_run):
+        """Test a hung probe is reported as an unknown format."""
+        mock_subprocess_run.side_effect = subprocess.TimeoutExpired("ffprobe", 1.0)
+        result = MediaScanner.probe_format(Path("/test/file.mp4"), timeout=1.0)
+        self.assertEqual(result, "Unknown")
+        self.assertEqual(mock_subprocess_run.call_args.kwargs["timeout"], 1.0)
+
+    @patch("subprocess.run")
+    def test_hung_file_probed_once(self, mock_subprocess_run):
+        """Test a file whose probe times out is not probed again for each field read afterwards."""
+        mock_subprocess_run.side_effect = subprocess.TimeoutExpired("ffprobe", 1.0)
+        (path,) = self._make_files({"file1.mp4": 64})
+
+        media = self.scanner.scan_file(path)
+        fields = (media.format, media.duration, media.bit_rate, media.streams, media.video_stream)
+
+        self.assertEqual(fields, ("Unknown", None, None, None, None))
+        self.assertEqual(mock_subprocess_run.call_count, 1)
 
     def test_is_media_file_true(self):
         """Test if a valid media file is recognized."""
@@ -53,5 +193,68 @@ class TestMediaScanner(unittest.TestCase):
         result = self.scanner.is_media_file(Path("/test/file.txt"))
         self.assertFalse(result)
 
+    def test_async_scan_reused_across_event_loops(self):
+        """Test one scanner can run async scans on successive event loops."""
+        scanner = MediaScanner(supported_extensions=(".mp4",), max_workers=1)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("a.mp4", "b.mp4", "c.mp4"):
+                (Path(tmp_dir) / name).write_bytes(b"\x00" * 4)
+
+            async def probe(file_path, timeout=None):
+                await asyncio.sleep(0.01)
+                return {"format": "mov,mp4,m4a,3gp,3g2,mj2", "duration": 1.0, "bit_rate": None, "streams": []}
+
+            with patch.object(MediaScanner, "probe_media_async", side_effect=probe):
+                for _ in range(2):
+                    self.assertEqual(len(asyncio.run(scanner.scan_directory_async(Path(tmp_dir)))), 3)
+
+class TestMediaScannerAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.scanner = MediaScanner(supported_extensions=(".mp4", ".mkv"), max_workers=2)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+
+    async def test_iter_directory_async_probes_every_field(self):
+        """Test the async scan probes each file once, in order, and leaves nothing to probe lazily."""
+        for name in ("b.mkv", "a.mp4", "notes.txt"):
+            (self.root / name).write_bytes(b"\x00" * 4)
+        probed = {
+            "format": "mov,mp4,m4a,3gp,3g2,mj2",
+            "duration": 60.0,
+            "bit_rate": 1000,
+            "streams": [{"index": 0, "codec_type": "video", "codec_name": "h264"}]
+        }
+        walk_order = [path.name for path, _ in self.scanner.walker.walk(self.root)]
+        with patch.object(MediaScanner, "probe_media_async", AsyncMock(return_value=probed)) as mock_probe, \
+                patch.object(MediaScanner, "probe_media") as mock_sync_probe:
+            result = await self.scanner.scan_directory_async(self.root)
+
+            self.assertEqual([m.path.name for m in result], walk_order)
+            self.assertEqual(result[0].duration, 60.0)
+            self.assertEqual(result[0].video_stream.codec_name, "h264")
+            self.assertEqual(mock_probe.await_count, 2)
+            mock_sync_probe.assert_not_called()
+
+    async def test_probe_media_async_timeout_stops_probe(self):
+        """Test a hung probe is stopped and reported as Unknown."""
+        command = [sys.executable, "-c", "import time; time.sleep(30)"]
+        with patch.object(MediaScanner, "build_probe_command", return_value=command):
+            started = time.monotonic()
+            result = await MediaScanner.probe_media_async(self.root / "a.mp4", timeout=0.5)
+
+        self.assertEqual(result, {"format": "Unknown", "duration": None, "bit_rate": None, "streams": None})
+        self.assertLess(time.monotonic() - started, 10)
+
+    async def test_probe_media_async_parses_output(self):
+        """Test ffprobe JSON from an asyncio subprocess is parsed like the sync probe."""
+        output = json.dumps({"format": {"format_name": "matroska,webm", "duration": "12.5"}, "streams": []})
+        command = [sys.executable, "-c", f"print({output!r})"]
+        with patch.object(MediaScanner, "build_probe_command", return_value=command):
+            result = await MediaScanner.probe_media_async(self.root / "a.mkv")
+
+        self.assertEqual(result["format"], "matroska,webm")
+        self.assertEqual(result["duration"], 12.5)
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from pathlib import Path
+from src.core.ffmpeg_process import FFmpegResult
+from src.core.media_file import MediaFile, StreamInfo
+from src.core.output_verifier import OutputVerifier
+
+OUTPUT = Path("/test/movie_transcoded.mkv")
+
+def comparison_stderr(ssim: float, psnr: float) -> str:
+    """The summary lines the ssim and psnr filters print at the end of a run."""
+    return (
+        f"[Parsed_ssim_3 @ 0x1] SSIM Y:{ssim:.6f} (20.0) U:0.99 (21.0) V:0.99 (21.0) All:{ssim:.6f} (20.5)\n"
+        f"[Parsed_psnr_4 @ 0x2] PSNR y:{psnr:.2f} u:45.00 v:45.00 average:{psnr:.2f} min:30.00 max:50.00\n"
+    )
+
+class FakeFFmpeg:
+    """Records comparison commands and answers each with one of a list of scores, in any order."""
+
+    def __init__(self, scores):
+        self.scores = list(scores)
+        self.commands = []
+
+    def __call__(self, command):
+        self.commands.append(command)
+        ssim, psnr = self.scores.pop()
+        return FFmpegResult(0, comparison_stderr(ssim, psnr), 1.0)
+
+def probe_result(duration: float, codec_types=("video", "audio")) -> dict:
+    return {
+        "format": "matroska,webm",
+        "duration": duration,
+        "streams": [{"index": idx, "codec_type": codec_type} for idx, codec_type in enumerate(codec_types)]
+    }
+
+class TestOutputVerifier(unittest.TestCase):
+    def setUp(self):
+        self.media_file = MediaFile(
+            path=Path("/test/movie.ts"),
+            size_gb=4.0,
+            duration=600.0,
+            streams=[StreamInfo(0, "video", "mpeg2video"), StreamInfo(1, "audio", "ac3"), StreamInfo(2, "audio", "ac3")]
+        )
+
+    def test_matching_output_passes(self):
+        """Test an output with the source's duration, streams and good sampled scores passes."""
+        ffmpeg = FakeFFmpeg([(0.98, 41.0), (0.97, 39.5), (0.99, 43.0)])
+        verifier = OutputVerifier(ffmpeg, lambda path: probe_result(600.4), 3, 5.0, min_ssim=0.95, min_psnr=35.0)
+
+        verification = verifier.verify(self.media_file, OUTPUT)
+
+        self.assertTrue(verification.passed, verification.problems)
+        self.assertEqual(len(ffmpeg.commands), 3)
+        self.assertAlmostEqual(verification.ssim, 0.97)
+        self.assertAlmostEqual(verification.psnr, 39.5)
+        self.assertAlmostEqual(verification.duration_delta, 0.4)
+
+    def test_worst_clip_below_threshold_fails(self):
+        """Test one poor clip fails the output even when the others score well."""
+        ffmpeg = FakeFFmpeg([(0.99, 45.0), (0.91, 31.0), (0.99, 45.0)])
+        verifier = OutputVerifier(ffmpeg, lambda path: probe_result(600.0), 3, 5.0, min_ssim=0.95)
+
+        verification = verifier.verify(self.media_file, OUTPUT)
+
+        self.assertFalse(verification.passed)
+        self.assertEqual(verification.problems, ["SSIM 0.9100 is below 0.95"])
+
+    def test_truncated_or_incomplete_output_fails(self):
+        """Test a short output and one missing its audio are caught without comparing clips."""
+        ffmpeg = FakeFFmpeg([(1.0, 50.0)])
+        verifier = OutputVerifier(ffmpeg, lambda path: probe_result(420.0, ("video",)), 2, 5.0)
+
+        verification = verifier.verify(self.media_file, OUTPUT, compare_quality=False)
+
+        self.assertEqual(ffmpeg.commands, [])
+        self.assertEqual(verification.problems, [
+            "output lasts 420.0s, source 600.0s",
+            "output has 0 audio streams, source 2"
+        ])
+
+    def test_unreadable_output_fails(self):
+        """Test an output ffprobe cannot read fails verification."""
+        verifier = OutputVerifier(FakeFFmpeg([]), lambda path: {"format": "Unknown"}, 2, 5.0)
+        self.assertEqual(verifier.verify(self.media_file, OUTPUT).problems, ["output could not be probed"])
+
+    def test_failed_comparison_fails(self):
+        """Test a clip ffmpeg could not compare fails verification instead of passing unmeasured."""
+        verifier = OutputVerifier(
+            lambda command: FFmpegResult(1, "Invalid data found when processing input"),
+            lambda path: probe_result(600.0), 2, 5.0
+        )
+        self.assertEqual(verifier.verify(self.media_file, OUTPUT).problems, ["a sampled clip could not be compared"])
+
+    def test_build_compare_command(self):
+        """Test both inputs are clipped to the same span and the output is scaled to the source."""
+        verifier = OutputVerifier(FakeFFmpeg([]), lambda path: {}, 2, 5.0)
+
+        command = verifier.build_compare_command(self.media_file.path, OUTPUT, 120.0)
+
+        self.assertEqual(command[command.index(str(OUTPUT)) - 5:command.index(str(OUTPUT))],
+                         ["-ss", "120.000", "-t", "5.0", "-i"])
+        self.assertEqual(command[command.index(str(self.media_file.path)) - 5:command.index(str(self.media_file.path))],
+                         ["-ss", "120.000", "-t", "5.0", "-i"])
+        self.assertIn("scale2ref", command[command.index("-filter_complex") + 1])
+        self.assertEqual(command[-3:], ["-f", "null", "-"])
+        self.assertEqual(verifier.sample_offsets(600.0), [198.33333333333334, 396.6666666666667])
+
+if __name__ == "__main__":
+    unittest.main()
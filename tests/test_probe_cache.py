@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from src.core.media_scanner import MediaScanner
+from src.core.probe_cache import ProbeCache
+
+class TestProbeCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.cache = ProbeCache(self.root / "cache" / "probe.sqlite3")
+        self.addCleanup(self.cache.close)
+        self.media = self.root / "media" / "file.mp4"
+        self.media.parent.mkdir()
+        self.media.write_bytes(b"\x00" * 16)
+
+    def test_hit_for_unchanged_file(self):
+        """Test a cached entry is returned while the file is unchanged."""
+        self.cache.put(self.media, self.media.stat(), {"format": "mp4"})
+        self.assertEqual(self.cache.get(self.media, self.media.stat()), {"format": "mp4"})
+
+    def test_miss_after_file_changes(self):
+        """Test an entry is ignored once the file's size changes."""
+        self.cache.put(self.media, self.media.stat(), {"format": "mp4"})
+        self.media.write_bytes(b"\x00" * 32)
+        self.assertIsNone(self.cache.get(self.media, self.media.stat()))
+
+    def test_evict_missing(self):
+        """Test entries for files gone since a rescan are evicted, but not those of files it skipped."""
+        other = self.media.with_name("gone.mkv")
+        skipped = self.media.with_name("excluded.mkv")
+        skipped.write_bytes(b"\x00" * 16)
+        self.cache.put(self.media, self.media.stat(), {"format": "mp4"})
+        self.cache.put(other, self.media.stat(), {"format": "mkv"})
+        self.cache.put(skipped, skipped.stat(), {"format": "mkv"})
+
+        evicted = self.cache.evict_missing(self.media.parent, [self.media])
+
+        self.assertEqual(evicted, 1)
+        self.assertIsNone(self.cache.get(other, self.media.stat()))
+        self.assertIsNotNone(self.cache.get(self.media, self.media.stat()))
+        self.assertIsNotNone(self.cache.get(skipped, skipped.stat()))
+
+    def test_clear(self):
+        """Test clearing the cache drops every entry."""
+        self.cache.put(self.media, self.media.stat(), {"format": "mp4"})
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(self.media, self.media.stat()))
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_scanner_skips_probe_on_hit(self, mock_probe_media):
+        """Test a rescan of an unchanged file does not run ffprobe."""
+        mock_probe_media.return_value = {"format": "mov,mp4,m4a,3gp,3g2,mj2", "streams": []}
+        scanner = MediaScanner(supported_extensions=(".mp4",), cache=self.cache)
+
+        first = scanner.scan_directory(self.media.parent)
+        second = scanner.scan_directory(self.media.parent)
+
+        self.assertEqual(mock_probe_media.call_count, 1)
+        self.assertEqual(first, second)
+
+    @patch("src.core.media_scanner.MediaScanner.probe_media")
+    def test_relative_scan_evicts_deleted_file(self, mock_probe_media):
+        """Test a scan of a relative directory shares entries with an absolute one and evicts deleted files."""
+        mock_probe_media.return_value = {"format": "mov,mp4,m4a,3gp,3g2,mj2", "streams": []}
+        gone = self.media.with_name("gone.mp4")
+        gone.write_bytes(b"\x00" * 16)
+        scanner = MediaScanner(supported_extensions=(".mp4",), cache=self.cache)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.media.parent)
+
+        scanner.scan_directory(Path("."))
+        gone.unlink()
+        scanner.scan_directory(Path("."))
+
+        self.assertIsNone(self.cache.get(gone, self.media.stat()))
+        self.assertIsNotNone(self.cache.get(self.media, self.media.stat()))
+        scanner.scan_directory(self.media.parent)
+        self.assertEqual(mock_probe_media.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
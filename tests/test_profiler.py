@@ -0,0 +1,64 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from src.core.directory_walker import DirectoryWalker
+from src.utils import profiler
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(profiler.disable)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+
+    def test_disabled_spans_are_shared_no_ops(self):
+        """Test spans cost no allocation and record nothing while profiling is off."""
+        self.assertIs(profiler.span("scan.walk"), profiler.span("transcode.ffmpeg"))
+        with profiler.span("scan.walk"):
+            pass
+        profiler.record("transcode.queue_wait", 0, 10)
+        self.assertFalse(profiler.is_enabled())
+
+    def test_spans_aggregated_per_phase(self):
+        """Test spans from several threads are counted and totalled by phase."""
+        spans = profiler.Profiler()
+        profiler.enable(spans)
+
+        def work():
+            for _ in range(3):
+                with profiler.span("scan.stat"):
+                    pass
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        profiler.record("transcode.queue_wait", 1_000, 2_500_000)
+
+        phases = spans.phases()
+        self.assertEqual(phases["scan.stat"].count, 12)
+        self.assertEqual(phases["transcode.queue_wait"].total_ns, 2_499_000)
+        self.assertEqual(phases["transcode.queue_wait"].histogram(), {"<10ms": 1})
+        self.assertIn("transcode.queue_wait", spans.summary())
+
+    def test_chrome_trace_export(self):
+        """Test the walker's spans are written as complete trace events with thread names."""
+        (self.root / "show").mkdir()
+        (self.root / "show" / "episode.mkv").write_bytes(b"\x00")
+        spans = profiler.Profiler()
+        profiler.enable(spans)
+        list(DirectoryWalker((".mkv",)).walk(self.root))
+        trace_file = self.root / "trace.json"
+
+        spans.write_chrome_trace(trace_file)
+
+        events = json.loads(trace_file.read_text())["traceEvents"]
+        complete = [event for event in events if event["ph"] == "X"]
+        self.assertEqual(sorted(event["name"] for event in complete), ["scan.stat", "scan.walk", "scan.walk"])
+        self.assertTrue(all(event["cat"] == "scan" and event["dur"] >= 0 for event in complete))
+        self.assertEqual([event["name"] for event in events if event["ph"] == "M"], ["thread_name"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from pathlib import Path
+from src.core.ffmpeg_process import FFmpegResult
+from src.core.media_file import MediaFile
+from src.core.sample_estimator import SampleEstimator
+
+CODEC_ARGS = ["-c:v", "libx264", "-crf", "23"]
+
+class FakeFFmpeg:
+    """Records sample commands and writes a sample of a fixed size for each."""
+
+    def __init__(self, sample_bytes: int, returncode: int = 0):
+        self.sample_bytes = sample_bytes
+        self.returncode = returncode
+        self.commands = []
+
+    def __call__(self, command):
+        self.commands.append(command)
+        if self.returncode == 0:
+            Path(command[-1]).write_bytes(b"\x00" * self.sample_bytes)
+        return FFmpegResult(self.returncode, "Invalid data found when processing input", 2.0)
+
+class TestSampleEstimator(unittest.TestCase):
+    def setUp(self):
+        self.media_file = MediaFile(path=Path("/test/movie.ts"), size_gb=8.0, duration=3600.0)
+
+    def test_extrapolates_from_samples(self):
+        """Test sample sizes and CPU time are scaled up to the file's duration."""
+        ffmpeg = FakeFFmpeg(sample_bytes=1000)
+        estimator = SampleEstimator(ffmpeg, sample_count=3, sample_seconds=10.0)
+
+        estimate = estimator.estimate(self.media_file, CODEC_ARGS, threads=4)
+
+        self.assertEqual(len(ffmpeg.commands), 3)
+        self.assertEqual(estimate.output_bytes, 3000 * 120)
+        self.assertAlmostEqual(estimate.cpu_seconds, 6.0 * 120)
+        self.assertEqual(estimate.sampled_seconds, 30.0)
+        offsets = [float(command[command.index("-ss") + 1]) for command in ffmpeg.commands]
+        self.assertEqual(offsets, [897.5, 1795.0, 2692.5])
+        self.assertTrue(all(command[command.index("-threads") + 1] == "4" for command in ffmpeg.commands))
+
+    def test_estimates_are_reused(self):
+        """Test deciding on the same file again does not repeat its samples."""
+        ffmpeg = FakeFFmpeg(sample_bytes=1000)
+        estimator = SampleEstimator(ffmpeg, sample_count=2, sample_seconds=10.0)
+
+        first = estimator.estimate(self.media_file, CODEC_ARGS, threads=2)
+        second = estimator.estimate(self.media_file, CODEC_ARGS, threads=2)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(ffmpeg.commands), 2)
+
+    def test_short_or_failing_files_are_not_estimated(self):
+        """Test files too short to sample, or whose samples fail, have no estimate."""
+        ffmpeg = FakeFFmpeg(sample_bytes=1000)
+        estimator = SampleEstimator(ffmpeg, sample_count=3, sample_seconds=10.0)
+        short = MediaFile(path=Path("/test/clip.ts"), size_gb=1.0, duration=45.0)
+        self.assertIsNone(estimator.estimate(short, CODEC_ARGS, threads=2))
+        self.assertEqual(ffmpeg.commands, [])
+
+        failing = SampleEstimator(FakeFFmpeg(sample_bytes=0, returncode=1), sample_count=3, sample_seconds=10.0)
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(failing.estimate(self.media_file, CODEC_ARGS, threads=2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from src.core.ffmpeg_process import FFmpegResult
+from src.core.segment_encoder import SegmentEncoder
+
+VIDEO_ARGS = ["-c:v", "libx264", "-crf", "23"]
+AUDIO_ARGS = ["-c:a", "aac"]
+
+class FakeFFmpeg:
+    """Records FFmpeg commands and fakes the segments a split would produce."""
+
+    def __init__(self, segments: int, fail_on: str = None):
+        self.segments = segments
+        self.fail_on = fail_on
+        self.commands = []
+        self.concat_list = None
+
+    def __call__(self, command):
+        self.commands.append(command)
+        if "segment" in command:
+            pattern = Path(command[-1])
+            for idx in range(self.segments):
+                (pattern.parent / (pattern.name % idx)).write_bytes(b"")
+        if "concat" in command:
+            self.concat_list = Path(command[command.index("concat") + 4]).read_text()
+        if self.fail_on and any(self.fail_on in arg for arg in command):
+            return FFmpegResult(1, f"failed on {self.fail_on}", 1.0)
+        return FFmpegResult(0, "", 1.0)
+
+class TestSegmentEncoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.root = Path(self.tmp_dir.name)
+        self.input_file = self.root / "movie.mkv"
+        self.output_file = self.root / "movie_transcoded.mkv"
+
+    def test_encodes_each_segment_and_concats_in_order(self):
+        """Test every segment is encoded and joined in order with the source audio."""
+        ffmpeg = FakeFFmpeg(segments=3)
+        encoder = SegmentEncoder(ffmpeg, segment_seconds=60, max_workers=2)
+
+        result = encoder.encode(self.input_file, self.output_file, VIDEO_ARGS, AUDIO_ARGS, 8, ["-y"])
+
+        self.assertEqual(result, FFmpegResult(0, "", 5.0))
+        self.assertEqual(len(ffmpeg.commands), 5)
+        segment_commands = ffmpeg.commands[1:4]
+        self.assertTrue(all(cmd[cmd.index("-threads") + 1] == "4" for cmd in segment_commands))
+        listed = [line.split("'")[1] for line in ffmpeg.concat_list.splitlines()]
+        self.assertEqual([Path(p).name for p in listed], [f"encoded_{i:05d}.mkv" for i in range(3)])
+        concat = ffmpeg.commands[-1]
+        self.assertEqual(concat[-1], str(self.output_file))
+        self.assertIn("1:a?", concat)
+
+    def test_concurrency_capped_by_threads(self):
+        """Test no more segments are encoded at once than the job has threads."""
+        ffmpeg = FakeFFmpeg(segments=6)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def run(command):
+            with lock:
+                running.append(command)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(command)
+            return ffmpeg(command)
+
+        encoder = SegmentEncoder(run, segment_seconds=60, max_workers=4)
+        with self.assertLogs(level="WARNING") as logs:
+            encoder.encode(self.input_file, self.output_file, VIDEO_ARGS, AUDIO_ARGS, 2, ["-y"])
+
+        self.assertEqual(max(peak), 2)
+        self.assertIn("on 2 workers instead of 4", logs.output[0])
+        self.assertTrue(all(cmd[cmd.index("-threads") + 1] == "1" for cmd in ffmpeg.commands[1:7]))
+
+    def test_segment_failure_is_returned(self):
+        """Test a failed segment stops the join and reports its error."""
+        ffmpeg = FakeFFmpeg(segments=2, fail_on="encoded_00001")
+        encoder = SegmentEncoder(ffmpeg, segment_seconds=60, max_workers=2)
+
+        result = encoder.encode(self.input_file, self.output_file, VIDEO_ARGS, AUDIO_ARGS, 4, ["-y"])
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stderr, "failed on encoded_00001")
+        self.assertFalse(any("concat" in cmd for cmd in ffmpeg.commands))
+
+    def test_work_directory_removed(self):
+        """Test intermediate segments are cleaned up after the encode."""
+        encoder = SegmentEncoder(FakeFFmpeg(segments=2), segment_seconds=60, max_workers=2)
+        encoder.encode(self.input_file, self.output_file, VIDEO_ARGS, AUDIO_ARGS, 4, ["-y"])
+        self.assertEqual(list(self.root.iterdir()), [])
+
+    def test_invalid_segment_seconds(self):
+        """Test segments must have a positive length."""
+        with self.assertRaises(ValueError):
+            SegmentEncoder(FakeFFmpeg(segments=1), segment_seconds=0, max_workers=2)
+
+if __name__ == "__main__":
+    unittest.main()
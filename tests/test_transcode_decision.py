@@ -0,0 +1,58 @@
+import unittest
+from pathlib import Path
+from src.core.media_file import MediaFile, StreamInfo
+from src.core.transcode_decision import TranscodeAction, decide_action
+
+class TestTranscodeDecision(unittest.TestCase):
+    @staticmethod
+    def _media(video_codec="h264", audio_codec="aac", fmt="matroska,webm", video_bit_rate=4_000_000):
+        """Build a probed two-hour 1080p24 file with one audio stream."""
+        return MediaFile(
+            path=Path("/test/file.mkv"),
+            size_gb=8.0,
+            format=fmt,
+            duration=7200.0,
+            bit_rate=video_bit_rate + 640_000,
+            streams=[
+                StreamInfo(0, "video", video_codec, 1920, 1080, video_bit_rate, 24.0),
+                StreamInfo(1, "audio", audio_codec, bit_rate=640_000)
+            ]
+        )
+
+    def test_unprobed_file_is_reencoded(self):
+        """Test a file without stream details falls back to a full re-encode."""
+        decision = decide_action(MediaFile(path=Path("/test/file.avi"), size_gb=8.0, format="avi"))
+        self.assertEqual(decision.action, TranscodeAction.REENCODE)
+
+    def test_other_video_codec_is_reencoded(self):
+        """Test non-H.264 video is re-encoded with an estimated output size."""
+        decision = decide_action(self._media(video_codec="hevc"))
+        self.assertEqual(decision.action, TranscodeAction.REENCODE)
+        self.assertEqual(decision.estimated_output_bytes, int(7200 * (4_000_000 + 128_000) / 8))
+
+    def test_high_bit_rate_h264_is_reencoded(self):
+        """Test H.264 far above the expected CRF bitrate is still re-encoded."""
+        decision = decide_action(self._media(video_bit_rate=30_000_000))
+        self.assertEqual(decision.action, TranscodeAction.REENCODE)
+
+    def test_other_audio_codec_copies_video(self):
+        """Test compliant video is copied while the audio is re-encoded."""
+        media = self._media(audio_codec="ac3")
+        decision = decide_action(media)
+        self.assertEqual(decision.action, TranscodeAction.COPY_VIDEO)
+        self.assertEqual(decision.estimated_savings_bytes(media), int((640_000 - 128_000) * 7200 / 8))
+
+    def test_compliant_streams_in_other_container_are_remuxed(self):
+        """Test H.264/AAC in MP4 is remuxed without re-encoding."""
+        decision = decide_action(self._media(fmt="mov,mp4,m4a,3gp,3g2,mj2"))
+        self.assertEqual(decision.action, TranscodeAction.REMUX)
+
+    def test_compliant_matroska_is_skipped(self):
+        """Test H.264/AAC already in Matroska is skipped."""
+        media = self._media()
+        decision = decide_action(media)
+        self.assertEqual(decision.action, TranscodeAction.SKIP)
+        self.assertEqual(decision.estimated_savings_bytes(media), 0)
+
+if __name__ == "__main__":
+    unittest.main()
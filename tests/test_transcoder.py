@@ -1,31 +1,178 @@
+import asyncio
+import errno
+import io
+import json
+import os
+import sys
+import tempfile
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from pathlib import Path
 from src.core.transcoder import Transcoder
-from src.core.media_file import MediaFile
+from src.core.ffmpeg_process import FFmpegResult
+from src.core.media_file import MediaFile, StreamInfo
+from src.core.transcode_metrics import MetricsRecorder
+from src.core.transcode_decision import TranscodeAction
 
 class TestTranscoder(unittest.TestCase):
     def setUp(self):
         self.transcoder = Transcoder(threads=4, overwrite=True)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
 
-    @patch("subprocess.run")
-    def test_transcode_successful(self, mock_subprocess_run):
+    @staticmethod
+    def _mock_process(returncode: int, stderr: str = "", stdout: str = ""):
+        """Build a stand-in for a finished ffmpeg process that is not our child."""
+        process = MagicMock(returncode=returncode, pid=999999)
+        process.stdout = io.BytesIO(stdout.encode())
+        process.stderr = io.BytesIO(stderr.encode())
+        return process
+
+    def _popen_writing_output(self, mock_popen, returncode: int, stdout: str = ""):
+        """Make each mocked ffmpeg run write a small file to its output path."""
+        def popen(command, **kwargs):
+            Path(command[-1]).write_bytes(b"\x00" * 1024)
+            return self._mock_process(returncode, stdout=stdout)
+        mock_popen.side_effect = popen
+
+    @patch("subprocess.Popen")
+    def test_transcode_successful(self, mock_popen):
         """Test successful transcoding."""
-        mock_subprocess_run.return_value = MagicMock(returncode=0)
-        media_file = MediaFile(path=Path("/test/file.mp4"), size_gb=2.5, format="mp4")
+        self._popen_writing_output(mock_popen, 0)
+        media_file = MediaFile(path=self.root / "file.mp4", size_gb=2.5, format="mp4")
 
         result = self.transcoder.transcode(media_file)
         self.assertTrue(result)
 
-    @patch("subprocess.run")
-    def test_transcode_failure(self, mock_subprocess_run):
+        command = mock_popen.call_args.args[0]
+        self.assertEqual(command[-1], str(self.root / "file_transcoded.mkv.part"))
+        self.assertTrue((self.root / "file_transcoded.mkv").exists())
+        self.assertFalse((self.root / "file_transcoded.mkv.part").exists())
+
+    @patch("subprocess.Popen")
+    def test_scratch_output_copied_across_devices(self, mock_popen):
+        """Test an output written to a scratch directory on another device is copied into place."""
+        self._popen_writing_output(mock_popen, 0)
+        scratch_dir = self.root / "scratch"
+        transcoder = Transcoder(threads=4, overwrite=True, scratch_dir=scratch_dir)
+        media_file = MediaFile(path=self.root / "file.mp4", size_gb=2.5, format="mp4")
+        real_replace = os.replace
+
+        def replace(src, dst):
+            if Path(src).parent == scratch_dir:
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            real_replace(src, dst)
+
+        with patch("src.core.transcoder.os.replace", side_effect=replace):
+            self.assertTrue(transcoder.transcode(media_file))
+
+        command = mock_popen.call_args.args[0]
+        self.assertEqual(Path(command[-1]).parent, scratch_dir)
+        self.assertEqual((self.root / "file_transcoded.mkv").stat().st_size, 1024)
+        self.assertEqual(list(scratch_dir.iterdir()), [])
+        self.assertFalse((self.root / "file_transcoded.mkv.part").exists())
+
+    def test_share_output_with_duplicate(self):
+        """Test a duplicate gets the transcoded output without running ffmpeg again."""
+        original = MediaFile(path=self.root / "a" / "movie.ts", size_gb=20.0)
+        duplicate = MediaFile(path=self.root / "b" / "movie.ts", size_gb=20.0)
+        duplicate.path.parent.mkdir()
+        output = self.transcoder.generate_output_filename(original.path)
+        output.parent.mkdir()
+        output.write_bytes(b"\x00" * 1024)
+
+        with patch("src.core.transcoder.os.link", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            self.assertTrue(self.transcoder.share_output(original, duplicate))
+
+        shared = self.transcoder.generate_output_filename(duplicate.path)
+        self.assertEqual(shared.read_bytes(), output.read_bytes())
+        self.assertEqual(sorted(p.name for p in shared.parent.iterdir()), ["movie_transcoded.mkv"])
+
+    @patch("subprocess.Popen")
+    def test_unverified_output_rejected(self, mock_popen):
+        """Test an output failing sampled verification is discarded when rejection is enabled."""
+        def popen(command, **kwargs):
+            if command[-1].endswith(".part"):
+                Path(command[-1]).write_bytes(b"\x00" * 1024)
+                return self._mock_process(0)
+            return self._mock_process(0, "[Parsed_ssim_3 @ 0x1] SSIM All:0.800000 (7.0)\n"
+                                         "[Parsed_psnr_4 @ 0x2] PSNR average:24.00 min:20.00 max:30.00\n")
+        mock_popen.side_effect = popen
+        transcoder = Transcoder(threads=4, overwrite=True, verify_samples=2, min_ssim=0.95, reject_unverified=True)
+        transcoder.verifier.probe = lambda path: {
+            "format": "matroska,webm", "duration": 60.0,
+            "streams": [{"index": 0, "codec_type": "video"}]
+        }
+        media_file = MediaFile(
+            path=self.root / "file.mp4", size_gb=2.5, format="mp4", duration=60.0,
+            streams=[StreamInfo(0, "video", "mpeg4")]
+        )
+
+        self.assertFalse(transcoder.transcode(media_file))
+        self.assertEqual(list(self.root.iterdir()), [])
+        self.assertEqual(transcoder.verification_counts["rejected"], 1)
+        self.assertEqual(mock_popen.call_count, 3)
+
+    @patch("subprocess.Popen")
+    def test_transcode_failure(self, mock_popen):
         """Test transcoding failure."""
-        mock_subprocess_run.side_effect = subprocess.CalledProcessError(1, "ffmpeg")
+        mock_popen.return_value = self._mock_process(1, "Invalid data found when processing input")
         media_file = MediaFile(path=Path("/test/file.mp4"), size_gb=2.5, format="mp4")
 
         result = self.transcoder.transcode(media_file)
         self.assertFalse(result)
 
+    @patch("subprocess.Popen")
+    def test_failed_transcode_leaves_no_output(self, mock_popen):
+        """Test a failed encode discards its partial file and keeps the previous output."""
+        self._popen_writing_output(mock_popen, 1)
+        (self.root / "file_transcoded.mkv").write_bytes(b"previous")
+        media_file = MediaFile(path=self.root / "file.mp4", size_gb=2.5, format="mp4")
+
+        self.assertFalse(self.transcoder.transcode(media_file))
+        self.assertEqual((self.root / "file_transcoded.mkv").read_bytes(), b"previous")
+        self.assertFalse((self.root / "file_transcoded.mkv.part").exists())
+
+    @patch("subprocess.Popen")
+    def test_journal_records_job_outcome(self, mock_popen):
+        """Test a transcode is marked running and then done or failed in the journal."""
+        journal = MagicMock()
+        transcoder = Transcoder(threads=4, overwrite=True, journal=journal)
+        media_file = MediaFile(path=self.root / "file.mp4", size_gb=2.5, format="mp4")
+
+        self._popen_writing_output(mock_popen, 0)
+        transcoder.transcode(media_file)
+        journal.mark_running.assert_called_once_with(media_file.path)
+        journal.mark_done.assert_called_once_with(media_file.path)
+
+        mock_popen.side_effect = None
+        mock_popen.return_value = self._mock_process(1, "Conversion failed!")
+        transcoder.transcode(media_file)
+        journal.mark_failed.assert_called_once_with(media_file.path, "Conversion failed!")
+
+    @patch("subprocess.Popen")
+    def test_transcode_ffmpeg_missing(self, mock_popen):
+        """Test a missing ffmpeg binary is reported as a failure."""
+        mock_popen.side_effect = FileNotFoundError("ffmpeg")
+        media_file = MediaFile(path=Path("/test/file.mp4"), size_gb=2.5, format="mp4")
+
+        self.assertFalse(self.transcoder.transcode(media_file))
+
+    @patch("subprocess.Popen")
+    def test_cancel_refuses_new_jobs(self, mock_popen):
+        """Test a cancelled transcoder terminates running jobs and starts no more."""
+        running = MagicMock()
+        running.poll.return_value = None
+        self.transcoder._processes.add(running)
+
+        self.transcoder.cancel()
+        result = self.transcoder.transcode(MediaFile(path=Path("/test/file.mp4"), size_gb=2.5, format="mp4"))
+
+        running.terminate.assert_called_once()
+        mock_popen.assert_not_called()
+        self.assertFalse(result)
+
     def test_generate_output_filename(self):
         """Test output filename generation."""
         input_file = Path("/test/file.mp4")
@@ -33,6 +180,16 @@ class TestTranscoder(unittest.TestCase):
         result = self.transcoder.generate_output_filename(input_file)
         self.assertEqual(result, expected_output)
 
+    def test_ffmpeg_logs_of_same_named_sources_kept_apart(self):
+        """Test sources with the same name in different directories get separate ffmpeg logs."""
+        transcoder = Transcoder(threads=4, overwrite=True, ffmpeg_log_dir=self.root / "logs")
+        first = transcoder._log_path(MediaFile(path=Path("/shows/a/episode.mkv"), size_gb=1.0))
+        second = transcoder._log_path(MediaFile(path=Path("/shows/b/episode.mkv"), size_gb=1.0))
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(first.parent, self.root / "logs")
+        self.assertTrue(first.name.startswith("episode_") and first.name.endswith(".ffmpeg.log"))
+
     def test_build_ffmpeg_command(self):
         """Test FFmpeg command generation."""
         input_file = Path("/test/file.mp4")
@@ -47,11 +204,249 @@ class TestTranscoder(unittest.TestCase):
             "-crf", "23",
             "-c:a", "aac",
             "-b:a", "128k",
+            "-threads", "4",
             "-f", "matroska",
             "-y", str(output_file)
         ]
 
         self.assertEqual(result, expected_command)
 
+    def test_build_ffmpeg_command_thread_override(self):
+        """Test a per-job thread count replaces the configured default."""
+        result = self.transcoder.build_ffmpeg_command(Path("/test/file.mp4"), Path("/test/out.mkv"), threads=12)
+        self.assertEqual(result[result.index("-threads") + 1], "12")
+
+    def test_should_split_above_threshold(self):
+        """Test only files above the split threshold are encoded in segments."""
+        transcoder = Transcoder(threads=4, overwrite=True, split_threshold_gb=40.0)
+        self.assertTrue(transcoder.should_split(MediaFile(path=Path("/test/big.mkv"), size_gb=60.0, format="mkv")))
+        self.assertFalse(transcoder.should_split(MediaFile(path=Path("/test/small.mkv"), size_gb=8.0, format="mkv")))
+        self.assertFalse(self.transcoder.should_split(MediaFile(path=Path("/test/big.mkv"), size_gb=60.0, format="mkv")))
+
+    @patch("src.core.segment_encoder.SegmentEncoder.encode")
+    def test_transcode_large_file_in_segments(self, mock_encode):
+        """Test a file above the split threshold goes through the segment encoder."""
+        def encode(input_file, output_file, *args):
+            output_file.write_bytes(b"\x00" * 1024)
+            return FFmpegResult(0, "")
+        mock_encode.side_effect = encode
+        transcoder = Transcoder(threads=8, overwrite=True, split_threshold_gb=40.0)
+        media_file = MediaFile(path=self.root / "big.mkv", size_gb=60.0, format="mkv")
+
+        self.assertTrue(transcoder.transcode(media_file))
+        args = mock_encode.call_args.args
+        self.assertEqual(args[:2], (media_file.path, self.root / "big_transcoded.mkv.part"))
+        self.assertTrue((self.root / "big_transcoded.mkv").exists())
+        self.assertEqual(args[4], 8)
+
+    def test_build_ffmpeg_command_remux(self):
+        """Test a remux copies every stream."""
+        result = self.transcoder.build_ffmpeg_command(
+            Path("/test/file.mp4"), Path("/test/out.mkv"), action=TranscodeAction.REMUX
+        )
+        self.assertEqual(result[3:7], ["-c:v", "copy", "-c:a", "copy"])
+        self.assertNotIn("libx264", result)
+
+    @patch("subprocess.Popen")
+    def test_transcode_skips_compliant_file(self, mock_popen):
+        """Test a file already in H.264/AAC Matroska is not transcoded."""
+        media_file = MediaFile(
+            path=Path("/test/file.mkv"),
+            size_gb=8.0,
+            format="matroska,webm",
+            streams=[StreamInfo(0, "video", "h264"), StreamInfo(1, "audio", "aac")]
+        )
+
+        self.assertFalse(self.transcoder.transcode(media_file))
+        mock_popen.assert_not_called()
+
+    def test_dry_run_skip_leaves_journal_alone(self):
+        """Test a dry run that decides to skip a file does not mark its job done."""
+        journal = MagicMock()
+        transcoder = Transcoder(threads=4, overwrite=True, journal=journal)
+        media_file = MediaFile(
+            path=Path("/test/file.mkv"),
+            size_gb=8.0,
+            format="matroska,webm",
+            streams=[StreamInfo(0, "video", "h264"), StreamInfo(1, "audio", "aac")]
+        )
+
+        self.assertFalse(transcoder.transcode(media_file, dry_run=True))
+        journal.mark_done.assert_not_called()
+        self.assertFalse(transcoder.transcode(media_file))
+        journal.mark_done.assert_called_once_with(media_file.path)
+
+    def test_savings_ignored_without_minimum(self):
+        """Test a re-encode projected to grow the file still runs unless a minimum savings ratio is set."""
+        media_file = MediaFile(
+            path=Path("/test/show.mkv"), size_gb=2096000 * 2400 / 8 / 1024 ** 3, format="matroska,webm", duration=2400.0, bit_rate=2096000,
+            streams=[
+                StreamInfo(0, "video", "hevc", width=1920, height=1080, bit_rate=2000000, frame_rate=25.0),
+                StreamInfo(1, "audio", "aac", bit_rate=96000)
+            ]
+        )
+
+        self.assertIs(self.transcoder.decide(media_file).action, TranscodeAction.REENCODE)
+        skipping = Transcoder(threads=4, overwrite=True, min_savings_ratio=0.0)
+        self.assertIs(skipping.decide(media_file).action, TranscodeAction.SKIP)
+
+    @patch("subprocess.Popen")
+    def test_low_sampled_savings_are_skipped(self, mock_popen):
+        """Test a re-encode whose samples project too little savings is skipped after sampling only."""
+        self._popen_writing_output(mock_popen, 0)
+        transcoder = Transcoder(threads=4, overwrite=True, sample_count=2, sample_seconds=10.0, min_savings_ratio=0.2)
+        media_file = MediaFile(
+            path=self.root / "file.mp4",
+            size_gb=20 * 1024 / 1024 ** 3,
+            format="mov,mp4,m4a,3gp,3g2,mj2",
+            duration=200.0,
+            streams=[StreamInfo(0, "video", "hevc")]
+        )
+
+        decision = transcoder.decide(media_file)
+        self.assertIs(decision.action, TranscodeAction.SKIP)
+        self.assertEqual(decision.estimated_output_bytes, 2048 * 10)
+        self.assertFalse(transcoder.transcode(media_file))
+        self.assertEqual(mock_popen.call_count, 2)
+        self.assertTrue(all("-ss" in call.args[0] for call in mock_popen.call_args_list))
+
+    @patch("subprocess.Popen")
+    def test_transcode_copies_video_stream(self, mock_popen):
+        """Test only the audio is re-encoded when the video is already H.264."""
+        self._popen_writing_output(mock_popen, 0)
+        media_file = MediaFile(
+            path=self.root / "file.mp4",
+            size_gb=8.0,
+            format="mov,mp4,m4a,3gp,3g2,mj2",
+            streams=[StreamInfo(0, "video", "h264"), StreamInfo(1, "audio", "dts")]
+        )
+
+        self.assertTrue(self.transcoder.transcode(media_file))
+        command = mock_popen.call_args.args[0]
+        self.assertEqual(command[command.index("-c:v") + 1], "copy")
+        self.assertEqual(command[command.index("-c:a") + 1], "aac")
+
+    @patch("subprocess.Popen")
+    def test_progress_reported_to_listeners(self, mock_popen):
+        """Test ffmpeg -progress output reaches registered listeners."""
+        self._popen_writing_output(mock_popen, 0, stdout=(
+            "frame=240\nfps=48.0\nbitrate=2000.0kbits/s\nout_time_us=10000000\nspeed=2.0x\nprogress=continue\n"
+            "frame=480\nfps=48.0\nbitrate=2000.0kbits/s\nout_time_us=20000000\nspeed=2.0x\nprogress=end\n"
+        ))
+        updates = []
+        self.transcoder.add_progress_listener(updates.append)
+        media_file = MediaFile(path=self.root / "file.mp4", size_gb=2.5, format="mp4", duration=20.0)
+
+        self.assertTrue(self.transcoder.transcode(media_file))
+
+        command = mock_popen.call_args.args[0]
+        self.assertEqual(command[1:4], ["-progress", "pipe:1", "-nostats"])
+        self.assertEqual([u.percent for u in updates], [50.0, 100.0])
+        self.assertEqual(updates[0].eta_seconds, 5.0)
+        self.assertEqual(updates[0].bitrate_kbps, 2000.0)
+        self.assertTrue(updates[1].finished)
+
+    @patch("subprocess.Popen")
+    def test_metrics_recorded(self, mock_popen):
+        """Test a finished job appends its metrics as a JSON line."""
+        self._popen_writing_output(mock_popen, 0)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            root = Path(tmp_dir)
+            source = root / "file.mp4"
+            source.write_bytes(b"\x00" * 4096)
+            transcoder = Transcoder(threads=4, overwrite=True, metrics=MetricsRecorder(root / "metrics.jsonl"))
+
+            transcoder.transcode(MediaFile(path=source, size_gb=4096 / 1024 ** 3, format="mp4"))
+
+            (line,) = (root / "metrics.jsonl").read_text().splitlines()
+        record = json.loads(line)
+        self.assertTrue(record["success"])
+        self.assertEqual(record["input_bytes"], 4096)
+        self.assertEqual(record["output_bytes"], 1024)
+        self.assertEqual(record["compression_ratio"], 0.25)
+        self.assertEqual(record["action"], "re-encode")
+
+class TestTranscoderAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.transcoder = Transcoder(threads=4, overwrite=True, max_async_jobs=2)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.media_file = MediaFile(path=self.root / "file.mp4", size_gb=2.5, format="mp4")
+
+    def _fake_ffmpeg(self, script: str):
+        """Make the transcoder run a Python script, given the output path as its argument, instead of ffmpeg."""
+        return patch.object(
+            Transcoder, "build_ffmpeg_command",
+            lambda _self, input_file, output_file, threads=None, action=None:
+                [sys.executable, "-c", script, str(output_file)]
+        )
+
+    async def test_transcode_async_publishes_output(self):
+        """Test a successful async encode is moved from its partial file into place."""
+        with self._fake_ffmpeg("import sys; open(sys.argv[1], 'wb').write(b'mkv')"):
+            self.assertTrue(await self.transcoder.transcode_async(self.media_file))
+
+        self.assertEqual((self.root / "file_transcoded.mkv").read_bytes(), b"mkv")
+        self.assertFalse((self.root / "file_transcoded.mkv.part").exists())
+
+    async def test_transcode_async_keeps_stderr_tail(self):
+        """Test a failed async encode reports the end of ffmpeg's stderr."""
+        script = "import sys; sys.stderr.write('Conversion failed!\\n'); sys.exit(1)"
+        with self._fake_ffmpeg(script):
+            result = await self.transcoder._run_ffmpeg_async(
+                self.transcoder.build_ffmpeg_command(self.media_file.path, self.root / "out.mkv")
+            )
+
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stderr, "Conversion failed!")
+
+    async def test_transcode_async_timeout(self):
+        """Test an encode exceeding its timeout is stopped and reported as failed."""
+        with self._fake_ffmpeg("import time; time.sleep(30)"):
+            self.assertFalse(await self.transcoder.transcode_async(self.media_file, timeout=0.5))
+
+        self.assertFalse(self.transcoder._async_processes)
+        self.assertFalse((self.root / "file_transcoded.mkv.part").exists())
+
+    async def test_cancelling_task_stops_ffmpeg(self):
+        """Test cancelling the awaiting task stops ffmpeg and requeues the job."""
+        journal = MagicMock()
+        self.transcoder.journal = journal
+        script = "import sys, time; open(sys.argv[1], 'wb').write(b'partial'); time.sleep(30)"
+        with self._fake_ffmpeg(script):
+            task = asyncio.ensure_future(self.transcoder.transcode_async(self.media_file))
+            while not (self.root / "file_transcoded.mkv.part").exists():
+                await asyncio.sleep(0.05)
+            (process,) = self.transcoder._async_processes
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertIsNotNone(process.returncode)
+        self.assertFalse((self.root / "file_transcoded.mkv.part").exists())
+        journal.requeue.assert_called_once_with(self.media_file.path)
+
+    async def test_async_job_limit(self):
+        """Test no more than max_async_jobs encodes run at once."""
+        running = []
+        peak = []
+        original = Transcoder._run_ffmpeg_async
+
+        async def tracked(_self, command, *args):
+            running.append(command)
+            peak.append(len(running))
+            await asyncio.sleep(0.05)
+            running.remove(command)
+            return await original(_self, command, *args)
+
+        media_files = [MediaFile(path=self.root / f"file{i}.mp4", size_gb=2.5, format="mp4") for i in range(5)]
+        with self._fake_ffmpeg("import sys; open(sys.argv[1], 'wb').write(b'mkv')"), \
+                patch.object(Transcoder, "_run_ffmpeg_async", tracked):
+            results = await asyncio.gather(*(self.transcoder.transcode_async(m) for m in media_files))
+
+        self.assertEqual(results, [True] * 5)
+        self.assertEqual(max(peak), 2)
+
 if __name__ == "__main__":
     unittest.main()